@@ -0,0 +1,3 @@
+## Benchmarks of universal energy management system
+# The scripts in this package are executed from the root folder of the project, e.g.,
+# python -m benchmarks.solver_latency
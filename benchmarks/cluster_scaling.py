@@ -0,0 +1,49 @@
+## Benchmark of the universal formulation of microgrid clusters
+# The default local ems model is copied to form clusters of 2, 10, 50 and 200 areas, which are connected to the
+# universal ems by the star topology. The building time and the size of the block-angular problem of each horizon
+# (OPF/ED/UC) are measured, and the feasible problems are solved when a solver is given.
+# Usage: python -m benchmarks.cluster_scaling [solver]
+import sys
+import time
+from copy import deepcopy
+from benchmarks.solver_latency import benchmark_models, solving_latency
+from solvers.solver_registry import solver_selection
+from solvers.mix_integer_solvers import sparse_matrix
+
+areas = [2, 10, 50, 200]
+
+
+def cluster_models(models, N):
+    # The local models of a cluster with N areas, the last area is the universal ems
+    (local_model, universal_model) = deepcopy(models)
+    return [deepcopy(local_model) for i in range(N - 1)], universal_model
+
+
+if __name__ == "__main__":
+    from optimal_power_flow.problem_formulation import problem_formulation as problem_formulation_opf
+    from economic_dispatch.problem_formulation import problem_formulation as problem_formulation_ed
+    from unit_commitment.problem_formulation import problem_formulation as problem_formulation_uc
+
+    solver = solver_selection(sys.argv[1]) if len(sys.argv) > 1 else None
+    models = benchmark_models()
+    formulation = {"OPF": problem_formulation_opf,
+                   "ED": problem_formulation_ed,
+                   "UC": problem_formulation_uc}
+
+    print("%-4s %6s %8s %8s %10s %12s %14s" % ("", "Areas", "nx", "neq", "nnz", "Build(ms)", "Solving(ms)"))
+    for horizon in formulation:
+        for N in areas:
+            (local_models, universal_model) = cluster_models(models[horizon], N)
+            t0 = time.time()
+            problem = formulation[horizon].problem_formulation_universal(local_models, universal_model, "Feasible")
+            building_time = time.time() - t0
+            nx = len(problem["c"])
+            Aeq = sparse_matrix(problem["Aeq"], nx)
+            A = sparse_matrix(problem["A"], nx)
+            if solver is not None:
+                (latency, obj, success) = solving_latency(problem, solver, 1)
+                solving_time = "%14.3f" % (latency * 1000)
+            else:
+                solving_time = "%14s" % "-"
+            print("%-4s %6d %8d %8d %10d %12.3f %s" % (
+                horizon, N, nx, Aeq.shape[0], Aeq.nnz + A.nnz, building_time * 1000, solving_time))
@@ -0,0 +1,77 @@
+## Benchmark of the elastic formulation
+# In each operation, the feasible and infeasible problems are built and solved by two threads, and the infeasible
+# solution is used when the feasible problem has no solution. The elastic problem relaxes the power balance equations
+# by the penalised load shedding and renewable energy curtailment, hence only one problem is built and solved.
+# The wall time and the CPU time of both procedures are measured for each horizon (OPF/ED/UC).
+# Usage: python -m benchmarks.elastic_formulation [solver] [number of repeats]
+import sys
+import threading
+import time
+from copy import deepcopy
+from numpy import median
+from benchmarks.solver_latency import benchmark_models
+from solvers.solver_registry import available_solvers, solver_selection
+
+
+class Procedure_Thread(threading.Thread):
+    # Build and solve one problem
+    def __init__(self, formulation, models, type, solver):
+        threading.Thread.__init__(self)
+        self.formulation = formulation
+        self.models = models
+        self.type = type
+        self.solver = solver
+        self.value = 0
+
+    def run(self):
+        (local_model, universal_model) = deepcopy(self.models)
+        problem = self.formulation.problem_formulation_universal(local_model, universal_model, self.type)
+        if "vtypes" in problem:
+            vtypes = problem["vtypes"]
+        else:
+            vtypes = ["c"] * len(problem["lb"])
+        (x, obj, success) = self.solver(problem["c"], Aeq=problem["Aeq"], beq=problem["beq"], A=problem["A"],
+                                        b=problem["b"], xmin=problem["lb"], xmax=problem["ub"], vtypes=vtypes)
+        self.value = {"obj": obj, "success": success}
+
+
+def procedure_time(formulation, models, types, solver, repeats):
+    # Return the median wall time (s), the median CPU time (s) and the objective values of the procedure
+    wall_time = []
+    cpu_time = []
+    for i in range(repeats):
+        t0 = time.time()
+        c0 = time.process_time()
+        threads = [Procedure_Thread(formulation, models, type, solver) for type in types]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time.append(time.time() - t0)
+        cpu_time.append(time.process_time() - c0)
+
+    return median(wall_time), median(cpu_time), [thread.value["obj"] for thread in threads]
+
+
+if __name__ == "__main__":
+    from optimal_power_flow.problem_formulation import problem_formulation as problem_formulation_opf
+    from economic_dispatch.problem_formulation import problem_formulation as problem_formulation_ed
+    from unit_commitment.problem_formulation import problem_formulation as problem_formulation_uc
+
+    name = sys.argv[1] if len(sys.argv) > 1 else available_solvers()[0]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    solver = solver_selection(name)
+    models = benchmark_models()
+    formulation = {"OPF": problem_formulation_opf,
+                   "ED": problem_formulation_ed,
+                   "UC": problem_formulation_uc}
+    procedures = {"Two threads": ["Feasible", "Infeasible"],
+                  "Elastic": ["Elastic"]}
+
+    print("%-4s %-12s %-8s %10s %10s %16s" % ("", "Procedure", "Solver", "Wall(ms)", "CPU(ms)", "Objective"))
+    for horizon in formulation:
+        for procedure in procedures:
+            (wall_time, cpu_time, obj) = procedure_time(formulation[horizon], models[horizon], procedures[procedure],
+                                                        solver, repeats)
+            print("%-4s %-12s %-8s %10.3f %10.3f %16.4f" % (
+                horizon, procedure, name, wall_time * 1000, cpu_time * 1000, obj[0]))
@@ -0,0 +1,138 @@
+## Benchmark of the information exchange between the universal ems and many local emss
+# The local emss are simulated by REQ sockets on localhost, which upload the dynamic information of the UC horizon and
+# wait for the commands. In each cycle, the universal ems collects the uploads of all the areas and returns the command
+# of each area, by the REP socket (one local ems after the other, as the former upload channel) and by the gateway
+# (the uploads are collected concurrently and the commands are routed by the areas).
+# The local emss run in another process. The last scenario drops the upload of one area, the gateway closes the
+# collection at the deadline and serves the other areas, while the REP socket would wait for the missing area without
+# any limit.
+# Usage: python -m benchmarks.information_gateway [local emss] [cycles]
+import multiprocessing
+import sys
+import time
+import zmq
+from configuration.configuration_time_line import default_look_ahead_time_step
+from data_management.information_gateway import InformationGateway
+import modelling.dynamic_operation_pb2 as dynamic_operation
+
+T = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]
+
+
+def upload(area, Target_time):
+    # The dynamic information of a local ems
+    info = dynamic_operation.local_sources()
+    info.AREA = area
+    info.TIME_STAMP = Target_time
+    load_ac = info.Load_AC_Type()
+    load_ac.PD.extend([area + i for i in range(T)])
+    info.load_ac.extend([load_ac])
+    info.PMG.extend([0.0] * T)
+    return info
+
+
+def command(info):
+    # The command of the area, the upload with the command time
+    result = dynamic_operation.local_sources()
+    result.CopyFrom(info)
+    result.TIME_STAMP_COMMAND = info.TIME_STAMP
+    return result
+
+
+def rep_server(socket, N):
+    # The former channel, the uploads are received and replied one after the other
+    for i in range(N):
+        info = dynamic_operation.local_sources()
+        info.ParseFromString(socket.recv())
+        socket.send(command(info).SerializeToString())
+
+
+def gateway_server(gateway, N, deadline):
+    info = dynamic_operation.local_sources()
+    uploads = gateway.collect(info, list(range(N)), time.time() + deadline)
+    for area in uploads:
+        gateway.send(area, command(uploads[area]))
+
+
+def local_emss(address, N, cycles, skipped, results):
+    """Simulate the local emss by the REQ sockets in one process, which upload and wait for the commands in each cycle
+
+        @param address: the address of the upload channel
+        @param N: the number of the local emss, the area of each local ems is its index
+        @param cycles: the cycles, the first cycle is the warm-up of the connections
+        @param skipped: the areas which do not upload
+        @param results: the queue of the latency of each command (s)
+        """
+    context = zmq.Context()
+    clients = []
+    for area in range(N):
+        client = context.socket(zmq.REQ)
+        client.setsockopt(zmq.LINGER, 0)
+        client.connect(address)
+        clients.append(client)
+    latency = []
+    for cycle in range(cycles + 1):
+        poller = zmq.Poller()
+        sent = {}
+        for (area, client) in enumerate(clients):
+            if area in skipped:
+                continue
+            client.send(upload(area, cycle).SerializeToString())
+            sent[client] = (area, time.time())
+            poller.register(client, zmq.POLLIN)
+        while sent:
+            events = dict(poller.poll(10000))
+            if not events:
+                raise RuntimeError("The commands of {} local emss are missing!".format(len(sent)))
+            for client in events:
+                result = dynamic_operation.local_sources()
+                result.ParseFromString(client.recv())
+                (area, t0) = sent.pop(client)
+                assert result.AREA == area and result.TIME_STAMP_COMMAND == cycle
+                if cycle > 0:
+                    latency.append(time.time() - t0)
+                poller.unregister(client)
+    for client in clients:
+        client.close()
+    context.term()
+    results.put(latency)
+
+
+def run_cycles(address, server, N, cycles, skipped=()):
+    # Serve the local emss in the other process, the elapsed time excludes the warm-up cycle
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=local_emss, args=(address, N, cycles, skipped, results))
+    process.start()
+    server()
+    t0 = time.time()
+    for cycle in range(cycles):
+        server()
+    elapsed = time.time() - t0
+    latency = sorted(results.get())
+    process.join()
+    return (elapsed, latency)
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    context = zmq.Context()
+
+    rep = context.socket(zmq.REP)
+    rep.bind("tcp://127.0.0.1:5656")
+    gateway = InformationGateway(context, "tcp://127.0.0.1:5657", 10)
+    scenarios = {"REP socket": ("tcp://127.0.0.1:5656", lambda: rep_server(rep, N), ()),
+                 "Gateway": ("tcp://127.0.0.1:5657", lambda: gateway_server(gateway, N, 10), ()),
+                 "Gateway, one missing": ("tcp://127.0.0.1:5657", lambda: gateway_server(gateway, N, 1), (0,))}
+
+    print("%-22s %6s %7s %10s %12s %10s %10s" % ("Channel", "LEMSs", "Cycles", "Cycles/s", "Messages/s", "p50(ms)",
+                                               "p99(ms)"))
+    for name in scenarios:
+        (address, server, skipped) = scenarios[name]
+        (elapsed, latency) = run_cycles(address, server, N, cycles, skipped)
+        print("%-22s %6d %7d %10.2f %12.0f %10.3f %10.3f" % (
+            name, N, cycles, cycles / elapsed, len(latency) / elapsed, latency[len(latency) // 2] * 1000,
+            latency[int(len(latency) * 0.99)] * 1000))
+    print("Gateway metrics: {}".format(gateway.status()))
+    rep.close()
+    gateway.socket.close()
+    context.term()
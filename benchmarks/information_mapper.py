@@ -0,0 +1,174 @@
+## Micro-benchmark of the field mapper between the models and the information models
+# The information models of OPF (scalar mode) and ED/UC (vector mode) are formulated and extracted by the resolved
+# fields of information_mapper, and by the former procedure, which maps each field in the cycles, i.e., the path of
+# the field is parsed, and the first value is taken when the assignment of a list-valued field raises the exception
+# (scalar mode), or the types of the values are checked (vector mode). The messages of the former procedure must be the
+# same as the mapper, otherwise the script exits with 1.
+# The OPF models are formulated with the scalars and with the list-valued fields, e.g., the commands of the solving.
+# Usage: python -m benchmarks.information_mapper [seconds of each case]
+import sys
+import time
+from configuration.configuration_time_line import default_look_ahead_time_step
+from data_management.information_mapper import scalar_layout, scalar_constants, scalar_commands, vector_constants, \
+    scalar_formulation, scalar_extraction, vector_formulation, vector_extraction, message_path
+from data_management.information_pool import message_fields
+from data_management.information_schema import series_layout, command_series
+from modelling import information_exchange_pb2, dynamic_operation_pb2
+from modelling.microgrid_state import snapshot
+from benchmarks.information_pool import command_models
+
+
+def model_value(model, device, key):
+    return model[key] if device is None else model[device][key]
+
+
+def sub_message(info, path):
+    # The (sub-)message of the path
+    (message, field) = message_path(path)
+    if message is None:
+        return (info, field)
+    return (getattr(info, message[0])[message[1]], field)
+
+
+def former_scalar_formulation(model, Target_time, info):
+    # The fields are assigned by the table, the first value is assigned after the exception of a list-valued field
+    for (field, number) in [("dg", 2), ("ess", 1), ("pv", 1), ("wp", 1), ("load_ac", 2), ("load_dc", 2), ("bic", 1)]:
+        message_fields(getattr(info, field), number)
+    info.TIME_STAMP = Target_time
+    for (path, value) in scalar_constants:
+        setattr(*sub_message(info, path), value)
+    for (path, device, key) in scalar_layout:
+        (message, field) = sub_message(info, path)
+        try:
+            setattr(message, field, model_value(model, device, key))
+        except:
+            setattr(message, field, model_value(model, device, key)[0])
+    info.TIME_STAMP_COMMAND = Target_time
+    return info
+
+
+def former_scalar_extraction(model, info):
+    model = snapshot(model)
+    for (device, key, path) in scalar_commands:
+        value = getattr(*sub_message(info, path))
+        if device is None:
+            model[key] = value
+        else:
+            model[device][key] = value
+    return model
+
+
+def former_vector_formulation(model, Target_time, info, T):
+    # The series are extended by the table, the types of the values are checked in each cycle
+    for (field, number) in [("dg", 2), ("ess", 1), ("pv", 1), ("wp", 1), ("load_ac", 2), ("load_dc", 2), ("bic", 1)]:
+        message_fields(getattr(info, field), number)
+    info.AREA = model["UG"]["AREA"]
+    info.TIME_STAMP = Target_time
+    for (path, value) in vector_constants:
+        setattr(*sub_message(info, path), value)
+    del info.PMG[:]
+    for (path, dtype, device, key, expansion) in series_layout:
+        (message, field) = sub_message(info, path)
+        if expansion == "Available":
+            getattr(message, field).extend([1] * T)
+            continue
+        value = model_value(model, device, key)
+        if type(value) is not list:
+            value = [value]
+        if expansion == "Status" and len(value) != T:
+            value = value * T
+        getattr(message, field).extend(value)
+    info.COMMAND_TYPE = model["COMMAND_TYPE"]
+    info.TIME_STAMP_COMMAND = Target_time
+    return info
+
+
+def former_vector_extraction(model, info):
+    for (device, key, path) in command_series:
+        value = getattr(*sub_message(info, path))._values
+        if device is None:
+            model[key] = value
+        else:
+            model[device][key] = value
+    model["COMMAND_TYPE"] = info.COMMAND_TYPE
+    return model
+
+
+def list_valued(model):
+    # The OPF model whose fields are list-valued
+    model = snapshot(model)
+    for (path, device, key) in scalar_layout:
+        if device is not None and type(model[device][key]) is not list:
+            model[device][key] = [model[device][key]]
+    model["PMG"] = [model["PMG"]]
+    return model
+
+
+def rate(function, seconds):
+    # The calls per second of the function
+    (calls, t0) = (0, time.time())
+    while time.time() - t0 < seconds:
+        for i in range(20):
+            function()
+        calls += 20
+    return calls / (time.time() - t0)
+
+
+def mapper_case(*args):
+    """Measure the messages per second of the mapping, and of the mapping with the serialization or the parsing
+
+        @param args: the formulation, the extraction, the model, the information model, the received information model,
+        the arguments after the information model of the formulation, and the duration of each measure (s)
+        @return: the messages per second of the formulation, the extraction, the encoding and the decoding, and the
+        message
+        """
+    (formulation, extraction, model, info, received, extra, seconds) = args
+    message = formulation(model, 1506182400, info, *extra).SerializeToString()
+    received.ParseFromString(message)
+
+    def formulating():
+        formulation(model, 1506182400, info, *extra)
+
+    def extracting():
+        extraction(model, received)
+
+    def encoding():
+        formulation(model, 1506182400, info, *extra).SerializeToString()
+
+    def decoding():
+        received.ParseFromString(message)
+        extraction(model, received)
+
+    return (rate(formulating, seconds), rate(extracting, seconds), rate(encoding, seconds), rate(decoding, seconds),
+            message)
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    models = command_models()
+    cases = [("OPF", models["OPF"], information_exchange_pb2.informaiton_exchange, ()),
+             ("OPF (lists)", list_valued(models["OPF"]), information_exchange_pb2.informaiton_exchange, ()),
+             ("ED", models["ED"], dynamic_operation_pb2.local_sources,
+              (default_look_ahead_time_step["Look_ahead_time_ed_time_step"],)),
+             ("UC", models["UC"], dynamic_operation_pb2.local_sources,
+              (default_look_ahead_time_step["Look_ahead_time_uc_time_step"],))]
+    failed = False
+
+    print("%-12s %-9s %14s %14s %10s %10s %6s" % ("Model", "Mapper", "Formulation/s", "Extraction/s", "Encode/s",
+                                                  "Decode/s", "Same"))
+    for (name, model, message_type, extra) in cases:
+        if message_type is information_exchange_pb2.informaiton_exchange:
+            mappers = [("Former", former_scalar_formulation, former_scalar_extraction),
+                       ("Mapper", scalar_formulation, scalar_extraction)]
+        else:
+            mappers = [("Former", former_vector_formulation, former_vector_extraction),
+                       ("Mapper", vector_formulation, vector_extraction)]
+        results = [mapper_case(formulation, extraction, snapshot(model), message_type(), message_type(), extra,
+                               seconds) for (mapper, formulation, extraction) in mappers]
+        same = results[0][4] == results[1][4]
+        for ((mapper, formulation, extraction), result) in zip(mappers, results):
+            print("%-12s %-9s %14.0f %14.0f %10.0f %10.0f %6s" % ((name, mapper) + result[0:4] + (same,)))
+        failed = failed or not same
+    if failed:
+        print("The messages of the mappers are different!")
+        sys.exit(1)
@@ -0,0 +1,91 @@
+## Long run regression of the information models formulated by the operating processes
+# The commands of OPF, ED and UC are formulated by many cycles on the reused messages, as the universal ems and the local
+# ems do. The serialized size and the lengths of the repeated fields must be the same in all the cycles, and the memory
+# allocated by the formulation (tracemalloc) must not grow after the warm-up cycles, otherwise the script exits with 1.
+# Usage: python -m benchmarks.information_pool [cycles]
+import resource
+import sys
+import time
+import tracemalloc
+from benchmarks.solver_latency import benchmark_models
+from data_management.information_management import information_formulation_extraction, \
+    information_formulation_extraction_dynamic
+from modelling import information_exchange_pb2
+
+warm_up = 100  # The cycles before the memory baseline
+growth_limit = 16 * 1024  # The allowed growth of the allocated memory (bytes)
+start_time = 1506182400  # The time stamps of the cycles have the same serialized size
+
+
+def command_models(*args):
+    # The local models of each process, the load profiles are integers as the forecasting results
+    models = {}
+    for (name, (local_model, universal_model)) in benchmark_models().items():
+        local_model["COMMAND_TYPE"] = 0
+        for load in ["Load_ac", "Load_uac", "Load_dc", "Load_udc"]:
+            if type(local_model[load]["PD"]) is list:
+                local_model[load]["PD"] = [int(value) for value in local_model[load]["PD"]]
+            else:
+                local_model[load]["PD"] = int(local_model[load]["PD"])
+        models[name] = local_model
+    return models
+
+
+def message_shape(message):
+    # The serialized size and the lengths of the repeated fields of the message
+    shape = [message.ByteSize()]
+    for (field, value) in message.ListFields():
+        if hasattr(value, "ListFields"):  # The sub-message
+            shape.append((field.name, message_shape(value)))
+        elif not isinstance(value, (str, bytes)) and hasattr(value, "__len__"):  # The repeated field
+            shape.append((field.name, len(value)))
+            if field.message_type is not None:
+                shape.extend([message_shape(sub_message) for sub_message in value])
+    return shape
+
+
+def formulation_cycles(name, model, cycles):
+    """Formulate the command of the process by the cycles
+
+        @param name: the operating process, i.e., "OPF", "ED" or "UC"
+        @param model: the local model of the process
+        @param cycles: the number of cycles after the warm-up
+        @return: the time per cycle (s), the memory growth (bytes) and the number of cycles whose shape changes
+        """
+    info = information_exchange_pb2.informaiton_exchange()  # The information model of OPF, reused by the cycles
+    if name == "OPF":
+        formulation = lambda Target_time: information_formulation_extraction.info_formulation(model, Target_time, info)
+    else:
+        formulation = lambda Target_time: information_formulation_extraction_dynamic.info_formulation(model,
+                                                                                                      Target_time, name)
+    for cycle in range(warm_up):
+        shape = message_shape(formulation(start_time + cycle))
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    changed = 0
+    t0 = time.time()
+    for cycle in range(cycles):
+        message = formulation(start_time + cycle)
+        if message_shape(message) != shape:
+            changed += 1
+    elapsed = time.time() - t0
+    growth = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return (elapsed / cycles, growth, changed)
+
+
+if __name__ == "__main__":
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    models = command_models()
+    failed = False
+
+    print("%-6s %8s %14s %14s %10s" % ("Model", "Cycles", "Cycle(us)", "Growth(B)", "Changed"))
+    for name in ["OPF", "ED", "UC"]:
+        (cycle_time, growth, changed) = formulation_cycles(name, models[name], cycles)
+        print("%-6s %8d %14.1f %14d %10d" % (name, cycles, cycle_time * 1e6, growth, changed))
+        failed = failed or growth > growth_limit or changed > 0
+    print("Max RSS: {} kB".format(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+    if failed:
+        print("The information models grow by the cycles!")
+        sys.exit(1)
@@ -0,0 +1,107 @@
+## Benchmark of the schemas of the dynamic information between the universal ems and the local ems
+# The dynamic information of a local ems is encoded (formulation and serialization) and decoded (parsing and the update
+# of the models in the universal ems, or the extraction of the commands in the local ems) by schema 1 (local_sources,
+# repeated fields) and schema 2 (local_sources_v2, packed columns), for the horizons of T time steps. The updated models
+# and the extracted commands of both schemas must be the same, otherwise the script exits with 1.
+# Usage: python -m benchmarks.information_schema [T ...], e.g., 12 48 1440
+import sys
+import time
+from numpy import allclose
+from configuration.configuration_time_line import default_look_ahead_time_step
+from data_management.information_collection import information_updating
+from data_management.information_management import information_formulation_extraction_dynamic
+from data_management.information_schema import dynamic_information, series_layout
+from modelling.microgrid_state import snapshot
+from benchmarks.solver_latency import benchmark_models
+
+
+def series_model(model, T):
+    # The model whose series have T time steps, the set-points are traced (COMMAND_TYPE = 1)
+    model = snapshot(model)
+    for (path, dtype, device, key, expansion) in series_layout:
+        if expansion == "Available":
+            continue
+        if dtype == "<i4":
+            values = [(i * 7 + len(path)) % 100 for i in range(T)]
+        else:
+            values = [((i * 7 + len(path)) % 100) / 8 for i in range(T)]
+        if device is None:
+            model[key] = values
+        else:
+            model[device][key] = values
+    model["ESS"]["SOC"] = 0.5
+    model["COMMAND_TYPE"] = 1
+    return model
+
+
+def timing(function, repeats):
+    # The mean time (s) of the function
+    t0 = time.time()
+    for i in range(repeats):
+        function()
+    return (time.time() - t0) / repeats
+
+
+def schema_cycle(model, T, schema, repeats):
+    """Encode and decode the dynamic information of the model by the schema
+
+        @param model: the local model of the unit commitment
+        @param T: the look ahead time steps
+        @param schema: the schema of the connection
+        @param repeats: the repeats of the timing
+        @return: the encoding time (s), the decoding time in the universal ems and the local ems (s), the message size
+        (bytes), the updated models and the extracted commands
+        """
+    info = dynamic_information(schema)
+    received = dynamic_information(schema)
+
+    def encoding():
+        return information_formulation_extraction_dynamic.info_formulation(model, 0, "UC", info).SerializeToString()
+
+    message = encoding()
+
+    def updating():
+        received.ParseFromString(message)
+        return information_updating(received, snapshot(model), T)
+
+    def extraction():
+        received.ParseFromString(message)
+        return information_formulation_extraction_dynamic.info_extraction(snapshot(model), received)
+
+    return (timing(encoding, repeats), timing(updating, repeats), timing(extraction, repeats), len(message),
+            updating(), snapshot(extraction()))
+
+
+def same_models(models_1, models_2):
+    # Whether the series of both models are the same
+    for (path, dtype, device, key, expansion) in series_layout:
+        if key is None:
+            continue
+        (value_1, value_2) = (models_1[key], models_2[key]) if device is None else \
+            (models_1[device][key], models_2[device][key])
+        if not allclose(value_1, value_2):
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    horizons = [int(T) for T in sys.argv[1:]] or [12, 48, 1440]
+    local_model = benchmark_models()["UC"][0]
+    failed = False
+
+    print("%-6s %7s %12s %12s %12s %10s %8s" % ("T", "Schema", "Encode(us)", "Update(us)", "Extract(us)", "Bytes",
+                                                "Same"))
+    for T in horizons:
+        default_look_ahead_time_step["Look_ahead_time_uc_time_step"] = T  # The horizon of the formulation
+        model = series_model(local_model, T)
+        repeats = max(10, 20000 // T)
+        results = {schema: schema_cycle(model, T, schema, repeats) for schema in [1, 2]}
+        same = same_models(results[1][4], results[2][4]) and same_models(results[1][5], results[2][5])
+        for schema in [1, 2]:
+            (encoding, updating, extraction, size) = results[schema][0:4]
+            print("%-6d %7d %12.1f %12.1f %12.1f %10d %8s" % (T, schema, encoding * 1e6, updating * 1e6,
+                                                             extraction * 1e6, size, same))
+        failed = failed or not same
+    if failed:
+        print("The models of both schemas are different!")
+        sys.exit(1)
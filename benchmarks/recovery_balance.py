@@ -0,0 +1,98 @@
+## Regression check of the recovery problems and their decoding
+# The loads of the benchmark models are raised until the feasible problems of ED and UC have no solution, and the
+# recovery problems are solved and decoded by result_update of the operating processes. The served loads and the used
+# renewable energy of the recovery problems are power, as PL_*/PPV/PWP in ED and IL_*/IPV/IWP in UC, hence the decoded
+# shedding (PD - served) and curtailment (PG - used) must balance the AC and DC buses of each area in each time step.
+# The commands are truncated to integers by the decoder, so each bus is balanced within one unit of each command.
+# Otherwise the script exits with 1.
+# Usage: python -m benchmarks.recovery_balance [solver] [load factor]
+import sys
+from copy import deepcopy
+from numpy import array
+from benchmarks.solver_latency import benchmark_models
+from solvers.solver_registry import available_solvers, solver_selection
+
+loads = ["Load_ac", "Load_uac", "Load_dc", "Load_udc"]
+
+
+def series(value, T):
+    # The command or the forecasting of T time steps
+    value = array(value, dtype=float, ndmin=1)
+    return value if len(value) == T else value.repeat(T)
+
+
+def bus_mismatch(model, T):
+    """The mismatch of the AC and DC buses of the decoded commands
+
+        @param model: the decoded model
+        @param T: the look ahead time steps
+        @return: the largest mismatch of both buses (kW)
+        """
+    served = dict((load, series(model[load]["PD"], T) - series(model[load]["COMMAND_SHED"], T)) for load in loads)
+    used = dict((res, series(model[res]["PG"], T) - series(model[res]["COMMAND_CURT"], T)) for res in ["PV", "WP"])
+    ac = series(model["DG"]["COMMAND_PG"], T) + series(model["UG"]["COMMAND_PG"], T) - \
+        series(model["BIC"]["COMMAND_AC2DC"], T) + series(model["BIC"]["COMMAND_DC2AC"], T) * model["BIC"][
+        "EFF_DC2AC"] - served["Load_ac"] - served["Load_uac"]
+    dc = series(model["BIC"]["COMMAND_AC2DC"], T) * model["BIC"]["EFF_AC2DC"] - \
+        series(model["BIC"]["COMMAND_DC2AC"], T) + series(model["ESS"]["COMMAND_PG"], T) - series(model["PMG"], T) - \
+        served["Load_dc"] - served["Load_udc"] + used["PV"] + used["WP"]
+    return max(abs(ac).max(), abs(dc).max())
+
+
+def recovery_case(*args):
+    """Solve the feasible and the recovery problems of the overloaded models, and decode the recovery solution
+
+        @param args: the problem formulation, the result update, the models, the solver and the look ahead time steps
+        @return: whether the feasible problem is solved, whether the recovery problem is solved, the total shedding and
+        the largest mismatch of the buses of both areas
+        """
+    (formulation, result_update, models, solver, T) = args
+    results = {}
+    for type in ["Feasible", "Infeasible"]:
+        (local_model, universal_model) = deepcopy(models)
+        problem = formulation.problem_formulation_universal(local_model, universal_model, type)
+        vtypes = problem["vtypes"] if "vtypes" in problem else ["c"] * len(problem["lb"])
+        (x, obj, success) = solver(problem["c"], Aeq=problem["Aeq"], beq=problem["beq"], A=problem["A"],
+                                   b=problem["b"], xmin=problem["lb"], xmax=problem["ub"], vtypes=vtypes)
+        results[type] = (x, success, local_model, universal_model)
+
+    (x, success, local_model, universal_model) = results["Infeasible"]
+    (local_model, universal_model) = result_update({"x": x, "success": success}, local_model, universal_model,
+                                                   "Infeasible")
+    shedding = sum(series(model[load]["COMMAND_SHED"], T).sum() for model in [local_model, universal_model]
+                   for load in loads)
+    mismatch = max(bus_mismatch(local_model, T), bus_mismatch(universal_model, T))
+    return (bool(results["Feasible"][1]), bool(success), shedding, mismatch)
+
+
+if __name__ == "__main__":
+    from configuration.configuration_time_line import default_look_ahead_time_step
+    from economic_dispatch.problem_formulation import problem_formulation as problem_formulation_ed
+    from economic_dispatch.main import result_update as result_update_ed
+    from unit_commitment.problem_formulation import problem_formulation as problem_formulation_uc
+    from unit_commitment.main import result_update as result_update_uc
+
+    name = sys.argv[1] if len(sys.argv) > 1 else available_solvers()[0]
+    factor = float(sys.argv[2]) if len(sys.argv) > 2 else 6.0
+    solver = solver_selection(name)
+    models = benchmark_models()
+    cases = [("ED", problem_formulation_ed, result_update_ed,
+              default_look_ahead_time_step["Look_ahead_time_ed_time_step"]),
+             ("UC", problem_formulation_uc, result_update_uc,
+              default_look_ahead_time_step["Look_ahead_time_uc_time_step"])]
+    failed = False
+
+    print("%-4s %-8s %9s %9s %12s %10s" % ("", "Solver", "Feasible", "Recovery", "Shedding", "Mismatch"))
+    for (horizon, formulation, result_update, T) in cases:
+        overloaded = deepcopy(models[horizon])
+        for model in overloaded:
+            model["COMMAND_TYPE"] = 0
+            for load in ["Load_ac", "Load_uac"]:
+                model[load]["PD"] = [value * factor for value in model[load]["PD"]]
+        (feasible, recovered, shedding, mismatch) = recovery_case(formulation, result_update, overloaded, solver, T)
+        print("%-4s %-8s %9s %9s %12.0f %10.3f" % (horizon, name, feasible, recovered, shedding, mismatch))
+        # Each bus has at most ten truncated commands
+        failed = failed or feasible or not recovered or shedding <= 0 or mismatch > 10
+    if failed:
+        print("The recovery problems are not overloaded, or the decoded commands do not balance the buses!")
+        sys.exit(1)
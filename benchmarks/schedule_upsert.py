@@ -0,0 +1,115 @@
+## Benchmark of the schedule writing between the operating processes
+# The UC schedule is written to long2middle (288 rows) and the ED schedule is written to middle2short (60 rows), as
+# the first cycle (insert) and the following cycle (update). The row by row procedure queries, writes and commits each
+# row, and the bulk procedure writes all the rows by one upsert in one transaction.
+# The round trips, i.e., the statements executed by the database and the commits, are counted by the engine events.
+# The look ahead windows of the lower layer are read from the schedule bus and from the table (by one range query).
+# Usage: python -m benchmarks.schedule_upsert [database string], an in-memory SQLite database is used by default
+import sys
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from configuration.configuration_time_line import default_time, default_look_ahead_time_step
+from data_management.database_format import long2middle, middle2short
+from data_management.schedule_upsert import schedule_columns, upsert_schedule
+from data_management.schedule_bus import schedule_bus, query_schedule
+from modelling.power_flow.layout import variable_layout
+from modelling.solution_decoder import solution_decoder
+from benchmarks.solver_latency import benchmark_models
+
+
+def row_by_row(session, table, columns, expired_time):
+    # The former procedure, each row is queried, written and committed
+    session.query(table).filter(table.TIME_STAMP < expired_time).delete()
+    session.commit()
+    names = list(columns)
+    for values in zip(*[columns[name] for name in names]):
+        row = dict(zip(names, values))
+        if session.query(table).filter(table.TIME_STAMP == row["TIME_STAMP"]).count() == 0:
+            session.add(table(**row))
+        else:
+            record = session.query(table).filter(table.TIME_STAMP == row["TIME_STAMP"]).first()
+            for name in names:
+                setattr(record, name, row[name])
+        session.commit()
+
+
+class RoundTrips():
+    # Count the statements and commits of the engine
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self.statement)
+        event.listen(engine, "commit", self.commit)
+
+    def statement(self, *args):
+        self.statements += 1
+
+    def commit(self, *args):
+        self.commits += 1
+
+
+def schedule(horizon, T):
+    # The schedule of the horizon, the commands are decoded from a blank solution
+    model = benchmark_models()[horizon][0]
+    layout = variable_layout(horizon)
+    model = solution_decoder(layout).decode([0] * (T * layout.NX), model, T)
+    if horizon == "ED":  # The status of generators is not modified by ED
+        model["DG"]["COMMAND_START_UP"] = model["DG"]["GEN_STATUS"]
+        model["UG"]["COMMAND_START_UP"] = model["UG"]["GEN_STATUS"]
+    return model
+
+
+if __name__ == "__main__":
+    db_str = sys.argv[1] if len(sys.argv) > 1 else "sqlite://"
+    engine = create_engine(db_str, echo=False)
+    long2middle.__table__.create(engine, checkfirst=True)
+    middle2short.__table__.create(engine, checkfirst=True)
+    session = sessionmaker(bind=engine)()
+    round_trips = RoundTrips(engine)
+
+    T_ed = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
+    T_uc = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]
+    tables = {"long2middle": (long2middle, schedule("UC", T_uc), default_time["Time_step_ed"],
+                              int(default_time["Time_step_uc"] / default_time["Time_step_ed"]),
+                              default_time["Look_ahead_time_uc"]),
+              "middle2short": (middle2short, schedule("ED", T_ed), default_time["Time_step_opf"],
+                               int(default_time["Time_step_ed"] / default_time["Time_step_opf"]),
+                               default_time["Look_ahead_time_ed"])}
+    procedures = {"Row by row": row_by_row, "Bulk upsert": upsert_schedule}
+
+    print("%-14s %-12s %-7s %6s %12s %9s %10s" % ("Table", "Procedure", "Cycle", "Rows", "Statements", "Commits",
+                                                "Time(ms)"))
+    for name in tables:
+        (table, model, delta_T, compress_rate, look_ahead_time) = tables[name]
+        add_len = int(look_ahead_time / delta_T)
+        for procedure in procedures:
+            session.query(table).delete()
+            session.commit()
+            for cycle in ["Insert", "Update"]:
+                Target_time = default_time["Base_time"]
+                columns = schedule_columns(model, Target_time, delta_T, compress_rate, add_len)
+                (statements, commits) = (round_trips.statements, round_trips.commits)
+                t0 = time.time()
+                procedures[procedure](session, table, columns, Target_time - look_ahead_time)
+                print("%-14s %-12s %-7s %6d %12d %9d %10.3f" % (
+                    name, procedure, cycle, add_len, round_trips.statements - statements,
+                    round_trips.commits - commits, (time.time() - t0) * 1000))
+
+    # The look ahead window of the lower layer, i.e., ED reads long2middle and OPF reads middle2short
+    windows = {"long2middle": T_ed, "middle2short": default_look_ahead_time_step["Look_ahead_time_opf_time_step"]}
+    print("%-14s %-12s %6s %12s %10s" % ("Table", "Reading", "Rows", "Statements", "Time(ms)"))
+    for name in tables:
+        (table, model, delta_T, compress_rate, look_ahead_time) = tables[name]
+        buffer = schedule_bus[name]
+        T = windows[name]
+        buffer.publish(schedule_columns(model, default_time["Base_time"], delta_T, compress_rate,
+                                        int(look_ahead_time / delta_T)))
+        readings = {"Schedule bus": lambda: buffer.read(default_time["Base_time"], T),
+                    "Range query": lambda: query_schedule(session, table, default_time["Base_time"], T, delta_T)}
+        for reading in readings:
+            statements = round_trips.statements
+            t0 = time.time()
+            assert readings[reading]() is not None
+            print("%-14s %-12s %6d %12d %10.3f" % (name, reading, T, round_trips.statements - statements,
+                                                   (time.time() - t0) * 1000))
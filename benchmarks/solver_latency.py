@@ -0,0 +1,100 @@
+## Benchmark of the solving latency of different solvers
+# The local and universal models are generated by the default configuration, then the feasible and infeasible
+# problems of each horizon (OPF/ED/UC) are solved by all the available solvers.
+# Usage: python -m benchmarks.solver_latency [number of repeats]
+import sys
+import time
+from copy import deepcopy
+from numpy import median, array, ones
+from start_up.start_up_lems import StartUpLems
+from modelling import transmission_lines
+from configuration.configuration_time_line import default_look_ahead_time_step
+from solvers.solver_registry import available_solvers, solver_selection
+
+
+def forecasting_profile(value, T):
+    # The forecasting profile of T time steps, a scalar is used in the short term operation
+    profile = (array(value, dtype=float) * ones(T)).round().tolist()
+    return profile[0] if T == 1 else profile
+
+
+def benchmark_models(*args):
+    # Generate the local and universal models of short, middle and long term operation
+    from optimal_power_flow.input_check import input_check_short_term
+    from economic_dispatch.input_check import input_check_middle_term
+    from unit_commitment.input_check import input_check_long_term
+
+    (local_model_short, local_model_middle, local_model_long) = StartUpLems.start_up()
+    (universal_model_short, universal_model_middle, universal_model_long) = StartUpLems.start_up()
+
+    T_middle = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
+    T_long = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]
+    # The forecasting results are replaced by the constant profiles, i.e., half of the capacities
+    for (model, T) in [(local_model_short, 1), (universal_model_short, 1), (local_model_middle, T_middle),
+                       (universal_model_middle, T_middle), (local_model_long, T_long), (universal_model_long, T_long)]:
+        for load in ["Load_ac", "Load_uac", "Load_dc", "Load_udc"]:
+            model[load]["PD"] = forecasting_profile(model[load]["PDMAX"] / 2, T)
+        for res in ["PV", "WP"]:
+            model[res]["PG"] = forecasting_profile(array(model[res]["PMAX"], dtype=float) / 2, T)
+    universal_model_short["LINE"] = transmission_lines.Line.copy()
+    universal_model_middle["LINE"] = transmission_lines.Line.copy()
+    universal_model_middle["LINE"]["STATUS"] = [universal_model_middle["LINE"]["STATUS"]] * T_middle
+    universal_model_long["LINE"] = transmission_lines.Line.copy()
+    universal_model_long["LINE"]["STATUS"] = [universal_model_long["LINE"]["STATUS"]] * T_long
+
+    models = {"OPF": (input_check_short_term.model_local_check(local_model_short),
+                      input_check_short_term.model_universal_check(universal_model_short)),
+              "ED": (input_check_middle_term.model_local_check(local_model_middle),
+                     input_check_middle_term.model_universal_check(universal_model_middle)),
+              "UC": (input_check_long_term.model_local_check(local_model_long),
+                     input_check_long_term.model_universal_check(universal_model_long))}
+
+    return models
+
+
+def mathematical_models(*args):
+    # Formulate the feasible and infeasible problems of each horizon
+    from optimal_power_flow.problem_formulation import problem_formulation as problem_formulation_opf
+    from economic_dispatch.problem_formulation import problem_formulation as problem_formulation_ed
+    from unit_commitment.problem_formulation import problem_formulation as problem_formulation_uc
+    models = args[0]
+    formulation = {"OPF": problem_formulation_opf,
+                   "ED": problem_formulation_ed,
+                   "UC": problem_formulation_uc}
+    problems = {}
+    for horizon in formulation:
+        (local_model, universal_model) = deepcopy(models[horizon])
+        for type in ["Feasible", "Infeasible"]:
+            problems[(horizon, type)] = formulation[horizon].problem_formulation_universal(local_model,
+                                                                                           universal_model, type)
+    return problems
+
+
+def solving_latency(problem, solver, repeats):
+    # Return the median solving time (s), the objective value and the solving status
+    if "vtypes" in problem:
+        vtypes = problem["vtypes"]
+    else:
+        vtypes = ["c"] * len(problem["lb"])
+    latency = []
+    for i in range(repeats):
+        t0 = time.time()
+        (x, obj, success) = solver(problem["c"], Aeq=problem["Aeq"], beq=problem["beq"], A=problem["A"],
+                                   b=problem["b"], xmin=problem["lb"], xmax=problem["ub"], vtypes=vtypes)
+        latency.append(time.time() - t0)
+
+    return median(latency), obj, success
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    problems = mathematical_models(benchmark_models())
+    backends = available_solvers()
+
+    print("%-4s %-11s %-8s %6s %12s %16s %8s" % ("", "Type", "Solver", "nx", "Latency(ms)", "Objective", "Success"))
+    for (horizon, type) in problems:
+        problem = problems[(horizon, type)]
+        for name in backends:
+            (latency, obj, success) = solving_latency(problem, solver_selection(name), repeats)
+            print("%-4s %-11s %-8s %6d %12.3f %16.4f %8d" % (
+                horizon, type, name, len(problem["lb"]), latency * 1000, obj, success))
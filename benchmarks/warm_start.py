@@ -0,0 +1,74 @@
+## Benchmark of the warm start of the rolling horizon operation
+# Successive ED and UC cycles are simulated by moving the look ahead window over a random load profile. In each cycle,
+# the feasible problem is solved from scratch (cold) and from the shifted solution of previous cycle (warm).
+# The scipy interface of HiGHS does not accept start vectors, so the time saved is only observed with gurobi.
+# Usage: python -m benchmarks.warm_start [number of cycles] [solver]
+import sys
+import time
+from copy import deepcopy
+from numpy import random
+from benchmarks.solver_latency import benchmark_models
+from configuration.configuration_time_line import default_time, default_look_ahead_time_step
+from solvers.solver_registry import solver_selection
+from solvers.warm_start import WarmStart
+
+
+def load_profile(models, T, cycles, step):
+    # Update the load forecasting of the given cycle
+    (local_model, universal_model) = deepcopy(models)
+    random.seed(0)  # The same profile is used in all the cycles
+    for model in [local_model, universal_model]:
+        for load in ["Load_ac", "Load_uac", "Load_dc", "Load_udc"]:
+            profile = random.uniform(0.1, 0.4, T + cycles) * model[load]["PDMAX"]
+            model[load]["PD"] = profile[step:step + T].tolist()
+    return local_model, universal_model
+
+
+def solve(model, solver, x0=None):
+    if "vtypes" in model:
+        vtypes = model["vtypes"]
+    else:
+        vtypes = ["c"] * len(model["lb"])
+    if x0 is None:
+        opt = None
+    else:
+        opt = {"x0": x0}
+    t0 = time.time()
+    (x, obj, success) = solver(model["c"], Aeq=model["Aeq"], beq=model["beq"], A=model["A"], b=model["b"],
+                               xmin=model["lb"], xmax=model["ub"], vtypes=vtypes, opt=opt)
+    return x, obj, success, time.time() - t0
+
+
+if __name__ == "__main__":
+    from economic_dispatch.problem_formulation import problem_formulation as problem_formulation_ed
+    from unit_commitment.problem_formulation import problem_formulation as problem_formulation_uc
+    from modelling.power_flow.layout import variable_layout
+
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    solver = solver_selection(sys.argv[2] if len(sys.argv) > 2 else "gurobi")
+    models = benchmark_models()
+    horizons = {"ED": (problem_formulation_ed, variable_layout("ED"), "Look_ahead_time_ed_time_step", "Time_step_ed"),
+                "UC": (problem_formulation_uc, variable_layout("UC"), "Look_ahead_time_uc_time_step", "Time_step_uc")}
+
+    print("%-4s %6s %10s %10s %10s %14s" % ("", "Cycle", "Cold(ms)", "Warm(ms)", "Saved(ms)", "Objective gap"))
+    for horizon in horizons:
+        (formulation, layout, look_ahead_time_step, time_step) = horizons[horizon]
+        T = default_look_ahead_time_step[look_ahead_time_step]
+        warm_start = WarmStart(T, default_time[time_step], {("Idle", "Feasible"): layout})
+        for step in range(cycles):
+            Target_time = default_time["Base_time"] + step * default_time[time_step]
+            (local_model, universal_model) = load_profile(models[horizon], T, cycles, step)
+            model = formulation.problem_formulation_universal(local_model, universal_model, "Feasible")
+            x0 = warm_start.start_vector(("Idle", "Feasible"), Target_time, len(model["c"]), model["N"])
+
+            (x, obj, success, time_cold) = solve(model, solver)
+            (x_warm, obj_warm, success_warm, time_warm) = solve(model, solver, x0)
+            if success_warm > 0:
+                warm_start.store(("Idle", "Feasible"), Target_time, x_warm)
+            if horizon == "UC":
+                commitments = [round(x_warm[i * layout.NX + layout.IG]) for i in range(model["N"] * T)]
+                warm_start.store_commitment("IG", Target_time, commitments)
+                commitments = [round(x_warm[i * layout.NX + layout.IUG]) for i in range(model["N"] * T)]
+                warm_start.store_commitment("IUG", Target_time, commitments)
+            print("%-4s %6d %10.3f %10.3f %10.3f %14.6f" % (
+                horizon, step, time_cold * 1000, time_warm * 1000, (time_cold - time_warm) * 1000, obj_warm - obj))
@@ -0,0 +1,13 @@
+# The configuration of the alternating direction method of multipliers (ADMM) in economic dispatch
+# The areas are coordinated by the exchanged power (PMG), all the power is measured by W.
+default_admm = \
+    {
+        "ADMM": False,  # True: the areas are solved by ADMM, False: the centralised problem is solved
+        "Solver": "gurobi",  # The quadratic programming solver of the subproblems
+        "Processes": None,  # The number of processes in the process pool, None means the number of CPUs
+        "Penalty": 0.001,  # The penalty factor of the augmented Lagrangian (rho)
+        "Primal_tolerance": 1,  # The tolerance of the mismatch between the exchanged power and the line flows
+        "Dual_tolerance": 1,  # The tolerance of the change of the line flows (scaled by rho)
+        "Iteration_max": 100,  # The maximal number of iterations
+        "Gate_closure_ratio": 0.8,  # The ratio of Gate_closure_ed used by the iterations
+    }
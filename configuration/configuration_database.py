@@ -26,6 +26,50 @@ weather_station_database = \
         "db_str" : 'mysql+pymysql://' + 'lems' + ':' + '3' + '@' + 'localhost' + '/' + 'weather_station'
     }
 
+# The connection pool of each database, see database_engine
+# The engine of a database is shared by the operating processes, each task of the processes takes its own session and
+# connection from the pool, and waits for "Pool_timeout" (s) when all the connections are checked out.
+database_pool = \
+    {
+        "Pool_size": 5,
+        "Max_overflow": 10,
+        "Pool_timeout": 30,
+        "Pool_recycle": 3600,  # The connections are renewed before the timeout of MySQL
+        "Pre_ping": True,
+    }
+
+# The memory-mapped history store of the forecasting, see history_store
+# The history tables are exported once into the directory, and the history data is queried from the database when the
+# table is not exported.
+history_store = \
+    {
+        "Path": "history_store",
+    }
+
+# The persistence of the schedules between the operating processes
+# The schedules are shared in the memory of the ems (see schedule_bus), and are written to the tables when it is True
+schedule_persistence = \
+    {
+        "long2middle": True,
+        "middle2short": True,
+    }
+
+# The write-behind recorder of the operation results, see database_recorder
+# The results are queued and written in batches by a dedicated connection, a record waits for "Put_timeout" (s) when
+# the queue is full and is dropped after that. A batch failed by the connection is written again after
+# "Retry_interval" (s), at most "Retry_max" times, and the batch rejected by the database is dropped at once.
+# The results are written by the operating processes directly when "Write_behind" is False.
+database_recorder = \
+    {
+        "Write_behind": True,
+        "Queue_size": 256,
+        "Batch_size": 32,
+        "Flush_interval": 0.5,
+        "Retry_interval": 5,
+        "Retry_max": 12,
+        "Put_timeout": 0.1,
+    }
+
 #IP address of local EMSs,
 local_ems_ip_address = \
     {
@@ -0,0 +1,6 @@
+# The configuration of the information exchange between the universal ems and the local ems
+# The schema of the dynamic information (ED/UC) is negotiated by the connection request, see information_schema.py
+default_information = \
+    {
+        "Schema": 2,  # The highest schema of the ems, 1: local_sources, 2: local_sources_v2 (packed series)
+    }
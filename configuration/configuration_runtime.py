@@ -0,0 +1,9 @@
+# The configuration of the runtime of the operating processes (OPF/ED/UC) in the universal ems and the local ems
+# The stage deadlines of the asyncio runtime are configured in configuration_time_line.py
+default_runtime = \
+    {
+        "Runtime": "asyncio",  # "asyncio": the cycles are the coroutines of one event loop, "scheduler": APScheduler
+        "Database_workers": 4,  # The threads of the forecasting, the set-points tracing and the database operations
+        "Solving_workers": 3,  # The threads of the solving stages, i.e., one for each operating process
+        "Solving_threads": 8,  # The threads which wait for the solvers, see solvers/solver_executor.Deadline_Task
+    }
@@ -0,0 +1,14 @@
+# The configuration of solvers in different operating process
+# The available solvers are registered in solvers/solver_registry.py, including:
+# 1) "gurobi": commercial solver, a licence is required
+# 2) "highs": open-source solver provided by scipy (>=1.9)
+# 3) "ips": the interior point method for LP/QP problems, the integer variables are not supported
+default_solver = \
+    {
+        "Solver_uc": "gurobi",  # The solver of unit committment
+        "Solver_ed": "gurobi",  # The solver of economic dispatch
+        "Solver_opf": "gurobi",  # The solver of optimal power flow
+        "Elastic": False,  # True: one elastic problem replaces the feasible and infeasible problems in each operation
+        "Process_pool": True,  # True: the solvers run in a process pool and are terminated at the gate closure
+        "Processes": 2,  # The number of worker processes in each operating process (OPF/ED/UC)
+    }
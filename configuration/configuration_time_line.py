@@ -35,3 +35,39 @@ default_dead_line_time = \
         "Gate_closure_ed": default_start_time["Start_time_ed"] - default_start_time["Start_time_opf"],
         "Gate_closure_opf": 5,
     }
+# The collection time of the local ems information in each process
+# The universal ems waits for the uploads of the local emss until the collection time, and the missing local emss are
+# not waited after that, see information_gateway
+default_collection_time = \
+    {
+        "Collection_time_uc": 300,
+        "Collection_time_ed": 60,
+        "Collection_time_opf": 20,
+    }
+# The deadline of each stage of the operating processes in the asyncio runtime, see runtime/operation_runtime
+# The overdue stage is reported and its cycle is closed, except the forecasting, whose models of the former cycle are
+# used. The exchange is the waiting time of the local ems for the command of the universal ems.
+default_stage_deadline = \
+    {
+        "OPF": {"Forecasting": 10,
+                "Tracing": 10,
+                "Solving": default_dead_line_time["Gate_closure_opf"] + 10,
+                "Schedule": 10,
+                "Exchange": default_collection_time["Collection_time_opf"] + default_dead_line_time[
+                    "Gate_closure_opf"] + 10,
+                "Recording": 10},
+        "ED": {"Forecasting": 30,
+               "Tracing": 30,
+               "Solving": default_dead_line_time["Gate_closure_ed"] + 30,
+               "Schedule": 30,
+               "Exchange": default_collection_time["Collection_time_ed"] + default_dead_line_time[
+                   "Gate_closure_ed"] + 30,
+               "Recording": 30},
+        "UC": {"Forecasting": 60,
+               "Tracing": 60,
+               "Solving": default_dead_line_time["Gate_closure_uc"] + 60,
+               "Schedule": 60,
+               "Exchange": default_collection_time["Collection_time_uc"] + default_dead_line_time[
+                   "Gate_closure_uc"] + 60,
+               "Recording": 60},
+    }
@@ -0,0 +1,142 @@
+## Engine factory and scoped sessions of the databases
+# Each database has one engine, whose connection pool is shared by the operating processes, the forecasting and the
+# recorders of the ems. The sessions are scoped to the threads, i.e., each job of the scheduler and each forecasting
+# thread takes its own session and connection from the pool, instead of sharing one session between the threads.
+# The sessions of a thread are removed at the end of the task, and the connections are returned to the pool.
+# The pool is instrumented by the checkouts, the waiting time for the connections and the overflow connections.
+import threading
+import time
+from functools import wraps
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
+from configuration.configuration_database import database_pool as default_pool
+from utils import Logger
+
+logger = Logger("Database_engine")
+
+engines = {}  # The engine of each database
+sessions = {}  # The scoped sessions of each database
+engines_lock = threading.Lock()
+
+
+class InstrumentedPool(QueuePool):
+    # The queue pool which measures the waiting time for the connections
+    metrics = None
+
+    def _do_get(self):
+        t0 = time.time()
+        try:
+            return QueuePool._do_get(self)
+        except:
+            self.metrics.count("Timeouts")
+            raise
+        finally:
+            self.metrics.wait(time.time() - t0, self.overflow(), self.checkedout())
+
+    def recreate(self):
+        pool = QueuePool.recreate(self)
+        pool.metrics = self.metrics
+        return pool
+
+
+class PoolMetrics():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {"Connections": 0,  # The connections opened to the database
+                       "Checkouts": 0,
+                       "Checkins": 0,
+                       "Timeouts": 0,  # The checkouts failed after the pool timeout
+                       "Wait_time": 0.0,  # The total waiting time for the connections (s)
+                       "Max_wait": 0.0,
+                       "Max_overflow": 0,  # The most connections beyond the pool size
+                       "Max_checked_out": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.values[name] += 1
+
+    def wait(self, wait_time, overflow, checked_out):
+        with self.lock:
+            self.values["Wait_time"] += wait_time
+            self.values["Max_wait"] = max(self.values["Max_wait"], wait_time)
+            self.values["Max_overflow"] = max(self.values["Max_overflow"], overflow)
+            self.values["Max_checked_out"] = max(self.values["Max_checked_out"], checked_out)
+
+    def status(self):
+        with self.lock:
+            return dict(self.values)
+
+
+def database_engine(db_str):
+    """Return the engine of the database, which is created at the first use
+
+        @param db_str: the database string, e.g., universal_database["db_str"]
+        @return: the engine, whose pool is instrumented by the metrics
+        """
+    with engines_lock:
+        if db_str not in engines:
+            metrics = PoolMetrics()
+            if make_url(db_str).get_backend_name() == "sqlite":  # The default pools of SQLite are kept
+                engine = create_engine(db_str, echo=False)
+            else:
+                engine = create_engine(db_str, echo=False, poolclass=InstrumentedPool,
+                                       pool_size=default_pool["Pool_size"], max_overflow=default_pool["Max_overflow"],
+                                       pool_timeout=default_pool["Pool_timeout"],
+                                       pool_recycle=default_pool["Pool_recycle"],
+                                       pool_pre_ping=default_pool["Pre_ping"])
+                engine.pool.metrics = metrics
+            event.listen(engine, "connect", lambda *args: metrics.count("Connections"))
+            event.listen(engine, "checkout", lambda *args: metrics.count("Checkouts"))
+            event.listen(engine, "checkin", lambda *args: metrics.count("Checkins"))
+            engine.metrics = metrics
+            engines[db_str] = engine
+        return engines[db_str]
+
+
+def database_session(db_str):
+    """Return the scoped session of the database
+
+        @param db_str: the database string
+        @return: the scoped session, which is used as a session and gives each thread its own session
+        """
+    with engines_lock:
+        if db_str in sessions:
+            return sessions[db_str]
+    engine = database_engine(db_str)
+    with engines_lock:
+        if db_str not in sessions:
+            sessions[db_str] = scoped_session(sessionmaker(bind=engine))
+        return sessions[db_str]
+
+
+def remove_sessions():
+    # Close the sessions of the current thread, and return their connections to the pool
+    for session in list(sessions.values()):
+        session.remove()
+
+
+def session_task(function):
+    # The task, e.g., a job of the scheduler, whose sessions are removed at the end
+    @wraps(function)
+    def task(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        finally:
+            remove_sessions()
+
+    return task
+
+
+def pool_status():
+    # The metrics and the current state of the pool of each database
+    status = {}
+    for (db_str, engine) in list(engines.items()):
+        status[make_url(db_str).database] = dict(engine.metrics.status(), Pool=engine.pool.status())
+    return status
+
+
+def log_pool_status():
+    for (database, status) in pool_status().items():
+        logger.info("The pool of {0}: {1}".format(database, status))
@@ -1,6 +1,39 @@
 # Database query and record funtion for universal energy management system
+# The results are written by the write-behind recorder, see database_recorder
 import time
 from data_management.database_format import db_optimal_power_flow, db_economic_dispatch, db_unit_commitment
+from data_management.database_recorder import record
+from configuration.configuration_time_line import default_time, default_look_ahead_time_step
+
+horizons = ("OPF", "ED", "UC")
+# (column, device, command, horizons), None means the area, and the commands which are not given are not recorded
+result_fields = [("AC_PD", "Load_ac", "PD", horizons),
+                 ("AC_QD", "Load_ac", "QD", ("OPF",)),
+                 ("UAC_PD", "Load_uac", "PD", horizons),
+                 ("UAC_QD", "Load_uac", "QD", ("OPF",)),
+                 ("DC_PD", "Load_dc", "PD", horizons),
+                 ("UDC_PD", "Load_udc", "PD", horizons),
+                 ("PV_PG", "PV", "PG", horizons),
+                 ("WP_PG", "WP", "PG", horizons),
+                 ("DG_STATUS", "DG", "GEN_STATUS", ("OPF", "ED")),
+                 ("DG_STATUS", "DG", "COMMAND_START_UP", ("UC",)),
+                 ("DG_PG", "DG", "COMMAND_PG", horizons),
+                 ("DG_QG", "DG", "COMMAND_QG", ("OPF",)),
+                 ("UG_STATUS", "UG", "GEN_STATUS", ("OPF", "ED")),
+                 ("UG_STATUS", "UG", "COMMAND_START_UP", ("UC",)),
+                 ("UG_PG", "UG", "COMMAND_PG", horizons),
+                 ("UG_QG", "UG", "COMMAND_QG", ("OPF",)),
+                 ("BIC_QG", "BIC", "COMMAND_Q", ("OPF",)),
+                 ("BAT_PG", "ESS", "COMMAND_PG", horizons),
+                 ("BAT_SOC", "ESS", "SOC", horizons),
+                 ("PMG", None, "PMG", horizons),
+                 ("V_DC", None, "V_DC", ("OPF",)),
+                 ("PV_CURT", "PV", "COMMAND_CURT", horizons),
+                 ("WP_CURT", "WP", "COMMAND_CURT", horizons),
+                 ("AC_SHED", "Load_ac", "COMMAND_SHED", horizons),
+                 ("UAC_SHED", "Load_uac", "COMMAND_SHED", horizons),
+                 ("DC_SHED", "Load_dc", "COMMAND_SHED", horizons),
+                 ("UDC_SHED", "Load_udc", "COMMAND_SHED", horizons)]
 
 class database_operation():
     # Database operation in universal energy management system
@@ -106,277 +139,63 @@ class database_operation():
         # The input information check for the databases
         print(time.time())
 
-    def database_record(*args):
-        # The result storage operation for obtained result
-        session = args[0]
-        model = args[1]
-        Target_time = args[2]
+    def result_rows(*args):
+        # The rows of the result, the existing rows are updated by the recorded columns
+        model = args[0]
+        Target_time = args[1]
         ## control model of UC, ED or OPF
-        function = args[3]
+        function = args[2]
 
         database_target = {"UC": db_unit_commitment,
                            "ED": db_economic_dispatch,
                            "OPF": db_optimal_power_flow}
-
-        if session.query(database_target[function].PV_PG).filter(
-                        database_target[function].TIME_STAMP == Target_time).count() == 0:
-            if function == "OPF":
-                blank_row = database_operation.optimal_power_flow_default_data(Target_time)
-                session.add(blank_row)
-                session.commit()
-
+        default_data = {"UC": database_operation.unit_commitment_default_data,
+                        "ED": database_operation.economic_dispatch_default_data,
+                        "OPF": database_operation.optimal_power_flow_default_data}
         if function == "OPF":
-            row = session.query(database_target[function]).filter(
-                database_target[function].TIME_STAMP == Target_time).first()
-            row.AC_PD = model["Load_ac"]["PD"]
-            row.AC_QD = model["Load_ac"]["QD"]
-            row.UAC_PD = model["Load_uac"]["PD"]
-            row.UAC_QD = model["Load_uac"]["QD"]
-            row.DC_PD = model["Load_dc"]["PD"]
-            row.UDC_PD = model["Load_udc"]["PD"]
-            row.PV_PG = model["PV"]["PG"]
-            row.WP_PG = model["WP"]["PG"]
-            row.DG_STATUS = model["DG"]["GEN_STATUS"]
-            row.DG_PG = model["DG"]["COMMAND_PG"]
-            row.DG_QG = model["DG"]["COMMAND_QG"]
-            row.UG_STATUS = model["UG"]["GEN_STATUS"]
-            row.UG_PG = model["UG"]["COMMAND_PG"]
-            row.UG_QG = model["UG"]["COMMAND_QG"]
-            row.BIC_PG = model["BIC"]["COMMAND_AC2DC"] - model["BIC"]["COMMAND_DC2AC"]
-            row.BIC_QG = model["BIC"]["COMMAND_Q"]
-            row.BAT_PG = model["ESS"]["COMMAND_PG"]
-            row.BAT_SOC = model["ESS"]["SOC"]
-            row.PMG = model["PMG"]
-            row.V_DC = model["V_DC"]
-            row.PV_CURT = model["PV"]["COMMAND_CURT"]
-            row.WP_CURT = model["WP"]["COMMAND_CURT"]
-            row.AC_SHED = model["Load_ac"]["COMMAND_SHED"]
-            row.UAC_SHED = model["Load_uac"]["COMMAND_SHED"]
-            row.DC_SHED = model["Load_dc"]["COMMAND_SHED"]
-            row.UDC_SHED = model["Load_udc"]["COMMAND_SHED"]
-            session.commit()
+            (T, delta_T) = (1, default_time["Time_step_opf"])
         elif function == "ED":
-            from configuration.configuration_time_line import default_look_ahead_time_step
-            from configuration.configuration_time_line import default_time
-            T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
-            delta_T = default_time["Time_step_ed"]
-
-            for i in range(T):
-                if session.query(database_target[function].PV_PG).filter(
-                                database_target[function].TIME_STAMP == Target_time + i * delta_T).count() == 0:
-                    blank_row = database_operation.economic_dispatch_default_data(Target_time + i * delta_T)
-
-                    blank_row.AC_PD = model["Load_ac"]["PD"][i]
-                    blank_row.UAC_PD = model["Load_uac"]["PD"][i]
-                    blank_row.DC_PD = model["Load_dc"]["PD"][i]
-                    blank_row.UDC_PD = model["Load_udc"]["PD"][i]
-                    blank_row.PV_PG = model["PV"]["PG"][i]
-                    blank_row.WP_PG = model["WP"]["PG"][i]
-
-                    try:
-                        blank_row.DG_STATUS = model["DG"]["GEN_STATUS"][i]
-                    except:
-                        blank_row.DG_STATUS = model["DG"]["GEN_STATUS"]
-                    blank_row.DG_PG = model["DG"]["COMMAND_PG"][i]
-                    try:
-                        blank_row.UG_STATUS = model["UG"]["GEN_STATUS"][i]
-                    except:
-                        blank_row.UG_STATUS = model["UG"]["GEN_STATUS"]
-                    blank_row.UG_PG = model["UG"]["COMMAND_PG"][i]
-                    blank_row.BIC_PG = model["BIC"]["COMMAND_AC2DC"][i] - model["BIC"]["COMMAND_DC2AC"][i]
-                    blank_row.BAT_PG = model["ESS"]["COMMAND_PG"][i]
-                    blank_row.BAT_SOC = model["ESS"]["SOC"][i]
-                    blank_row.PMG = model["PMG"][i]
-
-                    try:
-                        blank_row.PV_CURT = model["PV"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.WP_CURT = model["WP"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.AC_SHED = model["Load_ac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.UAC_SHED = model["Load_uac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.DC_SHED = model["Load_dc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.UDC_SHED = model["Load_udc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-
-                    session.add(blank_row)
-                    session.commit()
-                else:
-                    row = session.query(database_target[function]).filter(
-                        database_target[function].TIME_STAMP == Target_time + i * delta_T).first()
-
-                    row.AC_PD = model["Load_ac"]["PD"][i]
-                    row.UAC_PD = model["Load_uac"]["PD"][i]
-                    row.DC_PD = model["Load_dc"]["PD"][i]
-                    row.UDC_PD = model["Load_udc"]["PD"][i]
-                    row.PV_PG = model["PV"]["PG"][i]
-                    row.WP_PG = model["WP"]["PG"][i]
-
-                    try:
-                        row.DG_STATUS = model["DG"]["GEN_STATUS"][i]
-                    except:
-                        row.DG_STATUS = model["DG"]["GEN_STATUS"]
-
-                        row.DG_PG = model["DG"]["COMMAND_PG"][i]
-
-                    try:
-                        row.UG_STATUS = model["UG"]["GEN_STATUS"][i]
-                    except:
-                        row.UG_STATUS = model["UG"]["GEN_STATUS"]
-
-                    row.UG_PG = model["UG"]["COMMAND_PG"][i]
-
-                    row.BIC_PG = model["BIC"]["COMMAND_AC2DC"][i] - model["BIC"]["COMMAND_DC2AC"][i]
-                    row.BAT_PG = model["ESS"]["COMMAND_PG"][i]
-                    row.BAT_SOC = model["ESS"]["SOC"][i]
-                    row.PMG = model["PMG"][i]
-                    try:
-                        row.PV_CURT = model["PV"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-                    try:
-                        row.WP_CURT = model["WP"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-                    try:
-                        row.AC_SHED = model["Load_ac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        row.UAC_SHED = model["Load_uac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        row.DC_SHED = model["Load_dc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        row.UDC_SHED = model["Load_udc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-
-                    session.commit()
+            (T, delta_T) = (default_look_ahead_time_step["Look_ahead_time_ed_time_step"], default_time["Time_step_ed"])
         else:
-            from configuration.configuration_time_line import default_look_ahead_time_step
-            from configuration.configuration_time_line import default_time
-
-            T = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]
-            delta_T = default_time["Time_step_uc"]
-
-            for i in range(T):
-                if session.query(database_target[function].PV_PG).filter(
-                                database_target[function].TIME_STAMP == Target_time + i * delta_T).count() == 0:
-
-                    blank_row = database_operation.unit_commitment_default_data(Target_time + i * delta_T)
-
-                    blank_row.AC_PD = model["Load_ac"]["PD"][i]
-                    blank_row.UAC_PD = model["Load_uac"]["PD"][i]
-                    blank_row.DC_PD = model["Load_dc"]["PD"][i]
-                    blank_row.UDC_PD = model["Load_udc"]["PD"][i]
-                    blank_row.PV_PG = model["PV"]["PG"][i]
-                    blank_row.WP_PG = model["WP"]["PG"][i]
-
-                    blank_row.DG_STATUS = model["DG"]["COMMAND_START_UP"][i]
-                    blank_row.DG_PG = model["DG"]["COMMAND_PG"][i]
-
-
-                    blank_row.UG_STATUS = model["UG"]["COMMAND_START_UP"][i]
-                    blank_row.UG_PG = model["UG"]["COMMAND_PG"][i]
-
-                    blank_row.BIC_PG = model["BIC"]["COMMAND_AC2DC"][i] - model["BIC"]["COMMAND_DC2AC"][i]
-                    blank_row.BAT_PG = model["ESS"]["COMMAND_PG"][i]
-                    blank_row.BAT_SOC = model["ESS"]["SOC"][i]
-                    blank_row.PMG = model["PMG"][i]
-                    
-                    try:
-                        blank_row.PV_CURT = model["PV"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-
-                    try:
-                        blank_row.WP_CURT = model["WP"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.AC_SHED = model["Load_ac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.UAC_SHED = model["Load_uac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.DC_SHED = model["Load_dc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        blank_row.UDC_SHED = model["Load_udc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
+            (T, delta_T) = (default_look_ahead_time_step["Look_ahead_time_uc_time_step"], default_time["Time_step_uc"])
+
+        columns = {}  # The time series of the recorded columns
+        for (column, device, command, valid) in result_fields:
+            if function in valid:
+                try:
+                    columns[column] = model[command] if device is None else model[device][command]
+                except KeyError:
+                    pass
+        columns["BIC_PG"] = time_series_difference(model["BIC"]["COMMAND_AC2DC"], model["BIC"]["COMMAND_DC2AC"], T)
+
+        table = database_target[function]
+        names = [column.name for column in table.__table__.columns]
+        rows = []
+        for i in range(T):
+            default_row = default_data[function](Target_time + i * delta_T)
+            row = dict((name, getattr(default_row, name)) for name in names)
+            row.update((column, element(columns[column], i)) for column in columns)
+            rows.append(row)
+
+        return (table, rows, list(columns))
 
-                    session.add(blank_row)
-                    session.commit()
-                else:
-                    row = session.query(database_target[function]).filter(
-                        database_target[function].TIME_STAMP == Target_time + i * delta_T).first()
-
-                    row.AC_PD = model["Load_ac"]["PD"][i]
-                    row.UAC_PD = model["Load_uac"]["PD"][i]
-                    row.DC_PD = model["Load_dc"]["PD"][i]
-                    row.UDC_PD = model["Load_udc"]["PD"][i]
-                    row.PV_PG = model["PV"]["PG"][i]
-                    row.WP_PG = model["WP"]["PG"][i]
-
-                    row.DG_STATUS = model["DG"]["COMMAND_START_UP"][i]>0
+    def database_record(*args):
+        # The result storage operation for obtained result
+        # The rows are put into the write-behind recorder, and the operating process does not wait for the database
+        session = args[0]
+        model = args[1]
+        Target_time = args[2]
+        ## control model of UC, ED or OPF
+        function = args[3]
 
-                    row.DG_PG = model["DG"]["COMMAND_PG"][i]
+        (table, rows, names) = database_operation.result_rows(model, Target_time, function)
+        record(session, table, rows, names)
 
-                    row.UG_STATUS = model["UG"]["COMMAND_START_UP"][i]>0
 
-                    row.UG_PG = model["UG"]["COMMAND_PG"][i]
+def element(value, i):
+    # The value of the i-th time step, the scalar is shared by all the time steps
+    return value[i] if isinstance(value, (list, tuple)) else value
 
-                    row.BIC_PG = model["BIC"]["COMMAND_AC2DC"][i] - model["BIC"]["COMMAND_DC2AC"][i]
-                    row.BAT_PG = model["ESS"]["COMMAND_PG"][i]
-                    row.BAT_SOC = model["ESS"]["SOC"][i]
-                    row.PMG = model["PMG"][i]
-                    try:
-                        row.PV_CURT = model["PV"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-                    try:
-                        row.WP_CURT = model["WP"]["COMMAND_CURT"][i]
-                    except:
-                        pass
-                    try:
-                        row.AC_SHED = model["Load_ac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        row.UAC_SHED = model["Load_uac"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        row.DC_SHED = model["Load_dc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
-                    try:
-                        row.UDC_SHED = model["Load_udc"]["COMMAND_SHED"][i]
-                    except:
-                        pass
 
-                    
-                    session.commit()
+def time_series_difference(minuend, subtrahend, T):
+    return [element(minuend, i) - element(subtrahend, i) for i in range(T)]
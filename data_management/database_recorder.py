@@ -0,0 +1,192 @@
+## Write-behind recorder of the operation results
+# The results of OPF, ED and UC are recorded after the commands are sent to the local ems. Instead of writing them by
+# the session of the operating process, the rows are put into a bounded queue, and a recorder thread writes the queued
+# rows in batches, i.e., one upsert for each record and one commit for each batch, by its own session and connection.
+# Hence, the operating processes never wait for the database, and the unavailable database only delays the persistence:
+# the batch failed by the connection is written again, at most "Retry_max" times, while the queue absorbs the following
+# records. The batch rejected by the database, e.g., by an integrity error, is never written, hence it is logged and
+# dropped at once. When the queue is full, the operating process waits for a short time and the record is dropped.
+# The backpressure of each recorder is measured by the metrics, i.e., the depth of the queue, the waiting and dropped
+# records, the failed and rejected batches and the lag between the record and the commit.
+import threading
+import time
+from queue import Queue, Full, Empty
+from sqlalchemy.exc import OperationalError, DisconnectionError
+from sqlalchemy.orm import sessionmaker
+from configuration.configuration_database import database_recorder as default_recorder
+from data_management.schedule_upsert import upsert_statement
+from utils import Logger
+
+logger = Logger("Database_recorder")
+
+recorders = {}  # The recorder of each database
+recorders_lock = threading.Lock()
+temporary_errors = (OperationalError, DisconnectionError)  # The errors of the connection, the batch is written again
+
+
+class DatabaseRecorder(threading.Thread):
+    def __init__(self, engine, queue_size, batch_size, flush_interval, retry_interval, retry_max, put_timeout):
+        threading.Thread.__init__(self, name="DatabaseRecorder", daemon=True)
+        self.Session = sessionmaker(bind=engine)  # The recorder session is only used by the recorder thread
+        self.queue = Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.retry_max = retry_max  # The maximal number of writing again of a batch failed by the connection
+        self.put_timeout = put_timeout
+        self.lock = threading.Lock()
+        self.metrics = {"Recorded": 0,  # The records put into the queue
+                        "Written": 0,  # The records committed
+                        "Batches": 0,
+                        "Waiting": 0,  # The records which wait for the queue
+                        "Dropped": 0,  # The records dropped due to the full queue
+                        "Failures": 0,  # The failed writings of the batches
+                        "Rejected": 0,  # The records of the batches dropped after the errors
+                        "Rejected_batches": 0,
+                        "Max_depth": 0,
+                        "Max_lag": 0.0}  # The longest time from the record to the commit (s)
+
+    def record(self, table, rows, names):
+        """Put the rows into the queue of the recorder
+
+            @param table: the table of the rows, e.g., db_economic_dispatch
+            @param rows: the rows to be inserted, each row is a dictionary of all the columns
+            @param names: the columns which are updated when the row exists
+            @return: False if the record is dropped
+            """
+        item = (time.time(), table, rows, names)
+        try:
+            self.queue.put_nowait(item)
+        except Full:
+            self.count("Waiting")
+            try:
+                self.queue.put(item, timeout=self.put_timeout)
+            except Full:
+                self.count("Dropped")
+                logger.warning("The queue of the recorder is full, the record of {} is dropped!".format(
+                    table.__tablename__))
+                return False
+        self.count("Recorded")
+        with self.lock:
+            self.metrics["Max_depth"] = max(self.metrics["Max_depth"], self.queue.qsize())
+        return True
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.metrics[name] += value
+
+    def run(self):
+        session = self.Session()
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.time(), 0)))
+                except Empty:
+                    break
+            records = [item[1:] for item in batch]
+            error = write_records(session, records)
+            retries = 0
+            while isinstance(error, temporary_errors) and retries < self.retry_max:  # The database is unavailable
+                self.count("Failures")
+                retries += 1
+                time.sleep(self.retry_interval)
+                error = write_records(session, records)
+            with self.lock:
+                if error is None:
+                    self.metrics["Written"] += len(batch)
+                    self.metrics["Batches"] += 1
+                    self.metrics["Max_lag"] = max(self.metrics["Max_lag"], time.time() - batch[0][0])
+                else:
+                    self.metrics["Failures"] += 1
+                    self.metrics["Rejected"] += len(batch)
+                    self.metrics["Rejected_batches"] += 1
+            if error is not None:
+                logger.error("The batch is dropped after {0} writings: {1}".format(retries + 1, batch_summary(records)))
+            for item in batch:
+                self.queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until the queued records are written
+
+            @param timeout: the longest waiting time (s), None means waiting until the queue is empty
+            @return: True if all the records are written
+            """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def status(self):
+        # The metrics of the recorder and the current depth of the queue
+        with self.lock:
+            metrics = dict(self.metrics)
+        metrics["Depth"] = self.queue.qsize()
+        return metrics
+
+
+def write_records(session, records):
+    """Write the records by one upsert for each record and one commit
+
+        @param records: the list of (table, rows, names), see DatabaseRecorder.record
+        @return: None if the records are committed, otherwise the error
+        """
+    try:
+        for (table, rows, names) in records:
+            statement = upsert_statement(session, table, rows, names)
+            if statement is not None:
+                session.execute(statement)
+            else:  # The dialect has no upsert, the existing rows are updated by the given columns
+                for row in rows:
+                    record = session.query(table).get(row["TIME_STAMP"])
+                    if record is None:
+                        session.add(table(**row))
+                    else:
+                        for name in names:
+                            setattr(record, name, row[name])
+        session.commit()
+        return None
+    except Exception as error:
+        try:
+            session.rollback()
+        except Exception:  # The connection is lost, the session is rolled back by the next use
+            pass
+        logger.error("The records of {0} can not be written: {1}".format(
+            ", ".join(set(table.__tablename__ for (table, rows, names) in records)), error))
+        return error
+
+
+def batch_summary(records):
+    # The tables and the time stamps of the records, which are logged when the batch is dropped
+    return "; ".join("{0} {1}".format(table.__tablename__, [row.get("TIME_STAMP") for row in rows])
+                     for (table, rows, names) in records)
+
+
+def database_recorder(session):
+    # Return the recorder of the database of the session, which is started at the first use
+    engine = session.get_bind()
+    key = str(engine.url)
+    with recorders_lock:
+        if key not in recorders:
+            recorders[key] = DatabaseRecorder(engine, default_recorder["Queue_size"], default_recorder["Batch_size"],
+                                              default_recorder["Flush_interval"], default_recorder["Retry_interval"],
+                                              default_recorder["Retry_max"], default_recorder["Put_timeout"])
+            recorders[key].start()
+        return recorders[key]
+
+
+def record(session, table, rows, names):
+    """Record the rows by the write-behind recorder, or by the session when the write-behind is disabled
+
+        @param session: the session of the operating process
+        @param table: the table of the rows
+        @param rows: the rows to be inserted, each row is a dictionary of all the columns
+        @param names: the columns which are updated when the row exists
+        """
+    if default_recorder["Write_behind"]:
+        database_recorder(session).record(table, rows, names)
+    elif write_records(session, [(table, rows, names)]) is not None:
+        raise RuntimeError("The records of {} can not be written!".format(table.__tablename__))
@@ -1,5 +1,9 @@
 import threading
 from data_management.information_management import information_receive_send
+from data_management.information_gateway import InformationGateway
+from data_management.information_schema import packed, series_updating
+
+last_uploads = {}  # The last upload of each area, {(AREA, T, type of the information model): information model}
 
 class Information_Collection_Thread(threading.Thread):
     # Thread operation with time control and return value
@@ -20,7 +24,42 @@ def information_collection_updating(*args):
     models = args[2]
     T = args[3]
 
-    info = information_receive_send.information_receive(socket, info, 2)
+    if isinstance(socket, InformationGateway):  # The uploads of the local emss are collected by the gateway
+        upload = collected_upload(info, socket.collect(info, [models["UG"]["AREA"]]), models["UG"]["AREA"], T)
+        if upload is None:  # No upload of the local ems has been collected, the start-up models are used
+            return models
+        info.CopyFrom(upload)
+    else:
+        info = information_receive_send.information_receive(socket, info, 2)
+
+    return information_updating(info, models, T)
+
+
+def collected_upload(*args):
+    """Return the upload of the area, or its last upload when the local ems is missing in this cycle
+
+        @param args: the information model, the collected uploads {AREA: information model}, the area and the look ahead
+        time steps of the operating process
+        @return: the upload, None if the area has never been collected
+        """
+    info = args[0]
+    uploads = args[1]
+    area = args[2]
+    T = args[3]
+    key = (area, T, info.DESCRIPTOR.full_name)
+    if area in uploads:
+        last_uploads[key] = uploads[area]
+    return last_uploads.get(key)
+
+
+def information_updating(*args):
+    # Update the local models by the collected information
+    info = args[0]
+    models = args[1]
+    T = args[2]
+    if packed(info):  # The packed series of schema 2
+        return series_updating(info, models, T)
+
     # Update profiles
     ug_info = info.dg[0]
     dg_info = info.dg[1]
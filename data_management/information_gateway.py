@@ -0,0 +1,183 @@
+## Gateway of the information exchange between the universal ems and the local emss
+# Each operating process of the universal ems binds one ROUTER socket, instead of the REP socket which serves one local
+# ems after the other. The local emss keep their REQ (or DEALER) sockets: the upload of a local ems arrives with the
+# identity of its connection, the gateway keys the identity by the AREA of the information model, and the command of
+# the area is routed back to that identity.
+# The uploads of one cycle are collected concurrently until all the expected areas have uploaded or the collection
+# deadline (see configuration_time_line.default_collection_time), hence a slow or missing local ems never stalls the
+# operation of the other areas. The upload which arrives after the deadline stays in the socket, it is collected in the
+# following cycle and its local ems receives the command of that cycle.
+# The upload of an area which is not expected by the cycle, e.g., a local ems of an area that the universal ems does not
+# solve, is returned to its local ems as the reply, which keeps its commands. Hence, its REQ socket is not left
+# waiting, and its routing envelope is not kept by the gateway.
+# The gateway of the asyncio runtime awaits the uploads and the commands on the zmq.asyncio socket in the event loop.
+import threading
+import time
+import zmq
+import zmq.asyncio
+from utils import Logger
+
+logger = Logger("Information_gateway")
+
+poll_interval = 0.1  # The longest polling (s) under the lock, the commands are sent between the pollings
+
+
+class InformationGateway():
+    def __init__(self, context, address, collection_time):
+        self.socket = context.socket(zmq.ROUTER)
+        self.socket.setsockopt(zmq.ROUTER_MANDATORY, 1)  # The command to a disconnected local ems raises an error
+        self.socket.bind(address)
+        self.poller = zmq.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
+        self.collection_time = collection_time  # The collection time of each cycle (s)
+        self.envelopes = {}  # The routing envelope of each area, which waits for the command
+        self.lock = threading.Lock()  # The socket is used by the collection and the sending threads
+        self.metrics = {"Received": 0,  # The uploads received
+                        "Sent": 0,  # The commands routed to the local emss
+                        "Missing": 0,  # The expected areas which have not uploaded before the deadline
+                        "Unroutable": 0,  # The commands whose area is not waiting
+                        "Unexpected": 0,  # The uploads of the areas which are not expected, they are returned
+                        "Max_collection": 0.0}  # The longest collection time (s)
+
+    def receive(self, info, timeout):
+        # Receive the uploads which arrive within the timeout (ms), the uploads are parsed into the type of info
+        uploads = []
+        with self.lock:
+            if not self.poller.poll(timeout):
+                return uploads
+            while True:
+                try:
+                    frames = self.socket.recv_multipart(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                uploads.append(self.upload(frames, info))
+        self.metrics["Received"] += len(uploads)
+        return uploads
+
+    def upload(self, frames, info):
+        # Parse the upload into the type of info, and keep the routing envelope of its area
+        upload = type(info)()
+        upload.ParseFromString(frames[-1])
+        self.envelopes[upload.AREA] = frames[:-1]  # [identity, b""] for REQ and [identity] for DEALER
+        return upload
+
+    def collect(self, info, areas=None, deadline=None):
+        """Collect the uploads of the local emss in one cycle
+
+            @param info: the information model, whose type is used to parse the uploads
+            @param areas: the expected areas, None means collecting until the deadline
+            @param deadline: the end of the collection (time.time()), the collection time from now by default
+            @return: the uploads of the areas, {AREA: information model}
+            """
+        t0 = time.time()
+        deadline = t0 + self.collection_time if deadline is None else deadline
+        uploads = {}
+        while areas is None or not all(area in uploads for area in areas):
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            for upload in self.receive(info, min(timeout, poll_interval) * 1000):
+                uploads[upload.AREA] = upload
+        for upload in self.unexpected(uploads, areas):
+            self.send(upload.AREA, upload)
+        self.close(uploads, areas, t0)
+        return uploads
+
+    def unexpected(self, uploads, areas):
+        """Remove the uploads of the areas which are not expected from the collection
+
+            @param uploads: the collected uploads, {AREA: information model}
+            @param areas: the expected areas, None means all the areas are expected
+            @return: the removed uploads, which are returned to their local emss
+            """
+        if areas is None:
+            return []
+        removed = [uploads.pop(area) for area in list(uploads) if area not in areas]
+        if removed:
+            self.metrics["Unexpected"] += len(removed)
+            logger.warning("The information of area {} is not expected, it is returned!".format(
+                [upload.AREA for upload in removed]))
+        return removed
+
+    def close(self, uploads, areas, t0):
+        # Close the collection, the missing areas are reported
+        if areas is not None:
+            missing = [area for area in areas if area not in uploads]
+            if missing:
+                self.metrics["Missing"] += len(missing)
+                logger.warning("The information of area {} is not collected before the deadline!".format(missing))
+        self.metrics["Max_collection"] = max(self.metrics["Max_collection"], time.time() - t0)
+
+    def send(self, area, info):
+        """Route the command back to the local ems of the area
+
+            @param area: the AREA of the local ems
+            @param info: the information model of the command
+            @return: False if the local ems of the area is not waiting for the command
+            """
+        with self.lock:
+            envelope = self.envelopes.pop(area, None)
+            if envelope is not None:
+                try:
+                    self.socket.send_multipart(envelope + [info.SerializeToString()])
+                except zmq.ZMQError:
+                    envelope = None
+        return self.routed(area, envelope)
+
+    def routed(self, area, envelope):
+        if envelope is None:
+            self.metrics["Unroutable"] += 1
+            logger.warning("The command of area {} can not be routed!".format(area))
+            return False
+        self.metrics["Sent"] += 1
+        return True
+
+    def status(self):
+        # The metrics of the gateway and the areas which wait for the commands
+        return dict(self.metrics, Waiting=len(self.envelopes))
+
+
+class AsyncInformationGateway(InformationGateway):
+    # The gateway of the asyncio runtime, the context is a zmq.asyncio context and the socket is used by the event loop
+    def __init__(self, context, address, collection_time):
+        InformationGateway.__init__(self, context, address, collection_time)
+        self.poller = zmq.asyncio.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
+
+    async def receive(self, info, timeout):
+        uploads = []
+        if not await self.poller.poll(timeout):
+            return uploads
+        while True:
+            try:
+                frames = await self.socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            uploads.append(self.upload(frames, info))
+        self.metrics["Received"] += len(uploads)
+        return uploads
+
+    async def collect(self, info, areas=None, deadline=None):
+        # The same as InformationGateway.collect, the other coroutines run while the uploads are awaited
+        t0 = time.time()
+        deadline = t0 + self.collection_time if deadline is None else deadline
+        uploads = {}
+        while areas is None or not all(area in uploads for area in areas):
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            for upload in await self.receive(info, timeout * 1000):
+                uploads[upload.AREA] = upload
+        for upload in self.unexpected(uploads, areas):
+            await self.send(upload.AREA, upload)
+        self.close(uploads, areas, t0)
+        return uploads
+
+    async def send(self, area, info):
+        envelope = self.envelopes.pop(area, None)
+        if envelope is not None:
+            try:
+                await self.socket.send_multipart(envelope + [info.SerializeToString()])
+            except zmq.ZMQError:
+                envelope = None
+        return self.routed(area, envelope)
@@ -0,0 +1,234 @@
+## Field mapper between the models and the information models
+# The fields of the information models are mapped to the models by declarative tables, i.e., the scalar mode of the
+# optimal power flow (informaiton_exchange) and the vector mode of the economic dispatch and the unit commitment
+# (local_sources, see series_layout and command_series of information_schema). The paths of the tables are resolved
+# once, at the import, into the index of the (sub-)message and the name of the field, and the model values are read by
+# the getters of the fields. Hence, each field is one assignment in the cycles, without parsing the paths or the
+# exceptions of the list-valued fields.
+# In the scalar mode, the first value of a list-valued field is formulated.
+from operator import itemgetter
+from numpy import ndarray
+from data_management.information_pool import message_fields, scalar_field
+from data_management.information_schema import series_layout, command_series
+from modelling.microgrid_state import snapshot
+
+sequences = (list, tuple, ndarray)  # The list-valued fields, the first value is formulated in the scalar mode
+
+# The fields of the short term information, (path in informaiton_exchange, device, key)
+scalar_layout = [("AREA", "UG", "AREA"),
+                 ("dg[0].GEN_STATUS", "UG", "GEN_STATUS"),
+                 ("dg[0].PG", "UG", "COMMAND_PG"),
+                 ("dg[0].RG", "UG", "COMMAND_RG"),
+                 ("dg[1].GEN_STATUS", "DG", "GEN_STATUS"),
+                 ("dg[1].PG", "DG", "COMMAND_PG"),
+                 ("dg[1].QG", "DG", "COMMAND_QG"),
+                 ("dg[1].RG", "DG", "COMMAND_RG"),
+                 ("ess[0].SOC", "ESS", "SOC"),
+                 ("ess[0].PG", "ESS", "COMMAND_PG"),
+                 ("ess[0].RG", "ESS", "COMMAND_RG"),
+                 ("pv[0].NPV", "PV", "PMAX"),
+                 ("pv[0].PG", "PV", "PG"),
+                 ("pv[0].COMMAND_CURT", "PV", "COMMAND_CURT"),
+                 ("wp[0].NWP", "WP", "PMAX"),
+                 ("wp[0].PG", "WP", "PG"),
+                 ("wp[0].COMMAND_CURT", "WP", "COMMAND_CURT"),
+                 ("load_ac[0].PD", "Load_ac", "PD"),
+                 ("load_ac[0].QD", "Load_ac", "QD"),
+                 ("load_ac[0].COMMAND_SHED", "Load_ac", "COMMAND_SHED"),
+                 ("load_ac[1].PD", "Load_uac", "PD"),
+                 ("load_ac[1].QD", "Load_uac", "QD"),
+                 ("load_ac[1].COMMAND_SHED", "Load_uac", "COMMAND_SHED"),
+                 ("load_dc[0].PD", "Load_dc", "PD"),
+                 ("load_dc[0].COMMAND_SHED", "Load_dc", "COMMAND_SHED"),
+                 ("load_dc[1].PD", "Load_udc", "PD"),
+                 ("load_dc[1].COMMAND_SHED", "Load_udc", "COMMAND_SHED"),
+                 ("bic[0].PAC2DC", "BIC", "COMMAND_AC2DC"),
+                 ("bic[0].PDC2AC", "BIC", "COMMAND_DC2AC"),
+                 ("PMG", None, "PMG"),
+                 ("COMMAND_TYPE", None, "COMMAND_TYPE")]
+
+# The constant fields of the short term information, the reactive power of the utility grid is not commanded
+scalar_constants = [("dg[0].DG_ID", 0),
+                    ("dg[0].QG", 0),
+                    ("dg[1].DG_ID", 1),
+                    ("ess[0].ESS_ID", 1),
+                    ("ess[0].ESS_STATUS", 1),
+                    ("bic[0].STATUS", 1)]
+
+# The commands extracted from the short term information, (device, key, path in informaiton_exchange)
+scalar_commands = [("UG", "GEN_STATUS", "dg[0].GEN_STATUS"),
+                   ("UG", "COMMAND_PG", "dg[0].PG"),
+                   ("UG", "COMMAND_QG", "dg[0].QG"),
+                   ("UG", "COMMAND_RG", "dg[0].RG"),
+                   ("DG", "GEN_STATUS", "dg[1].GEN_STATUS"),
+                   ("DG", "COMMAND_PG", "dg[1].PG"),
+                   ("DG", "COMMAND_QG", "dg[1].QG"),
+                   ("DG", "COMMAND_RG", "dg[1].RG"),
+                   ("ESS", "COMMAND_PG", "ess[0].PG"),
+                   ("BIC", "COMMAND_AC2DC", "bic[0].PAC2DC"),
+                   ("BIC", "COMMAND_DC2AC", "bic[0].PDC2AC"),
+                   ("PV", "COMMAND_CURT", "pv[0].COMMAND_CURT"),
+                   ("WP", "COMMAND_CURT", "wp[0].COMMAND_CURT"),
+                   ("Load_ac", "COMMAND_SHED", "load_ac[0].COMMAND_SHED"),
+                   ("Load_uac", "COMMAND_SHED", "load_ac[1].COMMAND_SHED"),
+                   ("Load_dc", "COMMAND_SHED", "load_dc[0].COMMAND_SHED"),
+                   ("Load_udc", "COMMAND_SHED", "load_dc[1].COMMAND_SHED"),
+                   (None, "PMG", "PMG"),
+                   (None, "V_DC", "V_DC"),
+                   (None, "COMMAND_TYPE", "COMMAND_TYPE")]
+
+# The constant fields of the dynamic information
+vector_constants = [("dg[0].ID", 0),
+                    ("dg[1].ID", 1),
+                    ("ess[0].ID", 1)]
+
+
+def message_path(path):
+    # The (sub-)message and the field, e.g., (("dg", 0), "PG") for "dg[0].PG" and (None, "PMG") for "PMG"
+    if "." not in path:
+        return (None, path)
+    (message, field) = path.split(".")
+    (name, index) = message.rstrip("]").split("[")
+    return ((name, int(index)), field)
+
+
+def repeated_messages(paths):
+    # The number of sub-messages of each repeated field, e.g., [("dg", 2), ("ess", 1)], ordered by the first use
+    numbers = {}
+    for path in paths:
+        (message, field) = message_path(path)
+        if message is not None:
+            numbers[message[0]] = max(numbers.get(message[0], 0), message[1] + 1)
+    return list(numbers.items())
+
+
+def field_index(path, repeated):
+    """Resolve the path of a field in the messages, see formulated_messages
+
+        @param path: the path of the field, e.g., "dg[0].PG"
+        @param repeated: the number of sub-messages of each repeated field
+        @return: the index of the (sub-)message, 0 is the information model, and the field
+        """
+    (message, field) = message_path(path)
+    if message is None:
+        return (0, field)
+    index = 1
+    for (name, number) in repeated:
+        if name == message[0]:
+            return (index + message[1], field)
+        index += number
+
+
+def model_value(device, key):
+    # The getter of the model value of the field, e.g., model["UG"]["AREA"]
+    if device is None:
+        return itemgetter(key)
+
+    def value(model):
+        return model[device][key]
+
+    return value
+
+
+def formulated_messages(info, repeated):
+    # The information model and its pre-sized sub-messages, which are cleared in place
+    messages = [info]
+    for (name, number) in repeated:
+        messages.extend(message_fields(getattr(info, name), number))
+    return messages
+
+
+def received_messages(info, repeated):
+    # The information model and its sub-messages
+    messages = [info]
+    for (name, number) in repeated:
+        messages.extend(getattr(info, name)[0:number])
+    return messages
+
+
+# The resolved fields of the scalar mode, (index of the message, field, value or getter of the model value)
+scalar_repeated = repeated_messages([path for (path, device, key) in scalar_layout] +
+                                    [path for (path, value) in scalar_constants])
+scalar_constant_fields = [field_index(path, scalar_repeated) + (value,) for (path, value) in scalar_constants]
+scalar_fields = [field_index(path, scalar_repeated) + (model_value(device, key),)
+                 for (path, device, key) in scalar_layout]
+# (device, key, index of the message, field) of the short term commands
+scalar_repeated_commands = repeated_messages([path for (device, key, path) in scalar_commands])
+scalar_command_fields = [(device, key) + field_index(path, scalar_repeated_commands)
+                         for (device, key, path) in scalar_commands]
+
+# The resolved fields of the vector mode, (index of the message, field, getter of the model value, expansion, whether
+# the series is int32)
+vector_repeated = repeated_messages([layout[0] for layout in series_layout] +
+                                    [path for (path, value) in vector_constants])
+vector_constant_fields = [field_index(path, vector_repeated) + (value,) for (path, value) in vector_constants]
+vector_fields = [field_index(path, vector_repeated) + (model_value(device, key), expansion, dtype == "<i4")
+                 for (path, dtype, device, key, expansion) in series_layout]
+# (device, key, index of the message, field) of the commands
+vector_repeated_commands = repeated_messages([path for (device, key, path) in command_series])
+vector_command_fields = [(device, key) + field_index(path, vector_repeated_commands)
+                         for (device, key, path) in command_series]
+
+
+def scalar_formulation(model, Target_time, info):
+    # The formulation of the short term information, the sub-messages of the reused model are overwritten in place
+    messages = formulated_messages(info, scalar_repeated)
+    info.TIME_STAMP = Target_time
+    for (index, field, value) in scalar_constant_fields:
+        setattr(messages[index], field, value)
+    for (index, field, getter) in scalar_fields:
+        value = getter(model)
+        setattr(messages[index], field, value[0] if type(value) in sequences else value)
+    info.TIME_STAMP_COMMAND = Target_time
+    return info
+
+
+def scalar_extraction(model, info):
+    # The extraction of the short term commands, which are extracted to a copy of the model
+    model = snapshot(model)
+    messages = received_messages(info, scalar_repeated_commands)
+    for (device, key, index, field) in scalar_command_fields:
+        if device is None:
+            model[key] = getattr(messages[index], field)
+        else:
+            model[device][key] = getattr(messages[index], field)
+    return model
+
+
+def vector_formulation(model, Target_time, info, T):
+    # The formulation of the dynamic information by series_layout, the series are extended to the cleared sub-messages
+    messages = formulated_messages(info, vector_repeated)
+    info.AREA = model["UG"]["AREA"]
+    info.TIME_STAMP = Target_time
+    for (index, field, value) in vector_constant_fields:
+        setattr(messages[index], field, value)
+    for (index, field, getter, expansion, integer) in vector_fields:
+        if expansion == "Available":
+            getattr(messages[index], field).extend([1] * T)
+            continue
+        value = getter(model)
+        if type(value) not in sequences:
+            value = [value]
+        if integer:  # The int32 series are rounded, as the packed columns of schema 2, e.g., the forecasted loads
+            value = list(map(round, value))
+        if expansion == "Status" and len(value) != T:  # The status is repeated to the look ahead time steps
+            value = list(value) * T
+        if index == 0:  # The repeated field of the reused model is overwritten
+            scalar_field(getattr(info, field), value)
+        else:
+            getattr(messages[index], field).extend(value)
+    info.COMMAND_TYPE = model["COMMAND_TYPE"]
+    info.TIME_STAMP_COMMAND = Target_time
+    return info
+
+
+def vector_extraction(model, info):
+    # The extraction of the commands, the series of the model refer to the values of the information model
+    messages = received_messages(info, vector_repeated_commands)
+    for (device, key, index, field) in vector_command_fields:
+        if device is None:
+            model[key] = getattr(messages[index], field)._values
+        else:
+            model[device][key] = getattr(messages[index], field)._values
+    model["COMMAND_TYPE"] = info.COMMAND_TYPE
+    return model
@@ -0,0 +1,45 @@
+## Message pool of the information exchange
+# The information models are formulated in each cycle of the operating processes. Each operating process reuses one
+# message, i.e., info_opf in OPF and the pooled dynamic model in ED and UC, and the sub-messages of the repeated fields
+# are kept by the message and overwritten in place. Hence, the repeated fields never grow by the cycles, and neither
+# the messages nor the sub-messages are created again.
+# The pooled message is reused by the next cycle of its process, the former command is sent before that.
+import threading
+
+pool = {}  # The pooled message of each operating process
+pool_lock = threading.Lock()
+
+
+def message_pool(key, message_type):
+    """Return the pooled message, which is created at the first use
+
+        @param key: the operating process, e.g., "ED"
+        @param message_type: the message class, e.g., dynamic_operation_pb2.local_sources
+        @return: the message of the process
+        """
+    with pool_lock:
+        if key not in pool:
+            pool[key] = message_type()
+        return pool[key]
+
+
+def message_fields(field, number):
+    """Return the pre-sized sub-messages of a repeated message field, which are cleared in place
+
+        @param field: the repeated message field, e.g., info.dg
+        @param number: the number of sub-messages
+        @return: the list of sub-messages
+        """
+    while len(field) > number:
+        del field[-1]
+    while len(field) < number:
+        field.add()
+    for message in field:
+        message.Clear()
+    return list(field)
+
+
+def scalar_field(field, values):
+    # Overwrite the repeated scalar field in place, e.g., info.PMG
+    del field[:]
+    field.extend(values)
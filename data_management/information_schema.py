@@ -0,0 +1,236 @@
+## Schema of the dynamic information between the universal ems and the local ems
+# Schema 1 is local_sources (see dynamic_operation.proto), whose series of the ED/UC horizons are repeated fields of
+# the sub-messages, which are encoded and decoded element by element. Schema 2 is local_sources_v2, which carries the
+# same series in two packed columns of little-endian values (integer and float), decoded by one frombuffer each. The
+# series are ordered by series_layout, hence both emss must run the same layout.
+# The varints of schema 1 take one or two bytes for the small integers, e.g., the statuses and the commands below
+# 16384 kW, hence the integer column takes the narrowest of int8, int16 and int32 which holds its values, otherwise
+# the messages of schema 2 are about twice as large. The float series take four bytes in both schemas.
+# The schema is negotiated by the connection request: the local ems requests its highest schema, the universal ems
+# replies the lower one of both schemas. The request and the reply of schema 1 are the former messages, hence an ems of
+# the former version is connected by schema 1.
+# The schema of a connection is the type of its information model, e.g., info_ed, see dynamic_information.
+from numpy import array, around, concatenate, frombuffer, iinfo, ones, tile
+from configuration.configuration_time_line import default_look_ahead_time_step
+from data_management.information_pool import message_pool, scalar_field
+from modelling import dynamic_operation_pb2, dynamic_operation_v2_pb2
+
+# The series of the dynamic information, (path in local_sources, data type, device, key, expansion), the expansion is
+# "Status": the value is repeated to the look ahead time steps, or "Available": the device is available in all the time
+# steps, or None: the value is carried as it is
+series_layout = [("dg[0].GEN_STATUS", "<i4", "UG", "GEN_STATUS", "Status"),
+                 ("dg[0].PG", "<i4", "UG", "COMMAND_PG", None),
+                 ("dg[0].RG", "<i4", "UG", "COMMAND_RG", None),
+                 ("dg[0].COMMAND_STATUS", "<i4", "UG", "COMMAND_START_UP", None),
+                 ("dg[1].GEN_STATUS", "<i4", "DG", "GEN_STATUS", "Status"),
+                 ("dg[1].PG", "<i4", "DG", "COMMAND_PG", None),
+                 ("dg[1].RG", "<i4", "DG", "COMMAND_RG", None),
+                 ("dg[1].COMMAND_STATUS", "<i4", "DG", "COMMAND_START_UP", None),
+                 ("ess[0].ESS_STATUS", "<i4", "ESS", None, "Available"),
+                 ("ess[0].SOC", "<f4", "ESS", "SOC", None),
+                 ("ess[0].PG", "<i4", "ESS", "COMMAND_PG", None),
+                 ("ess[0].RG", "<i4", "ESS", "COMMAND_RG", None),
+                 ("pv[0].PG", "<f4", "PV", "PG", None),
+                 ("pv[0].COMMAND_CURT", "<i4", "PV", "COMMAND_CURT", None),
+                 ("wp[0].PG", "<f4", "WP", "PG", None),
+                 ("wp[0].COMMAND_CURT", "<i4", "WP", "COMMAND_CURT", None),
+                 ("load_ac[0].PD", "<i4", "Load_ac", "PD", None),
+                 ("load_ac[0].COMMAND_SHED", "<f4", "Load_ac", "COMMAND_SHED", None),
+                 ("load_ac[1].PD", "<i4", "Load_uac", "PD", None),
+                 ("load_ac[1].COMMAND_SHED", "<f4", "Load_uac", "COMMAND_SHED", None),
+                 ("load_dc[0].PD", "<i4", "Load_dc", "PD", None),
+                 ("load_dc[0].COMMAND_SHED", "<f4", "Load_dc", "COMMAND_SHED", None),
+                 ("load_dc[1].PD", "<i4", "Load_udc", "PD", None),
+                 ("load_dc[1].COMMAND_SHED", "<f4", "Load_udc", "COMMAND_SHED", None),
+                 ("bic[0].STATUS", "<i4", "BIC", None, "Available"),
+                 ("bic[0].PAC2DC", "<f4", "BIC", "COMMAND_AC2DC", None),
+                 ("bic[0].PDC2AC", "<f4", "BIC", "COMMAND_DC2AC", None),
+                 ("PMG", "<f4", None, "PMG", None)]
+
+integer_types = ["<i1", "<i2", "<i4"]  # The types of the integer column, the narrowest one holding the values is used
+
+# The series updated by the universal ems (see information_collection.information_updating), (device, key, path)
+updating_series = [("DG", "GEN_STATUS", "dg[1].GEN_STATUS"),
+                   ("UG", "GEN_STATUS", "dg[0].GEN_STATUS"),
+                   ("Load_ac", "PD", "load_ac[0].PD"),
+                   ("Load_dc", "PD", "load_dc[0].PD"),
+                   ("Load_uac", "PD", "load_ac[1].PD"),
+                   ("Load_udc", "PD", "load_dc[1].PD"),
+                   ("PV", "PG", "pv[0].PG"),
+                   ("WP", "PG", "wp[0].PG")]
+
+# The set-points updated by the universal ems in the set-point tracing, the DG reserve follows the former schema
+tracing_series = [("UG", "COMMAND_PG", "dg[0].PG"),
+                  ("UG", "COMMAND_RG", "dg[0].RG"),
+                  ("DG", "COMMAND_PG", "dg[1].PG"),
+                  ("DG", "COMMAND_RG", "dg[0].RG"),
+                  ("ESS", "COMMAND_PG", "ess[0].PG"),
+                  ("ESS", "COMMAND_RG", "ess[0].RG"),
+                  (None, "PMG", "PMG"),
+                  ("BIC", "COMMAND_AC2DC", "bic[0].PAC2DC"),
+                  ("BIC", "COMMAND_DC2AC", "bic[0].PDC2AC"),
+                  ("PV", "COMMAND_CURT", "pv[0].COMMAND_CURT"),
+                  ("WP", "COMMAND_CURT", "wp[0].COMMAND_CURT"),
+                  ("Load_ac", "COMMAND_SHED", "load_ac[0].COMMAND_SHED"),
+                  ("Load_uac", "COMMAND_SHED", "load_ac[1].COMMAND_SHED"),
+                  ("Load_dc", "COMMAND_SHED", "load_dc[0].COMMAND_SHED"),
+                  ("Load_udc", "COMMAND_SHED", "load_dc[1].COMMAND_SHED")]
+
+# The commands extracted by the local ems (see information_formulation_extraction_dynamic.info_extraction)
+command_series = [("UG", "COMMAND_START_UP", "dg[0].GEN_STATUS"),
+                  ("UG", "COMMAND_PG", "dg[0].PG"),
+                  ("UG", "COMMAND_RG", "dg[0].RG"),
+                  ("DG", "COMMAND_START_UP", "dg[1].GEN_STATUS"),
+                  ("DG", "COMMAND_PG", "dg[1].PG"),
+                  ("DG", "COMMAND_RG", "dg[1].RG"),
+                  ("ESS", "COMMAND_PG", "ess[0].PG"),
+                  ("ESS", "SOC", "ess[0].SOC"),
+                  ("BIC", "COMMAND_AC2DC", "bic[0].PAC2DC"),
+                  ("BIC", "COMMAND_DC2AC", "bic[0].PDC2AC"),
+                  ("PV", "COMMAND_CURT", "pv[0].COMMAND_CURT"),
+                  ("WP", "COMMAND_CURT", "wp[0].COMMAND_CURT"),
+                  ("Load_ac", "COMMAND_SHED", "load_ac[0].COMMAND_SHED"),
+                  ("Load_uac", "COMMAND_SHED", "load_ac[1].COMMAND_SHED"),
+                  ("Load_dc", "COMMAND_SHED", "load_dc[0].COMMAND_SHED"),
+                  ("Load_udc", "COMMAND_SHED", "load_dc[1].COMMAND_SHED"),
+                  (None, "PMG", "PMG")]
+
+
+def handshake(name, schema):
+    # The connection message with the schema, e.g., b"ConnectionRequest:2", schema 1 is the former message
+    if schema == 1:
+        return name
+    return name + b":" + str(schema).encode()
+
+
+def handshake_schema(message, name):
+    """Return the schema of the connection message
+
+        @param message: the received message, e.g., b"ConnectionRequest:2"
+        @param name: the expected message, e.g., b"ConnectionRequest"
+        @return: the schema, None for an unexpected message
+        """
+    (received, _, schema) = message.partition(b":")
+    if received != name:
+        return None
+    return int(schema) if schema else 1
+
+
+def dynamic_information(schema):
+    # The information model of the dynamic information (ED/UC) by the schema
+    if schema == 1:
+        return dynamic_operation_pb2.local_sources()
+    return dynamic_operation_v2_pb2.local_sources_v2()
+
+
+def packed(info):
+    # Whether the information model carries the packed series of schema 2
+    return isinstance(info, dynamic_operation_v2_pb2.local_sources_v2)
+
+
+def integer_type(values):
+    # The narrowest type of the integer column which holds the values
+    for dtype in integer_types:
+        if len(values) == 0 or (values.min() >= iinfo(dtype).min and values.max() <= iinfo(dtype).max):
+            return dtype
+    return integer_types[-1]
+
+
+def series_formulation(*args):
+    """Formulate the dynamic information of schema 2, which is reused by the cycles of the operating process
+
+        @param args: the model, the target time and the operating process, i.e., "ED" or "UC"
+        @return: the local_sources_v2 message
+        """
+    model = args[0]
+    Target_time = args[1]
+    Type = args[2]
+    if Type == "UC":
+        T = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]
+    else:
+        T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
+    info = message_pool(Type + "_v2", dynamic_operation_v2_pb2.local_sources_v2)
+
+    columns = {"<i4": [], "<f4": []}
+    lengths = []
+    for (path, dtype, device, key, expansion) in series_layout:
+        if expansion == "Available":
+            values = ones(T)
+        else:
+            values = array(model[device][key] if device is not None else model[key], dtype=float, ndmin=1)
+            if expansion == "Status" and len(values) != T:
+                values = tile(values, T)
+        columns[dtype].append(values)
+        lengths.append(len(values))
+
+    info.AREA = model["UG"]["AREA"]
+    info.TIME_STAMP = Target_time
+    info.COMMAND_TYPE = model["COMMAND_TYPE"]
+    info.TIME_STAMP_COMMAND = Target_time
+    integers = around(concatenate(columns["<i4"])).astype("<i4")
+    dtype = integer_type(integers)
+    scalar_field(info.LENGTH, lengths)
+    info.INT_BYTES = iinfo(dtype).bits // 8
+    info.INT32 = integers.astype(dtype).tobytes()
+    info.FLOAT32 = concatenate(columns["<f4"]).astype("<f4").tobytes()
+
+    return info
+
+
+def series_decoding(info):
+    """Decode the packed series of schema 2, the series are the views of the columns
+
+        @param info: the local_sources_v2 message
+        @return: the dictionary of the series by their paths in series_layout
+        """
+    lengths = info.LENGTH
+    if len(lengths) != len(series_layout):
+        raise ValueError("The dynamic information has {0} series, {1} are expected!".format(len(lengths),
+                                                                                          len(series_layout)))
+    columns = {"<i4": frombuffer(info.INT32, dtype="<i{}".format(info.INT_BYTES)),
+               "<f4": frombuffer(info.FLOAT32, dtype="<f4")}
+    offsets = {"<i4": 0, "<f4": 0}
+    series = {}
+    for ((path, dtype, device, key, expansion), length) in zip(series_layout, lengths):
+        series[path] = columns[dtype][offsets[dtype]:offsets[dtype] + length]
+        offsets[dtype] += length
+
+    return series
+
+
+def series_updating(*args):
+    # Update the local models by the dynamic information of schema 2, as information_updating does for schema 1
+    info = args[0]
+    models = args[1]
+    T = args[2]
+    series = series_decoding(info)
+
+    models["COMMAND_TYPE"] = info.COMMAND_TYPE
+    for (device, key, path) in updating_series:
+        models[device][key] = series[path][0:T].tolist()
+    models["ESS"]["SOC"] = float(series["ess[0].SOC"][0])  # The initial energy state in the storage systems.
+
+    if info.COMMAND_TYPE == 1:  # The set-point tracing method
+        for (device, key, path) in tracing_series:
+            if device is None:
+                models[key] = series[path].tolist()
+            else:
+                models[device][key] = series[path].tolist()
+
+    return models
+
+
+def series_extraction(*args):
+    # Extract the commands of the dynamic information of schema 2, as info_extraction does for schema 1
+    model = args[0]
+    info = args[1]
+    series = series_decoding(info)
+
+    for (device, key, path) in command_series:
+        if device is None:
+            model[key] = series[path].tolist()
+        else:
+            model[device][key] = series[path].tolist()
+    model["COMMAND_TYPE"] = info.COMMAND_TYPE
+
+    return model
@@ -0,0 +1,104 @@
+## In-memory schedule bus between the operating processes
+# The unit commitment, the economic dispatch and the optimal power flow run in the same process of one ems (see
+# universal_ems and local_ems), hence the schedule of the slower horizon is published into a time-indexed store of the
+# process, and the faster horizon reads its look ahead window from the store without any database access.
+# Each schedule table has one ring buffer, i.e., the NumPy columns of the table, and the row of a time stamp is stored in
+# the slot (TIME_STAMP / time step) mod capacity. Two periods of the schedule remain in the buffer, as in the tables.
+# The tables are the optional persistence of the schedules (see configuration_database.schedule_persistence), and are
+# queried when the window is not in the buffer, e.g., after the restart of the process.
+from threading import Lock
+from numpy import arange, asarray, full, int64, zeros
+from configuration.configuration_database import schedule_persistence
+from configuration.configuration_time_line import default_time
+from data_management.database_format import long2middle, middle2short
+from data_management.schedule_upsert import upsert_schedule
+from utils import Logger
+
+logger = Logger("Schedule_bus")
+
+
+class ScheduleBuffer():
+    def __init__(self, table, time_step, look_ahead_time):
+        self.table = table
+        self.time_step = time_step
+        self.capacity = 2 * int(look_ahead_time / time_step)  # Two periods of the schedule
+        self.time_stamps = full(self.capacity, -1, dtype=int64)  # The time stamp of each slot, -1 means empty
+        # The columns of the table, the integer columns are stored as integers
+        self.columns = dict((column.name, zeros(self.capacity, dtype=int64 if column.type.python_type is int else float))
+                            for column in table.__table__.columns if not column.primary_key)
+        self.lock = Lock()  # The schedules are published and read by the jobs of the scheduler
+
+    def slots(self, time_stamps):
+        return (time_stamps // self.time_step) % self.capacity
+
+    def publish(self, columns):
+        """Publish the schedule into the buffer
+
+            @param columns: the columns of the rows, see schedule_upsert.schedule_columns
+            """
+        time_stamps = asarray(columns["TIME_STAMP"], dtype=int64)[-self.capacity:]
+        slots = self.slots(time_stamps)
+        with self.lock:
+            for name in self.columns:
+                self.columns[name][slots] = asarray(columns[name])[-self.capacity:]
+            self.time_stamps[slots] = time_stamps
+
+    def read(self, Target_time, T):
+        """Read the look ahead window from the buffer
+
+            @param Target_time: the time stamp of the first row
+            @param T: the number of rows
+            @return: the columns of the rows as lists, None means some rows are not in the buffer
+            """
+        time_stamps = Target_time + arange(T, dtype=int64) * self.time_step
+        slots = self.slots(time_stamps)
+        with self.lock:
+            if T > self.capacity or (self.time_stamps[slots] != time_stamps).any():
+                return None
+            return dict((name, self.columns[name][slots].tolist()) for name in self.columns)
+
+
+schedule_bus = {"long2middle": ScheduleBuffer(long2middle, default_time["Time_step_ed"],
+                                              default_time["Look_ahead_time_uc"]),
+                "middle2short": ScheduleBuffer(middle2short, default_time["Time_step_opf"],
+                                               default_time["Look_ahead_time_ed"])}
+
+
+def query_schedule(session, table, Target_time, T, delta_T):
+    # Query the look ahead window from the table by one range query, None means some rows are missing
+    rows = session.query(table).filter(table.TIME_STAMP >= Target_time,
+                                       table.TIME_STAMP < Target_time + T * delta_T).order_by(table.TIME_STAMP).all()
+    if [row.TIME_STAMP for row in rows] != [Target_time + i * delta_T for i in range(T)]:
+        return None
+    names = [column.name for column in table.__table__.columns if not column.primary_key]
+    return dict((name, [getattr(row, name) for row in rows]) for name in names)
+
+
+def publish_schedule(session, table, columns, expired_time):
+    """Publish the schedule to the faster horizon, and write it to the table when the persistence is enabled
+
+        @param table: the schedule table, e.g., long2middle
+        @param columns: the columns of the rows, see schedule_upsert.schedule_columns
+        @param expired_time: the rows before the expired time are removed from the table
+        """
+    schedule_bus[table.__tablename__].publish(columns)
+    if schedule_persistence[table.__tablename__]:
+        try:
+            upsert_schedule(session, table, columns, expired_time)
+        except:  # The schedule has been published, the failure of the database only delays the persistence
+            logger.warning("The schedule of {} is not persisted!".format(table.__tablename__))
+
+
+def read_schedule(session, table, Target_time, T):
+    """Read the look ahead window of the schedule, the table is queried when the window is not published
+
+        @param table: the schedule table, e.g., long2middle
+        @param Target_time: the time stamp of the first row
+        @param T: the number of rows
+        @return: the columns of the rows as lists, None means the schedule is not available
+        """
+    buffer = schedule_bus[table.__tablename__]
+    columns = buffer.read(Target_time, T)
+    if columns is None:
+        columns = query_schedule(session, table, Target_time, T, buffer.time_step)
+    return columns
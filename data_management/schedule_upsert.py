@@ -0,0 +1,92 @@
+## Bulk upsert of the schedules between the operating processes
+# The schedule of the upper layer, e.g., 48 hourly set points of UC, is expanded to the time steps of the lower layer,
+# e.g., 288 five-minute rows of ED, by repeating each set point. The expired rows are removed and all the rows are
+# written by one multi-row upsert, i.e., INSERT ... ON DUPLICATE KEY UPDATE in MySQL and INSERT ... ON CONFLICT DO
+# UPDATE in SQLite and PostgreSQL, in one transaction.
+from numpy import arange, asarray, repeat, broadcast_to
+from utils import Logger
+
+logger = Logger("Schedule_upsert")
+
+
+def schedule_columns(model, Target_time, delta_T, compress_rate, add_len):
+    """Expand the schedule of the upper layer to the time steps of the lower layer
+
+        @param model: the solution of the upper layer, whose commands are lists or scalars
+        @param delta_T: the time step of the lower layer (s)
+        @param compress_rate: the number of time steps of the lower layer in one time step of the upper layer
+        @param add_len: the number of rows
+        @return: the columns of the schedule table, each column is a list of add_len values
+        """
+
+    steps = -(-add_len // compress_rate)  # The time steps of the upper layer
+
+    def expand(value):
+        return repeat(broadcast_to(asarray(value), (steps,)), compress_rate)[0:add_len].tolist()
+
+    blank = [0] * add_len
+    return {"TIME_STAMP": (Target_time + arange(add_len) * delta_T).tolist(),
+            "DG_STATUS": expand(model["DG"]["COMMAND_START_UP"]),
+            "DG_PG": expand(model["DG"]["COMMAND_PG"]),
+            "DG_QG": blank,
+            "UG_STATUS": expand(model["UG"]["COMMAND_START_UP"]),
+            "UG_PG": expand(model["UG"]["COMMAND_PG"]),
+            "UG_QG": blank,
+            "BIC_PG": expand(asarray(model["BIC"]["COMMAND_DC2AC"]) - asarray(model["BIC"]["COMMAND_AC2DC"])),
+            "BIC_QG": blank,
+            "BAT_PG": expand(model["ESS"]["COMMAND_PG"]),
+            "BAT_SOC": expand(model["ESS"]["SOC"]),
+            "PMG": expand(model["PMG"]),
+            "V_DC": blank,
+            "PV_CURT": expand(model["PV"]["COMMAND_CURT"]),
+            "WP_CURT": expand(model["WP"]["COMMAND_CURT"]),
+            "AC_SHED": expand(model["Load_ac"]["COMMAND_SHED"]),
+            "UAC_SHED": expand(model["Load_uac"]["COMMAND_SHED"]),
+            "DC_SHED": expand(model["Load_dc"]["COMMAND_SHED"]),
+            "UDC_SHED": expand(model["Load_udc"]["COMMAND_SHED"])}
+
+
+def upsert_statement(session, table, rows, names=None):
+    # The multi-row upsert of the dialect, None means the dialect has no upsert
+    # The existing rows are updated by the given columns, all the columns of the rows by default
+    keys = [column.name for column in table.__table__.primary_key]
+    names = [name for name in (rows[0] if names is None else names) if name not in keys]
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(rows)
+        return statement.on_duplicate_key_update(
+            dict((name, statement.inserted[name]) for name in names))
+    if dialect == "sqlite" or dialect == "postgresql":
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(rows)
+        return statement.on_conflict_do_update(index_elements=keys, set_=dict(
+            (name, statement.excluded[name]) for name in names))
+    return None
+
+
+def upsert_schedule(session, table, columns, expired_time):
+    """Replace the schedule in one transaction
+
+        @param table: the schedule table, e.g., long2middle
+        @param columns: the columns of the rows, see schedule_columns
+        @param expired_time: the rows before the expired time are removed
+        """
+    names = list(columns)
+    rows = [dict(zip(names, values)) for values in zip(*[columns[name] for name in names])]
+    try:
+        session.query(table).filter(table.TIME_STAMP < expired_time).delete()
+        statement = upsert_statement(session, table, rows)
+        if statement is not None:
+            session.execute(statement)
+        else:
+            for row in rows:
+                session.merge(table(**row))
+        session.commit()
+    except:
+        session.rollback()
+        logger.error("The schedule of {} can not be updated!".format(table.__tablename__))
+        raise
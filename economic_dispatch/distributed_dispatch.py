@@ -0,0 +1,170 @@
+## Distributed economic dispatch by using the alternating direction method of multipliers (ADMM)
+# The areas of the cluster, i.e., the local ems and the universal ems, are only coupled by the exchanged power PMG.
+# The consensus problem is formulated as
+#   min sum(c_i*x_i), s.t. PMG_i = (E*F)_i, -capacity <= F <= capacity
+# where E is the area-line incidence matrix and F is the line flows, see modelling.topology.
+# The objective is the linear cost of the centralised problem (see problem_solving.solving_procedure), i.e., the
+# quadratic matrix Q of the formulations is not used by either mode, and the subproblems are only quadratic by the
+# augmented item.
+# In each iteration,
+# 1) the subproblems of all the areas are solved in parallel by the process pool,
+#    x_i = argmin c_i*x_i + rho/2*||PMG_i - z_i + u_i||^2
+# 2) the line flows are updated by the bounded least squares, F = argmin ||PMG + u - E*F||^2, and z = E*F
+# 3) the scaled dual variables are updated, u = u + PMG - z
+# The iterations stop when the primal and dual residuals are within the tolerances, or when the time budget derived
+# from the gate closure of ED is used up.
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from numpy import array, zeros, concatenate, dot
+from numpy.linalg import norm
+from scipy.sparse import kron, identity, diags
+from scipy.optimize import lsq_linear
+from configuration.configuration_admm import default_admm
+from configuration.configuration_time_line import default_dead_line_time, default_look_ahead_time_step
+from modelling.topology import cluster_topology
+from solvers.solver_registry import quadratic_solver_selection
+from solvers.solver_executor import Deadline_Task
+from utils import Logger
+
+logger = Logger("Distributed_economic_dispatch")
+process_pool = {}  # The process pool is created in the first cycle and shared by the following cycles
+process_pool_lock = threading.Lock()
+
+
+class Admm_Thread(Deadline_Task):
+    # Solving task with time control and return value, the same as Solving_Thread
+    def __init__(self, formulation, local_models, universal_models, type, format):
+        T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
+        (models, incidence, capacity) = cluster_topology(local_models, universal_models, T)
+        Deadline_Task.__init__(self, len(models) * T * format.NX + capacity.size,
+                                 default_dead_line_time["Gate_closure_ed"])
+        self.formulation = formulation  # The problem formulation class of the mode
+        self.local_models = local_models
+        self.universal_models = universal_models
+        self.type = type  # "Feasible" or "Infeasible"
+        self.format = format  # The index format of the areas
+
+    def run(self):
+        deadline = default_dead_line_time["Gate_closure_ed"] * default_admm["Gate_closure_ratio"]
+        self.value = admm_dispatch(self.formulation, self.local_models, self.universal_models, self.type,
+                                   self.format, deadline)
+
+
+def admm_pool(processes):
+    # Return the process pool, the workers are spawned so that the sockets of the main process are not inherited
+    with process_pool_lock:
+        if "ADMM" not in process_pool:
+            process_pool["ADMM"] = ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn"))
+    return process_pool["ADMM"]
+
+
+def augmented_model(model, T, NX, PMG, rho, v):
+    # The subproblem of one area with the augmented item rho/2*||PMG - v||^2, the linear cost is kept as the
+    # centralised problem
+    penalty = zeros(T * NX)
+    penalty[PMG::NX] = rho
+    c = array(model["c"], dtype=float)
+    c[PMG::NX] = c[PMG::NX] - rho * v
+
+    subproblem = dict(model)
+    subproblem["c"] = c
+    subproblem["Q"] = diags(penalty, format="csr")
+    return subproblem
+
+
+def subproblem_solving(model, name):
+    # Solve the subproblem in the worker process
+    solver = quadratic_solver_selection(name)
+    if solver is None:
+        return [0] * len(model["c"]), 0, 0
+    return solver(model["c"], model["Q"], Aeq=model["Aeq"], beq=model["beq"], A=model["A"], b=model["b"],
+                  xmin=model["lb"], xmax=model["ub"], vtypes=model.get("vtypes"))
+
+
+def admm_dispatch(formulation, local_models, universal_models, type, format, deadline):
+    """Solve the economic dispatch of the cluster by ADMM
+
+        @param formulation: the problem formulation class, e.g., problem_formulation or problem_formulation_tracing
+        @param type: "Feasible" or "Infeasible"
+        @param format: the index format of the areas, which provides PMG and NX
+        @param deadline: the time budget of the iterations (s)
+        @return: the solution dictionary of Solving_Thread, the solution is ordered as the centralised problem, i.e.,
+                 [areas, line flows], and the time, primal and dual residuals of each iteration are recorded
+        """
+    t0 = time.time()
+    PMG = format.PMG
+    NX = format.NX
+    T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
+    (models, incidence, capacity) = cluster_topology(local_models, universal_models, T)
+    if type == "Feasible":
+        mathematical_models = [formulation.problem_formulation_local(model) for model in models]
+    else:
+        mathematical_models = [formulation.problem_formulation_local_recovery(model) for model in models]
+    N = len(mathematical_models)
+    # The exchanged power of each area is limited by the lines connected to this area
+    area_capacity = abs(incidence).dot(capacity)
+    for i in range(N):
+        mathematical_models[i]["lb"][PMG::NX] = -area_capacity[i]
+        mathematical_models[i]["ub"][PMG::NX] = area_capacity[i]
+
+    E = kron(incidence, identity(T), format="csc")  # The exchanged power of each area, ordered as the areas
+    capacity = capacity.ravel()
+    online = capacity > 0  # The lines being off-line have no flow
+    F = zeros(E.shape[1])
+    z = zeros(N * T)
+    u = zeros(N * T)
+    x = [zeros(T * NX)] * N
+    rho = default_admm["Penalty"]
+    pool = admm_pool(default_admm["Processes"])
+
+    iterations = []
+    success = False
+    for k in range(default_admm["Iteration_max"]):
+        t_iteration = time.time()
+        # 1) The subproblems of all the areas
+        futures = [pool.submit(subproblem_solving,
+                               augmented_model(mathematical_models[i], T, NX, PMG, rho, z[i * T:(i + 1) * T] -
+                                               u[i * T:(i + 1) * T]), default_admm["Solver"]) for i in range(N)]
+        results = [future.result() for future in futures]
+        if min([result[2] for result in results]) == 0:
+            logger.error("The subproblem of ADMM is infeasible in iteration {}!".format(k))
+            break
+        x = [array(result[0], dtype=float) for result in results]
+        PMG_areas = concatenate([x[i][PMG::NX] for i in range(N)])
+        # 2) The line flows
+        z_previous = z
+        if online.any():
+            F[online] = lsq_linear(E[:, online], PMG_areas + u, bounds=(-capacity[online], capacity[online])).x
+        z = E.dot(F)
+        # 3) The dual variables
+        u = u + PMG_areas - z
+
+        primal_residual = norm(PMG_areas - z)
+        dual_residual = rho * norm(z - z_previous)
+        iterations.append({"time": time.time() - t_iteration,
+                           "primal_residual": primal_residual,
+                           "dual_residual": dual_residual})
+        logger.debug("ADMM iteration {0}: {1:.3f}s, primal residual {2:.3f}, dual residual {3:.3f}".format(
+            k, iterations[k]["time"], primal_residual, dual_residual))
+
+        if primal_residual <= default_admm["Primal_tolerance"] and dual_residual <= default_admm["Dual_tolerance"]:
+            success = True
+            break
+        # The next iteration is not started if it can not be finished before the deadline
+        if time.time() - t0 + iterations[k]["time"] > deadline:
+            logger.warning("ADMM stops at iteration {} by the gate closure!".format(k))
+            break
+
+    obj = 0
+    for i in range(N):
+        obj += dot(mathematical_models[i]["c"], x[i])  # The linear cost, the same as the centralised problem
+
+    res = {"x": concatenate(x + [F]).tolist(),
+           "obj": obj,
+           "success": success,
+           "time": time.time() - t0,
+           "iterations": iterations}
+
+    return res
@@ -11,7 +11,7 @@
 # The input check is the oriented from 1） the start-up of the local ems and universal ems
 # 2） modelling of each equipment
 
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
 from configuration.configuration_time_line import default_look_ahead_time_step
 from utils import Logger
 
@@ -21,7 +21,7 @@ from configuration import configuration_default_generators, configuration_defaul
 
 class input_check_middle_term():
     def model_local_check(*args):
-        model = deepcopy(args[0])  # The input model
+        model = snapshot(args[0])  # The input model
 
         T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]  # The look ahead time step for short term operation
         # 1) The input check of utility grid
@@ -188,7 +188,7 @@ class input_check_middle_term():
 
         return model # return the model
     def model_universal_check(*args):
-        model = deepcopy(args[0])  # The input model
+        model = snapshot(args[0])  # The input model
 
         T = default_look_ahead_time_step[
             "Look_ahead_time_ed_time_step"]  # The look ahead time step for short term operation
@@ -1,5 +1,7 @@
 """
 The alternating direction method of multipliers method is adopted in economic dispatch package
+The ADMM mode is enabled in configuration/configuration_admm.py, otherwise, the centralised problem is solved.
+The elastic problem replaces the feasible and infeasible problems when it is enabled in configuration_solvers.py.
 Jointed energy and reserves are optimized to reduce the operation cost.
 Based on this method, the shadow price can also be calculated as well.
 @author: Zhao Tianyang
@@ -14,11 +16,16 @@ from data_management.information_management import information_formulation_extra
 from data_management.information_management import information_receive_send
 from economic_dispatch.mid_term_forecasting import ForecastingThread
 from utils import Logger
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
 from economic_dispatch.input_check import input_check_middle_term
 from economic_dispatch.output_check import output_local_check
 from economic_dispatch.middle2short import middle2short_operation
 from economic_dispatch.set_points_tracing import set_points_tracing_ed
+from modelling.sparse_formulation import elastic_fields, elastic_slacks
+from configuration.configuration_eps import default_eps
+from modelling.solution_decoder import solution_decoder
+from modelling.power_flow.layout import variable_layout
+
 logger_uems = Logger("Middle_term_dispatch_UEMS")
 logger_lems = Logger("Middle_term_dispatch_LEMS")
 
@@ -28,17 +35,13 @@ class middle_term_operation():
     def middle_term_operation_uems(*args):
         # Short term forecasting for the middle term operation in universal energy management system.
         from data_management.database_management import database_operation
-        from economic_dispatch.problem_formulation import problem_formulation
-        from economic_dispatch.problem_formulation_set_points_tracing import problem_formulation_tracing
-        from economic_dispatch.problem_solving import Solving_Thread
-        from configuration.configuration_time_line import default_dead_line_time
         # Short term operation
         # General procedure for middle-term operation
         # 1)Information collection
         # 1.1)local EMS forecasting
         # 1.2)Information exchange
-        universal_models = deepcopy(args[0])
-        local_models = deepcopy(args[1])
+        universal_models = snapshot(args[0])
+        local_models = snapshot(args[1])
         socket_upload = args[2]
         socket_download = args[3]
         info = args[4]
@@ -64,6 +67,35 @@ class middle_term_operation():
 
         universal_models = set_points_tracing_ed(Target_time, session, universal_models)
 
+        (local_models, universal_models) = middle_term_operation.operation_solving(local_models, universal_models,
+                                                                                   Target_time)
+        middle2short_operation(Target_time, session, universal_models)
+        # Return command to the local ems
+        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time, "ED",
+                                                                                    info)
+        dynamic_model.TIME_STAMP_COMMAND = round(time.time())
+        information_send_thread = threading.Thread(target=information_receive_send.information_send,
+                                                   args=(socket_upload, dynamic_model, 2))
+
+        logger_uems.info("The command for UEMS is {}".format(universal_models["PMG"]))
+        information_send_thread.start()
+
+        # The result is recorded by the write-behind recorder after the command is sent
+        database_operation.database_record(session, universal_models, Target_time, "ED")
+        information_send_thread.join()
+
+    def operation_solving(*args):
+        # Solve the economic dispatch problem of the collected models, and return the commands of the models
+        from economic_dispatch.problem_formulation import problem_formulation
+        from economic_dispatch.problem_formulation_set_points_tracing import problem_formulation_tracing
+        from economic_dispatch.problem_solving import Solving_Thread, warm_start
+        from economic_dispatch.distributed_dispatch import Admm_Thread
+        from configuration.configuration_admm import default_admm
+        from configuration.configuration_solvers import default_solver
+        local_models = args[0]
+        universal_models = args[1]
+        Target_time = args[2]
+
         local_models = input_check_middle_term.model_local_check(local_models)
         universal_models = input_check_middle_term.model_universal_check(universal_models)
 
@@ -71,31 +103,62 @@ class middle_term_operation():
         # Two threads will be created, one for feasible problem, the other for infeasible problem
         if local_models["COMMAND_TYPE"] == 1 and universal_models["COMMAND_TYPE"] == 1:
             logger_uems.info("ED is under set-points tracing mode!")
-            mathematical_model = problem_formulation_tracing.problem_formulation_universal(local_models,universal_models,"Feasible")
-            mathematical_model_recovery = problem_formulation_tracing.problem_formulation_universal(local_models, universal_models,"Infeasible")
+            mode = "Tracing"
+            formulation = problem_formulation_tracing
         else:
             logger_uems.info("ED is under idle mode!")
-            mathematical_model = problem_formulation.problem_formulation_universal(local_models, universal_models,
-                                                                              "Feasible")
-            mathematical_model_recovery = problem_formulation.problem_formulation_universal(local_models, universal_models,
-                                                                                       "Infeasible")
+            mode = "Idle"
+            formulation = problem_formulation
             local_models["COMMAND_TYPE"] = 0
             universal_models["COMMAND_TYPE"] = 0
 
         # Solve the problem
-        res = Solving_Thread(mathematical_model)
-        res_recovery = Solving_Thread(mathematical_model_recovery)
-        res.daemon = True
-        res_recovery.daemon = True
-
-        res.start()
-        res_recovery.start()
-
-        res.join(default_dead_line_time["Gate_closure_ed"])
-        res_recovery.join(default_dead_line_time["Gate_closure_ed"])
-
-
-        if res.value["success"] is True:
+        if default_admm["ADMM"]:
+            # The areas are solved in parallel and coordinated by the exchanged power
+            res = Admm_Thread(formulation, local_models, universal_models, "Feasible",
+                              warm_start.formats[(mode, "Feasible")])
+            res_recovery = Admm_Thread(formulation, local_models, universal_models, "Infeasible",
+                                       warm_start.formats[(mode, "Infeasible")])
+            threads = [(res, "Feasible", None), (res_recovery, "Infeasible", None)]
+        elif default_solver["Elastic"]:
+            # One elastic problem, the load shedding and renewable energy curtailment are penalised slack variables
+            mathematical_model = formulation.problem_formulation_universal(local_models, universal_models, "Elastic")
+            x0 = warm_start.start_vector((mode, "Elastic"), Target_time, len(mathematical_model["c"]),
+                                         mathematical_model["N"])
+            res = Solving_Thread(mathematical_model, (mode, "Elastic"), x0)
+            threads = [(res, "Elastic", x0)]
+        else:
+            mathematical_model = formulation.problem_formulation_universal(local_models, universal_models, "Feasible")
+            mathematical_model_recovery = formulation.problem_formulation_universal(local_models, universal_models,
+                                                                                    "Infeasible")
+            # The solutions of previous cycle are shifted to warm start the solvers
+            x0 = warm_start.start_vector((mode, "Feasible"), Target_time, len(mathematical_model["c"]),
+                                         mathematical_model["N"])
+            x0_recovery = warm_start.start_vector((mode, "Infeasible"), Target_time,
+                                                  len(mathematical_model_recovery["c"]),
+                                                  mathematical_model_recovery["N"])
+            res = Solving_Thread(mathematical_model, (mode, "Feasible"), x0)
+            res_recovery = Solving_Thread(mathematical_model_recovery, (mode, "Infeasible"), x0_recovery)
+            threads = [(res, "Feasible", x0), (res_recovery, "Infeasible", x0_recovery)]
+
+        for (thread, type, start) in threads:
+            thread.start()
+        for (thread, type, start) in threads:
+            thread.wait()  # The overdue solves are reported by the timeout results at the gate closure
+
+        for (thread, type, start) in threads:
+            if thread.value["success"] is True:
+                warm_start.store((mode, type), Target_time, thread.value["x"])
+                logger_uems.info("The {0} ED problem is solved in {1:.3f}s with {2} start".format(
+                    type, thread.value["time"], "cold" if start is None else "warm"))
+            if "iterations" in thread.value:
+                logger_uems.info("ADMM of the {0} ED problem takes {1} iterations in {2:.3f}s".format(
+                    type, len(thread.value["iterations"]), thread.value["time"]))
+
+        if threads[0][1] == "Elastic":
+            (local_models, universal_models) = result_update(res.value, local_models, universal_models, "Elastic",
+                                                             mathematical_model["N"])
+        elif res.value["success"] is True:
             (local_models, universal_models) = result_update(res.value, local_models, universal_models, "Feasible")
         else:
             (local_models, universal_models) = result_update(res_recovery.value, local_models, universal_models,
@@ -103,21 +166,8 @@ class middle_term_operation():
 
         local_models = output_local_check(local_models)
         universal_models = output_local_check(universal_models)
-        middle2short_operation(Target_time, session, universal_models)
-        # Return command to the local ems
-        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time,"ED")
-        dynamic_model.TIME_STAMP_COMMAND = round(time.time())
-        information_send_thread = threading.Thread(target=information_receive_send.information_send,
-                                                   args=(socket_upload, dynamic_model, 2))
-
-        database_operation__uems = threading.Thread(target=database_operation.database_record,
-                                                    args=(session, universal_models, Target_time, "ED"))
-        logger_uems.info("The command for UEMS is {}".format(universal_models["PMG"]))
-        information_send_thread.start()
-        database_operation__uems.start()
 
-        information_send_thread.join()
-        database_operation__uems.join()
+        return local_models, universal_models
 
     def middle_term_operation_lems(*args):
         from data_management.database_management import database_operation
@@ -127,7 +177,7 @@ class middle_term_operation():
         # 2) Short-term forecasting
         # 3) Information upload and database store
         # 4) Download command and database operation
-        local_models = deepcopy(args[0])  # Local energy management system models
+        local_models = snapshot(args[0])  # Local energy management system models
         socket_upload = args[1]  # Upload information channel
         socket_download = args[2]  # Download information channel
         info = args[3]  # Information structure
@@ -145,7 +195,8 @@ class middle_term_operation():
         local_models = thread_forecasting.models
         # Update the dynamic model
         local_models = set_points_tracing_ed(Target_time, session, local_models)
-        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time, "ED")
+        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time, "ED",
+                                                                                    info)
         # Information send
         logger_lems.info("Sending request from {}".format(dynamic_model.AREA) + " to the serve")
         logger_lems.info("The local time is {}".format(dynamic_model.TIME_STAMP))
@@ -156,14 +207,40 @@ class middle_term_operation():
         # Receive information from uems
         dynamic_model = information_receive_send.information_receive(socket_upload, info, 2)
         # print("The universal time is", dynamic_model.TIME_STAMP_COMMAND)
-        logger_lems.info("The command from UEMS is {}".format(dynamic_model.PMG))
         # Store the data into the database
 
         local_models = information_formulation_extraction_dynamic.info_extraction(local_models, dynamic_model)
+        logger_lems.info("The command from UEMS is {}".format(local_models["PMG"]))
 
         middle2short_operation(Target_time, session, local_models)
         database_operation.database_record(session, local_models, Target_time, "ED")
 
+    def parametric_model_initialization(*args):
+        # Build the parametric models of each mode at the start-up.
+        # In the middle term operation, only the right hand sides and boundaries of these models are updated.
+        from economic_dispatch.problem_formulation import problem_formulation
+        from economic_dispatch.problem_formulation_set_points_tracing import problem_formulation_tracing
+        from economic_dispatch.problem_solving import executor, parametric_startup
+        from configuration.configuration_solvers import default_solver
+        universal_models = input_check_middle_term.model_universal_check(args[0])
+        local_models = input_check_middle_term.model_local_check(args[1])
+
+        formulation = {"Idle": problem_formulation, "Tracing": problem_formulation_tracing}
+        types = ["Elastic"] if default_solver["Elastic"] else ["Feasible", "Infeasible"]
+        models = {}
+        for mode in formulation:
+            for type in types:
+                try:
+                    models[(mode, type)] = formulation[mode].problem_formulation_universal(local_models,
+                                                                                           universal_models, type)
+                except:
+                    logger_uems.warning("The parametric model ({0}, {1}) will be built in the first cycle!".format(
+                        mode, type))
+        if default_solver["Process_pool"]:  # The problems are solved, and the models are kept, by the worker processes
+            executor.initialization(parametric_startup, (models, default_solver["Solver_ed"]))
+        else:
+            parametric_startup(models, default_solver["Solver_ed"])
+
 
 def result_update(*args):
     ## Result update for local ems and universal ems models
@@ -173,131 +250,55 @@ def result_update(*args):
     type = args[3]
     T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
 
-    if type == "Feasible":
-        if local_model["COMMAND_TYPE"] is 0:
-            from modelling.power_flow.idx_ed_foramt import NX
-        else:
-            from modelling.power_flow.idx_ed_set_points_tracing import NX
-    else:
-        if local_model["COMMAND_TYPE"] is 0:
-            from modelling.power_flow.idx_ed_recovery_format import NX
-        else:
-            from modelling.power_flow.idx_ed_set_points_tracing_recovery import NX
-
-    nx = T * NX
+    nx = T * solution_format(local_model, type).NX
     x_local = res["x"][0:nx]  # Decouple of the solutions
     x_universal = res["x"][nx:2 * nx]
 
-    local_model = update(x_local, local_model, type)
-    universal_model = update(x_universal, universal_model, type)
+    if type == "Elastic" and res["success"] is not True:
+        # The elastic problem is not solved, e.g., it is overdue at the gate closure, the former commands are kept
+        logger_uems.warning("The elastic ED problem fails: {}".format(res.get("status")))
+        local_model["success"] = False
+        universal_model["success"] = False
+    elif type == "Elastic":
+        # The elastic problem is decoded as the feasible problem, and the shedding commands are the slack variables
+        local_model = update(x_local, local_model, "Feasible")
+        universal_model = update(x_universal, universal_model, "Feasible")
+        slacks = elastic_slacks(res["x"], args[4], T)  # args[4] is the number of areas
+        for (model, slack) in [(local_model, slacks[0]), (universal_model, slacks[-1])]:
+            for i in range(len(elastic_fields)):
+                (device, command) = elastic_fields[i][0:2]
+                model[device][command] = [int(value) for value in slack[i]]
+            model["success"] = bool(slack.max() < default_eps["ED"])  # No load is shed and no RES is curtailed
+    else:
+        local_model = update(x_local, local_model, type)
+        universal_model = update(x_universal, universal_model, type)
 
     return local_model, universal_model
 
+
+def solution_format(model, type):
+    # The variable layout of the solution, the elastic problem is decoded as the feasible problem
+    if model["COMMAND_TYPE"] == 0:
+        return variable_layout("ED", "Idle", type)
+    else:
+        return variable_layout("ED", "Tracing", type)
+
+
 def update(*args):
     x = args[0]
     model = args[1]
     type = args[2]
 
     T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
+    # The commands are decoded by the field map of the format, the curtailment and shedding of the recovery problem are
+    # the forecasting minus the served power
+    model = solution_decoder(solution_format(model, type)).decode(x, model, T)
 
     if type == "Feasible":
-        if model["COMMAND_TYPE"] is 0:
-            from modelling.power_flow.idx_ed_foramt import PG, RG, PUG, RUG, PBIC_AC2DC, PBIC_DC2AC, PESS_C, PESS_DC, RESS,EESS,\
-                PMG, NX
-        else:
-            from modelling.power_flow.idx_ed_set_points_tracing import PG, RG, PUG, RUG, PBIC_AC2DC, PBIC_DC2AC, PESS_C, PESS_DC, \
-                RESS, EESS, PMG, NX
-        model["DG"]["COMMAND_PG"] = [0] * T
-        model["DG"]["COMMAND_RG"] = [0] * T
-        model["DG"]["COMMAND_START_UP"] = model["DG"]["GEN_STATUS"] # The staus of generators will be not modified
-
-        model["UG"]["COMMAND_PG"] = [0] * T
-        model["UG"]["COMMAND_START_UP"] = model["UG"]["GEN_STATUS"] # The staus of generators will be not modified
-        model["UG"]["COMMAND_RG"] = [0] * T
-
-        model["BIC"]["COMMAND_AC2DC"] = [0] * T
-        model["BIC"]["COMMAND_DC2AC"] = [0] * T
-        model["ESS"]["COMMAND_PG"] = [0] * T
-        model["ESS"]["COMMAND_RG"] = [0] * T
-        model["ESS"]["SOC"] = [0]*T
-
-        model["PV"]["COMMAND_CURT"] = [0] * T
-        model["WP"]["COMMAND_CURT"] = [0] * T
-        model["PMG"] = [0] * T
-
-        model["Load_ac"]["COMMAND_SHED"] = [0] * T
-        model["Load_uac"]["COMMAND_SHED"] = [0] * T
-        model["Load_dc"]["COMMAND_SHED"] = [0] * T
-        model["Load_udc"]["COMMAND_SHED"] = [0] * T
-
-        for i in range(T):
-            model["DG"]["COMMAND_PG"][i] = int(x[i * NX + PG])
-            model["DG"]["COMMAND_RG"][i] = int(x[i * NX + RG])
-
-            model["UG"]["COMMAND_PG"][i] = int(x[i * NX + PUG])
-            model["UG"]["COMMAND_RG"][i] = int(x[i * NX + RUG])
-
-            model["BIC"]["COMMAND_AC2DC"][i] = int(x[i * NX + PBIC_AC2DC])
-            model["BIC"]["COMMAND_DC2AC"][i] = int(x[i * NX + PBIC_DC2AC])
-
-            model["ESS"]["COMMAND_PG"][i] = int(x[i * NX + PESS_DC] - x[i * NX + PESS_C])
-            model["ESS"]["COMMAND_RG"][i] = int(x[i * NX + RESS])
-            model["ESS"]["SOC"][i] = x[i*NX+EESS]/model["ESS"]["CAP"]
-            model["PMG"][i] = int(x[i * NX + PMG])
-
+        model["DG"]["COMMAND_START_UP"] = model["DG"]["GEN_STATUS"]  # The staus of generators will be not modified
+        model["UG"]["COMMAND_START_UP"] = model["UG"]["GEN_STATUS"]  # The staus of generators will be not modified
         model["success"] = True
-
     else:
-        if model["COMMAND_TYPE"] is 0:
-            from modelling.power_flow.idx_ed_recovery_format import PG, RG, PUG, RUG, PBIC_AC2DC, PBIC_DC2AC, PESS_C,EESS, \
-                PESS_DC, RESS, PMG, PPV, PWP, PL_AC, PL_UAC, PL_DC, PL_UDC, NX
-        else:
-            from modelling.power_flow.idx_ed_set_points_tracing_recovery import PG, RG, PUG, RUG, PBIC_AC2DC, PBIC_DC2AC, PESS_C, \
-                EESS, PESS_DC, RESS, PMG, PPV, PWP, PL_AC, PL_UAC, PL_DC, PL_UDC, NX
-
-        model["DG"]["COMMAND_PG"] = [0] * T
-        model["DG"]["COMMAND_RG"] = [0] * T
-        model["UG"]["COMMAND_PG"] = [0] * T
-        model["UG"]["COMMAND_RG"] = [0] * T
-        model["BIC"]["COMMAND_AC2DC"] = [0] * T
-        model["BIC"]["COMMAND_DC2AC"] = [0] * T
-        model["ESS"]["COMMAND_PG"] = [0] * T
-        model["ESS"]["COMMAND_RG"] = [0] * T
-        model["ESS"]["SOC"] = [0] * T
-
-        model["PV"]["COMMAND_CURT"] = [0] * T
-        model["WP"]["COMMAND_CURT"] = [0] * T
-        model["PMG"] = [0] * T
-
-        model["Load_ac"]["COMMAND_SHED"] = [0] * T
-        model["Load_uac"]["COMMAND_SHED"] = [0] * T
-        model["Load_dc"]["COMMAND_SHED"] = [0] * T
-        model["Load_udc"]["COMMAND_SHED"] = [0] * T
-
-        for i in range(T):
-            model["DG"]["COMMAND_PG"][i] = int(x[i * NX + PG])
-            model["DG"]["COMMAND_RG"][i] = int(x[i * NX + RG])
-
-            model["UG"]["COMMAND_PG"][i] = int(x[i * NX + PUG])
-            model["UG"]["COMMAND_RG"][i] = int(x[i * NX + RUG])
-
-            model["BIC"]["COMMAND_AC2DC"][i] = int(x[i * NX + PBIC_AC2DC])
-            model["BIC"]["COMMAND_DC2AC"][i] = int(x[i * NX + PBIC_DC2AC])
-
-            model["ESS"]["COMMAND_PG"][i] = int(x[i * NX + PESS_DC] - x[i * NX + PESS_C])
-            model["ESS"]["COMMAND_RG"][i] = int(x[i * NX + RESS])
-            model["ESS"]["SOC"][i] = x[i * NX + EESS]/model["ESS"]["CAP"]
-
-            model["PMG"][i] = int(x[i * NX + PMG])
-
-            model["PV"]["COMMAND_CURT"][i] = int(min(model["PV"]["PG"], x[i * NX + PPV]))
-            model["WP"]["COMMAND_CURT"][i] = int(min(model["WP"]["PG"], x[i * NX + PWP]))
-
-            model["Load_ac"]["COMMAND_SHED"][i] = int(min(model["Load_ac"]["PD"], x[i * NX + PL_AC]))
-            model["Load_uac"]["COMMAND_SHED"][i] = int(min(model["Load_uac"]["PD"], x[i * NX + PL_UAC]))
-            model["Load_dc"]["COMMAND_SHED"][i] = int(min(model["Load_dc"]["PD"], x[i * NX + PL_DC]))
-            model["Load_udc"]["COMMAND_SHED"][i] = int(min(model["Load_udc"]["PD"], x[i * NX + PL_UDC]))
-
         model["success"] = False
 
     return model
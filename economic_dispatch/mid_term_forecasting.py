@@ -10,14 +10,13 @@ In this version, the Tensorflow based time series forecasting is used
 # from forecasting.mid_term_forecasting import middle_term_forecasting_pv, middle_term_forecasting_wp, \
 #     middle_term_forecasting_load_ac, middle_term_forecasting_load_dc, middle_term_forecasting_load_uac, \
 #     middle_term_forecasting_load_udc
-from forecasting.mid_term_forecasting import middle_term_forecasting_pv_history, middle_term_forecasting_wp_history, \
-    middle_term_forecasting_load_ac_history, middle_term_forecasting_load_dc_history, middle_term_forecasting_load_uac_history, \
-    middle_term_forecasting_load_udc_history
+from forecasting.mid_term_forecasting import middle_term_forecasting_history
 from configuration.configuration_time_line import default_look_ahead_time_step
 
 import threading
 from utils import Logger
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
+from data_management.database_engine import session_task
 logger = Logger("Mid_term_forecasting")
 
 
@@ -29,6 +28,7 @@ class ForecastingThread(threading.Thread):
         self.Target_time = Target_time
         self.models = models
 
+    @session_task  # The sessions of the forecasting thread are removed at the end
     def run(self):
         self.models = mid_term_forecasting(self.session, self.Target_time, self.models)
 
@@ -36,7 +36,7 @@ class ForecastingThread(threading.Thread):
 def mid_term_forecasting(*args):
     session = args[0]
     Target_time = args[1]
-    models = deepcopy(args[2])
+    models = snapshot(args[2])
 
     T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]
 
@@ -53,12 +53,11 @@ def mid_term_forecasting(*args):
     # load_uac = middle_term_forecasting_load_uac(session, Target_time)
     # load_dc = middle_term_forecasting_load_dc(session, Target_time)
     # load_udc = middle_term_forecasting_load_udc(session, Target_time)
-    pv_profile = middle_term_forecasting_pv_history(session, Target_time)
-    wp_profile = middle_term_forecasting_wp_history(session, Target_time)
-    load_ac = middle_term_forecasting_load_ac_history(session, Target_time)
-    load_uac = middle_term_forecasting_load_uac_history(session, Target_time)
-    load_dc = middle_term_forecasting_load_dc_history(session, Target_time)
-    load_udc = middle_term_forecasting_load_udc_history(session, Target_time)
+    # All the series of the look ahead horizon are forecasted together
+    profiles = middle_term_forecasting_history(session, Target_time)
+    (pv_profile, wp_profile) = (profiles["PV_PG"], profiles["WP_PG"])
+    (load_ac, load_uac) = (profiles["AC_PD"], profiles["UAC_PD"])
+    (load_dc, load_udc) = (profiles["DC_PD"], profiles["UDC_PD"])
 
     for i in range(T):
         # Update the forecasting result of PV
@@ -1,16 +1,40 @@
 # The main entrance of the optimal power flow in unviersal energy management system
-import threading  # Thread management (timeout and return value)
-from solvers.mix_integer_solvers import miqp_gurobi,milp_gurobi,milp_mosek  # linear programming solver
+import time
+from solvers.solver_registry import solver_selection  # linear programming solver
+from solvers.parametric_models import parametric_solving, parametric_models_initialization
+from solvers.warm_start import WarmStart
+from solvers.solver_executor import SolverExecutor, Deadline_Task
+from configuration.configuration_solvers import default_solver
+from configuration.configuration_time_line import default_time, default_look_ahead_time_step, default_dead_line_time
+from modelling.power_flow.layout import variable_layout
 
-class Solving_Thread(threading.Thread):
-    # Thread operation with time control and return value
-    def __init__(self, parameter):
-        threading.Thread.__init__(self)
+parametric_models = {}  # The parametric models of each mode, e.g., ("Idle", "Feasible")
+executor = SolverExecutor("ED", default_solver["Processes"])  # The worker processes keep their parametric models
+warm_start = WarmStart(default_look_ahead_time_step["Look_ahead_time_ed_time_step"], default_time["Time_step_ed"],
+                       dict(((mode, type), variable_layout("ED", mode, type)) for mode in ["Idle", "Tracing"]
+                            for type in ["Feasible", "Elastic", "Infeasible"]))  # The solutions of previous cycle
+
+class Solving_Thread(Deadline_Task):
+    # Solving task with time control and return value, which runs in the pool of the solving threads
+    # When the process pool is used, the overdue solve is terminated at the gate closure
+    def __init__(self, parameter, mode=None, x0=None, timeout=default_dead_line_time["Gate_closure_ed"]):
+        Deadline_Task.__init__(self, len(parameter["c"]), timeout)
         self.parameter = parameter
-        self.value = 0
+        self.mode = mode  # The mode of the parametric model, None means the model is built from scratch
+        self.x0 = x0  # The start vector of the solver, None means cold start
+        self.cancellable = default_solver["Process_pool"]
 
     def run(self):
-        self.value = solving_procedure(self.parameter)
+        if self.cancellable:
+            self.value = executor.solve(solving_procedure, (self.parameter, self.mode, self.x0), self.nx,
+                                        self.deadline)
+        else:
+            self.value = solving_procedure(self.parameter, self.mode, self.x0)
+
+
+def parametric_startup(*args):
+    # Build the parametric models of the start-up in this process, i.e., the main process or a worker of the executor
+    parametric_models_initialization(parametric_models, args[0], args[1])
 
 
 def solving_procedure(*args):
@@ -23,18 +47,31 @@ def solving_procedure(*args):
     beq = args[0]["beq"]
     lb = args[0]["lb"]
     ub = args[0]["ub"]
-    Q = args[0]["Q"]
+    Q = args[0]["Q"]  # Not used, the linear cost is minimised, which is the objective of ADMM as well
 
 
     # Formulate the variable types.
     vtypes = ["c"]*len(lb)
 
     # (solution,obj,success) = miqp_gurobi(c,Q,Aeq=Aeq, beq=beq,A=A, b=b, xmin=lb,xmax=ub,vtypes=vtypes)
-    (solution, obj, success) = milp_gurobi(c, Aeq=Aeq, beq=beq, A=A, b=b, xmin=lb, xmax=ub, vtypes=vtypes)
+    t0 = time.time()
+    if len(args) > 2 and args[2] is not None:
+        opt = {"x0": args[2]}  # Warm start from the solution of previous cycle
+    else:
+        opt = None
+
+    if len(args) > 1 and args[1] is not None:
+        # Only the right hand sides and boundaries of the parametric model are updated
+        (solution, obj, success) = parametric_solving(parametric_models, args[1], args[0], default_solver["Solver_ed"],
+                                                      opt)
+    else:
+        milp = solver_selection(default_solver["Solver_ed"])
+        (solution, obj, success) = milp(c, Aeq=Aeq, beq=beq, A=A, b=b, xmin=lb, xmax=ub, vtypes=vtypes, opt=opt)
     # (solution, obj, success) = milp_mosek(c, Aeq=Aeq, beq=beq, A=A, b=b, xmin=lb, xmax=ub, vtypes=vtypes)
     #The return value is the
     res = {"x": solution,
            "obj":obj,
-           "success":success>0}
+           "success":success>0,
+           "time": time.time() - t0}
 
     return res
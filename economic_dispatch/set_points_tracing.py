@@ -1,15 +1,16 @@
 # Setting point tracing function for the economic dispatch in the universal energy management
-# 1) query long2middle database
+# 1) read the long2middle schedule from the schedule bus, or query long2middle database
 # 2) update models of DG status, UG status, Battery SOC and line flows
 # 3) if any information is missing, the setting point tracing will not be triggered
 from data_management.database_format import long2middle
+from data_management.schedule_bus import read_schedule
 from configuration.configuration_time_line import default_time,default_look_ahead_time_step
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
 
 def set_points_tracing_ed(*args):
     Target_time = args[0] # Target time is the start time of scheduling in long-term operation
     session = args[1] # Database session
-    model = deepcopy(args[2]) # Solution of the long-term operation
+    model = snapshot(args[2]) # Solution of the long-term operation
 
     delta_T = default_time["Time_step_ed"]
     T = default_look_ahead_time_step["Look_ahead_time_ed_time_step"] #Amount of data should be addedsss
@@ -39,33 +40,29 @@ def set_points_tracing_ed(*args):
     model["Load_dc"]["COMMAND_SHED"] = [0] * T
     model["Load_udc"]["COMMAND_SHED"] = [0] * T
     try:
-        for i in range(T):
-            row = session.query(long2middle).filter(long2middle.TIME_STAMP == Target_time + i * delta_T).first()
-            model["DG"]["GEN_STATUS"][i] = int(row.DG_STATUS)
-            model["DG"]["COMMAND_PG"][i] = row.DG_PG
+        # The schedule is read from the schedule bus, or from the database when it is not published in this ems
+        schedule = read_schedule(session, long2middle, Target_time, T)
+        model["DG"]["GEN_STATUS"] = [int(status) for status in schedule["DG_STATUS"]]
+        model["DG"]["COMMAND_PG"] = schedule["DG_PG"]
 
-            model["UG"]["GEN_STATUS"][i] = int(row.UG_STATUS)
-            model["UG"]["COMMAND_PG"][i] = row.UG_PG
+        model["UG"]["GEN_STATUS"] = [int(status) for status in schedule["UG_STATUS"]]
+        model["UG"]["COMMAND_PG"] = schedule["UG_PG"]
 
-            if row.BIC_PG > 0 :
-                model["BIC"]["COMMAND_AC2DC"][i] = 0
-                model["BIC"]["COMMAND_DC2AC"][i] = row.BIC_PG
-            else:
-                model["BIC"]["COMMAND_AC2DC"][i] = -row.BIC_PG
-                model["BIC"]["COMMAND_DC2AC"][i] = 0
+        model["BIC"]["COMMAND_AC2DC"] = [-p if p <= 0 else 0 for p in schedule["BIC_PG"]]
+        model["BIC"]["COMMAND_DC2AC"] = [p if p > 0 else 0 for p in schedule["BIC_PG"]]
 
-            model["ESS"]["COMMAND_PG"][i] = row.BAT_PG
-            model["ESS"]["COMMAND_SOC"][i] = row.BAT_SOC
+        model["ESS"]["COMMAND_PG"] = schedule["BAT_PG"]
+        model["ESS"]["COMMAND_SOC"] = schedule["BAT_SOC"]
 
-            model["PMG"][i] = row.PMG
+        model["PMG"] = schedule["PMG"]
 
-            model["PV"]["COMMAND_CURT"][i] = row.PV_CURT
-            model["WP"]["COMMAND_CURT"][i] = row.WP_CURT
+        model["PV"]["COMMAND_CURT"] = schedule["PV_CURT"]
+        model["WP"]["COMMAND_CURT"] = schedule["WP_CURT"]
 
-            model["Load_ac"]["COMMAND_SHED"][i] = row.AC_SHED
-            model["Load_uac"]["COMMAND_SHED"][i] = row.UAC_SHED
-            model["Load_dc"]["COMMAND_SHED"][i] = row.DC_SHED
-            model["Load_udc"]["COMMAND_SHED"][i] = row.UDC_SHED
+        model["Load_ac"]["COMMAND_SHED"] = schedule["AC_SHED"]
+        model["Load_uac"]["COMMAND_SHED"] = schedule["UAC_SHED"]
+        model["Load_dc"]["COMMAND_SHED"] = schedule["DC_SHED"]
+        model["Load_udc"]["COMMAND_SHED"] = schedule["UDC_SHED"]
 
         model["COMMAND_TYPE"] = 1 # This is the set-point tracing
 
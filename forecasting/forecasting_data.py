@@ -0,0 +1,76 @@
+## Data access of the forecasting
+# The forecasting of each horizon reads the history data of the look ahead horizon and writes the forecasting results
+# of PV, WP and the four loads into its forecasting table. The whole horizon is read by one range query of the history
+# table, and all the series are written by one bulk upsert in one transaction, instead of one query and one commit for
+# each series and each time step. The exported history tables are read from the memory-mapped history store.
+from sqlalchemy import and_
+from configuration.configuration_time_line import default_time
+from data_management.database_recorder import write_records
+from forecasting.history_store import history_store
+
+# (forecasting column, history column) of the series
+forecasting_series = [("PV_PG", "PV_PG"),
+                      ("WP_PG", "WP_PG"),
+                      ("AC_PD", "AC_PD"),
+                      ("UAC_PD", "NAC_PD"),
+                      ("DC_PD", "DC_PD"),
+                      ("UDC_PD", "NDC_PD")]
+
+
+def history_window(session, table, start, T, names):
+    """Read the history data of the look ahead horizon by one range query
+
+        @param table: the history table, e.g., half_hourly_history_data
+        @param start: the time stamp of the first time step in the history table
+        @param T: the look ahead time steps
+        @param names: the columns to be read
+        @return: the columns of the history data, each column is a list of T values
+        """
+    rows = session.query(table.TIME_STAMP, *[getattr(table, name) for name in names]).filter(
+        and_(table.TIME_STAMP >= start, table.TIME_STAMP < start + T)).order_by(table.TIME_STAMP).all()
+    if len(rows) != T:
+        raise LookupError("The history data of {0} from {1} is missing!".format(table.__tablename__, start))
+    return dict((name, [row[k + 1] for row in rows]) for (k, name) in enumerate(names))
+
+
+def write_forecasting(session, table, blank_result, Target_time, delta_T, columns):
+    """Write the forecasting series by one bulk upsert
+
+        @param table: the forecasting table, e.g., db_long_term_forecasting
+        @param blank_result: the function of the blank forecasting result of a time stamp
+        @param columns: the forecasting series, each series is a list of the look ahead time steps
+        """
+    names = [column.name for column in table.__table__.columns]
+    rows = []
+    for i in range(len(list(columns.values())[0])):
+        blank_row = blank_result(Target_time + i * delta_T)
+        row = dict((name, getattr(blank_row, name)) for name in names)
+        row.update((name, columns[name][i]) for name in columns)
+        rows.append(row)
+    if write_records(session, [(table, rows, list(columns))]) is not None:
+        raise RuntimeError("The forecasting result of {} can not be written!".format(table.__tablename__))
+
+
+def forecasting_history(session, session_source, tables, blank_result, Target_time, delta_T, T, series=None):
+    """Forecast the series by the history data
+
+        @param session: the session of the forecasting table
+        @param session_source: the session of the history table
+        @param tables: (history table, forecasting table)
+        @param blank_result: the function of the blank forecasting result of a time stamp
+        @param delta_T: the time step of the horizon (s), which is also the time step of the history table
+        @param series: the forecasting columns, e.g., ["PV_PG"], all the series by default
+        @return: the forecasting series, each series is a list of T values
+        """
+    (history_table, forecasting_table) = tables
+    fields = [(name, history) for (name, history) in forecasting_series if series is None or name in series]
+    start = int((Target_time - default_time["Base_time"]) / delta_T)
+    names = [history for (name, history) in fields]
+    store = history_store(history_table)
+    if store is not None:
+        history = store.window(start, T, names)
+    else:
+        history = history_window(session_source, history_table, start, T, names)
+    columns = dict((name, history[history_name]) for (name, history_name) in fields)
+    write_forecasting(session, forecasting_table, blank_result, Target_time, delta_T, columns)
+    return columns
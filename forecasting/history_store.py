@@ -0,0 +1,119 @@
+## Memory-mapped history store of the forecasting
+# The history tables, i.e., half_hourly_history_data, five_minutes_history_data and one_minute_history_data, are static
+# normalised profiles, whose TIME_STAMP is the offset from Base_time in the time steps of the table. Each table is
+# exported once into a directory of NumPy files, one file per column and the row of an offset is the element of the
+# offset, and TIME_STAMP.npy marks the exported offsets.
+# The files are memory-mapped by the forecasting, hence only the pages of the used windows are loaded, the opening is
+# instant and the windows of the look ahead horizons are answered by slicing, without any database access.
+# Usage: python -m forecasting.history_store, the history tables of local_history_database are exported
+import os
+import threading
+from numpy import full, load, nan
+from numpy.lib.format import open_memmap
+from configuration.configuration_database import history_store as default_store
+from data_management.database_format import half_hourly_history_data, five_minutes_history_data, \
+    one_minute_history_data
+from utils import Logger
+
+logger = Logger("History_store")
+
+history_tables = [half_hourly_history_data, five_minutes_history_data, one_minute_history_data]
+
+stores = {}  # The store of each history table, None means the table is not exported
+stores_lock = threading.Lock()
+
+
+class HistoryStore():
+    def __init__(self, path):
+        self.path = path  # The directory of the table
+        self.columns = {}  # The memory-mapped columns, which are opened at the first use
+        self.lock = threading.Lock()
+
+    def column(self, name):
+        with self.lock:
+            if name not in self.columns:
+                self.columns[name] = load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+            return self.columns[name]
+
+    def window(self, start, T, names):
+        """Read the history data of the look ahead horizon by slicing
+
+            @param start: the offset of the first time step
+            @param T: the look ahead time steps
+            @param names: the columns to be read
+            @return: the columns of the history data, each column is a list of T values
+            """
+        exported = self.column("TIME_STAMP")[max(start, 0):start + T]  # The offsets of the exported rows
+        if start < 0 or len(exported) != T or not exported.all():
+            raise LookupError("The history data of {0} from {1} is missing!".format(os.path.basename(self.path), start))
+        return dict((name, self.column(name)[start:start + T].tolist()) for name in names)
+
+
+def history_store(table, path=None):
+    """Return the store of the history table
+
+        @param table: the history table, e.g., half_hourly_history_data
+        @param path: the directory of the store, history_store["Path"] by default
+        @return: the store, None if the table is not exported
+        """
+    path = os.path.join(default_store["Path"] if path is None else path, table.__tablename__)
+    with stores_lock:
+        if path not in stores:
+            exported = os.path.exists(os.path.join(path, "TIME_STAMP.npy"))
+            stores[path] = HistoryStore(path) if exported else None
+        return stores[path]
+
+
+def export_history(session, table, path=None, chunk_size=100000):
+    """Export the history table into the memory-mapped files
+
+        @param session: the session of the history database
+        @param table: the history table
+        @param path: the directory of the store, history_store["Path"] by default
+        @param chunk_size: the rows of each query
+        @return: the number of the exported rows
+        """
+    path = os.path.join(default_store["Path"] if path is None else path, table.__tablename__)
+    names = [column.name for column in table.__table__.columns if not column.primary_key]
+    last = session.query(table.TIME_STAMP).order_by(table.TIME_STAMP.desc()).first()
+    length = 0 if last is None else last[0] + 1
+    os.makedirs(path, exist_ok=True)
+    # The files are written as temporary files and replaced at the end, the exported store is never half written
+    columns = dict((name, open_memmap(os.path.join(path, name + ".npy.tmp"), mode="w+", dtype=float,
+                                      shape=(length,))) for name in names)
+    for name in names:
+        columns[name][:] = nan
+    time_stamps = full(length, False)
+    rows = 0
+    query = session.query(table.TIME_STAMP, *[getattr(table, name) for name in names]).order_by(table.TIME_STAMP)
+    for start in range(0, length, chunk_size):
+        chunk = query.filter(table.TIME_STAMP >= start, table.TIME_STAMP < start + chunk_size).all()
+        if not chunk:
+            continue
+        offsets = [row[0] for row in chunk]
+        time_stamps[offsets] = True
+        for (k, name) in enumerate(names):
+            columns[name][offsets] = [nan if row[k + 1] is None else row[k + 1] for row in chunk]
+        rows += len(chunk)
+    for name in names:
+        columns[name].flush()
+        del columns[name]
+        os.replace(os.path.join(path, name + ".npy.tmp"), os.path.join(path, name + ".npy"))
+    time_stamp_file = open_memmap(os.path.join(path, "TIME_STAMP.npy.tmp"), mode="w+", dtype=bool, shape=(length,))
+    time_stamp_file[:] = time_stamps
+    time_stamp_file.flush()
+    del time_stamp_file
+    os.replace(os.path.join(path, "TIME_STAMP.npy.tmp"), os.path.join(path, "TIME_STAMP.npy"))
+    with stores_lock:
+        stores.pop(path, None)  # The store is opened again with the new files
+    logger.info("{0} rows of {1} are exported to {2}".format(rows, table.__tablename__, path))
+    return rows
+
+
+if __name__ == "__main__":
+    from configuration.configuration_database import local_history_database
+    from data_management.database_engine import database_session
+
+    session = database_session(local_history_database["db_str"])
+    for table in history_tables:
+        export_history(session, table)
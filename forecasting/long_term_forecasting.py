@@ -5,14 +5,12 @@ from data_management.database_format import db_long_term_forecasting,half_hourly
 from configuration.configuration_time_line import default_look_ahead_time_step, default_time
 import random
 from configuration.configuration_database import local_history_database
-from sqlalchemy import create_engine, and_  # Import database
-from sqlalchemy.orm import sessionmaker
+from forecasting.forecasting_data import forecasting_history
+from data_management.database_engine import database_session
 
 
 db_str = local_history_database["db_str"]
-engine = create_engine(db_str, echo=False)
-Session = sessionmaker(bind=engine)
-session_source = Session()
+session_source = database_session(db_str)  # The history data is queried by the session of each thread
 
 def blank_forecasting_result(*args):
     Target_time = args[0]
@@ -233,39 +231,25 @@ def long_term_forecasting_load_udc(*args):
     return UDC_PD
 
 
-def long_term_forecasting_pv_history(*args):
-    # Short term forecasting for photovoltaic
+def long_term_forecasting_history(*args):
+    # Forecasting of all the series of the unit commitment by the history data
+    # The look ahead horizon is read by one range query and written by one bulk upsert, see forecasting_data
     session = args[0]
     Target_Time = args[1]
+    series = args[2] if len(args) > 2 else None  # The forecasting columns, all the series by default
 
-    if session.query(db_long_term_forecasting).filter(
-                    db_long_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        # The forecasting result dose not exist, a dynamic forecasting will be triggered!
-        for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
+    tables = (half_hourly_history_data, db_long_term_forecasting)  # The history table and the forecasting table
+    return forecasting_history(session, session_source, tables, blank_forecasting_result, Target_Time,
+                               default_time["Time_step_uc"],
+                               default_look_ahead_time_step["Look_ahead_time_uc_time_step"], series)
 
-    PV_PG = []
-    for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-        row_source = session_source.query(half_hourly_history_data).filter_by(TIME_STAMP = int((Target_Time-default_time["Base_time"])/default_time["Time_step_uc"]) + i).first()
-        PV_PG.append(row_source.PV_PG)
-        try:
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.PV_PG = PV_PG[i]
-        except:
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
 
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.PV_PG = PV_PG[i]
-
-        session.commit()
+def long_term_forecasting_pv_history(*args):
+    # Short term forecasting for photovoltaic
+    session = args[0]
+    Target_Time = args[1]
 
-    return PV_PG
+    return long_term_forecasting_history(session, Target_Time, ["PV_PG"])["PV_PG"]
 
 
 def long_term_forecasting_wp_history(*args):
@@ -273,33 +257,7 @@ def long_term_forecasting_wp_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_long_term_forecasting).filter(
-                    db_long_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        # The forecasting result dose not exist, a dynamic forecasting will be triggered!
-        for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-
-    WP_PG = []
-    for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-        row_source = session_source.query(half_hourly_history_data).filter_by(
-            TIME_STAMP=int((Target_Time-default_time["Base_time"])/default_time["Time_step_uc"]) + i).first()
-        WP_PG.append(row_source.WP_PG)
-        try:
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.WP_PG = WP_PG[i]
-        except:
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.WP_PG = WP_PG[i]
-        session.commit()
-
-    return WP_PG
+    return long_term_forecasting_history(session, Target_Time, ["WP_PG"])["WP_PG"]
 
 
 def long_term_forecasting_load_ac_history(*args):
@@ -307,34 +265,7 @@ def long_term_forecasting_load_ac_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_long_term_forecasting).filter(
-                    db_long_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        # The forecasting result dose not exist, a dynamic forecasting will be triggered!
-        for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_ed"])
-            session.add(blank_row)
-            session.commit()
-
-    AC_PD = []
-    for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-        row_source = session_source.query(half_hourly_history_data).filter_by(
-            TIME_STAMP=int((Target_Time-default_time["Base_time"])/default_time["Time_step_uc"]) + i).first()
-        AC_PD.append(row_source.AC_PD)
-        try:
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.AC_PD = AC_PD[i]
-        except:
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_ed"])
-            session.add(blank_row)
-            session.commit()
-
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.AC_PD = AC_PD[i]
-
-        session.commit()
-    return AC_PD
+    return long_term_forecasting_history(session, Target_Time, ["AC_PD"])["AC_PD"]
 
 
 def long_term_forecasting_load_uac_history(*args):
@@ -342,35 +273,7 @@ def long_term_forecasting_load_uac_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_long_term_forecasting).filter(
-                    db_long_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        # The forecasting result dose not exist, a dynamic forecasting will be triggered!
-        for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-
-    UAC_PD = []
-    for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-        row_source = session_source.query(half_hourly_history_data).filter_by(
-            TIME_STAMP=int((Target_Time-default_time["Base_time"])/default_time["Time_step_uc"]) + i).first()
-        UAC_PD.append(row_source.NAC_PD)
-        try:
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.UAC_PD = UAC_PD[i]
-        except:
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.UAC_PD = UAC_PD[i]
-
-        session.commit()
-
-    return UAC_PD
+    return long_term_forecasting_history(session, Target_Time, ["UAC_PD"])["UAC_PD"]
 
 
 def long_term_forecasting_load_dc_history(*args):
@@ -378,36 +281,7 @@ def long_term_forecasting_load_dc_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_long_term_forecasting).filter(
-                    db_long_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        # The forecasting result dose not exist, a dynamic forecasting will be triggered!
-        for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-
-    DC_PD = []
-    for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-        row_source = session_source.query(half_hourly_history_data).filter_by(
-            TIME_STAMP=int((Target_Time-default_time["Base_time"])/default_time["Time_step_uc"]) + i).first()
-        DC_PD.append(row_source.DC_PD)
-        try:
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.DC_PD = DC_PD[i]
-        except:
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.DC_PD = DC_PD[i]
-
-        session.commit()
-
-
-    return DC_PD
+    return long_term_forecasting_history(session, Target_Time, ["DC_PD"])["DC_PD"]
 
 
 def long_term_forecasting_load_udc_history(*args):
@@ -415,31 +289,4 @@ def long_term_forecasting_load_udc_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_long_term_forecasting).filter(
-                    db_long_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        # The forecasting result dose not exist, a dynamic forecasting will be triggered!
-        for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-
-    UDC_PD = []
-    for i in range(default_look_ahead_time_step["Look_ahead_time_uc_time_step"]):
-        row_source = session_source.query(half_hourly_history_data).filter_by(
-            TIME_STAMP=int((Target_Time-default_time["Base_time"])/default_time["Time_step_uc"]) + i).first()
-        UDC_PD.append(row_source.NDC_PD)
-        try:
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.UDC_PD = UDC_PD[i]
-        except:
-            blank_row = blank_forecasting_result(Target_Time + i * default_time["Time_step_uc"])
-            session.add(blank_row)
-            session.commit()
-            row = session.query(db_long_term_forecasting).filter_by(
-                TIME_STAMP=Target_Time + i * default_time["Time_step_uc"]).first()
-            row.UDC_PD = UDC_PD[i]
-
-        session.commit()
-
-    return UDC_PD
\ No newline at end of file
+    return long_term_forecasting_history(session, Target_Time, ["UDC_PD"])["UDC_PD"]
@@ -5,16 +5,14 @@
 
 from data_management.database_format import db_short_term_forecasting,one_minute_history_data
 import random
-from configuration.configuration_time_line import default_time
+from configuration.configuration_time_line import default_time, default_look_ahead_time_step
 from configuration.configuration_database import local_history_database
-from sqlalchemy import create_engine, and_  # Import database
-from sqlalchemy.orm import sessionmaker
+from forecasting.forecasting_data import forecasting_history
+from data_management.database_engine import database_session
 
 
 db_str = local_history_database["db_str"]
-engine = create_engine(db_str, echo=False)
-Session = sessionmaker(bind=engine)
-session_source = Session()
+session_source = database_session(db_str)  # The history data is queried by the session of each thread
 
 def blank_forecasting_result(*args):
     Target_time = args[0]
@@ -145,25 +143,25 @@ def short_term_forecasting_load_udc(*args):
 
     return UDC_PD
 
-def short_term_forecasting_pv_history(*args):
-    # Short term forecasting for photovoltaic
+def short_term_forecasting_history(*args):
+    # Forecasting of all the series of the optimal power flow by the history data
+    # The look ahead horizon is read by one range query and written by one bulk upsert, see forecasting_data
     session = args[0]
     Target_Time = args[1]
+    series = args[2] if len(args) > 2 else None  # The forecasting columns, all the series by default
 
-    if session.query(db_short_term_forecasting).filter(
-                    db_short_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        blank_row = blank_forecasting_result(Target_Time)
-        session.add(blank_row)
-        session.commit()
-    row_source = session_source.query(one_minute_history_data).filter_by(
-        TIME_STAMP=int((Target_Time - default_time["Base_time"]) / default_time["Time_step_opf"])).first()
+    tables = (one_minute_history_data, db_short_term_forecasting)  # The history table and the forecasting table
+    return forecasting_history(session, session_source, tables, blank_forecasting_result, Target_Time,
+                               default_time["Time_step_opf"],
+                               default_look_ahead_time_step["Look_ahead_time_opf_time_step"], series)
 
-    PV_PG = row_source.PV_PG
-    row = session.query(db_short_term_forecasting).filter_by(TIME_STAMP=Target_Time).first()
-    row.PV_PG = PV_PG
-    session.commit()
 
-    return PV_PG
+def short_term_forecasting_pv_history(*args):
+    # Short term forecasting for photovoltaic
+    session = args[0]
+    Target_Time = args[1]
+
+    return short_term_forecasting_history(session, Target_Time, ["PV_PG"])["PV_PG"][0]
 
 
 def short_term_forecasting_wp_history(*args):
@@ -171,21 +169,7 @@ def short_term_forecasting_wp_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_short_term_forecasting).filter(
-                    db_short_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        blank_row = blank_forecasting_result(Target_Time)
-        session.add(blank_row)
-        session.commit()
-
-    row_source = session_source.query(one_minute_history_data).filter_by(
-        TIME_STAMP=int((Target_Time - default_time["Base_time"]) / default_time["Time_step_opf"])).first()
-
-    WP_PG = row_source.WP_PG
-    row = session.query(db_short_term_forecasting).filter_by(TIME_STAMP=Target_Time).first()
-    row.WP_PG = WP_PG
-    session.commit()
-
-    return WP_PG
+    return short_term_forecasting_history(session, Target_Time, ["WP_PG"])["WP_PG"][0]
 
 
 def short_term_forecasting_load_ac_history(*args):
@@ -193,21 +177,7 @@ def short_term_forecasting_load_ac_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_short_term_forecasting).filter(
-                    db_short_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        blank_row = blank_forecasting_result(Target_Time)
-        session.add(blank_row)
-        session.commit()
-
-    row_source = session_source.query(one_minute_history_data).filter_by(
-        TIME_STAMP=int((Target_Time - default_time["Base_time"]) / default_time["Time_step_opf"])).first()
-
-    AC_PD = row_source.AC_PD
-    row = session.query(db_short_term_forecasting).filter_by(TIME_STAMP=Target_Time).first()
-    row.AC_PD = AC_PD
-    session.commit()
-
-    return AC_PD
+    return short_term_forecasting_history(session, Target_Time, ["AC_PD"])["AC_PD"][0]
 
 
 def short_term_forecasting_load_uac_history(*args):
@@ -215,21 +185,7 @@ def short_term_forecasting_load_uac_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_short_term_forecasting).filter(
-                    db_short_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        blank_row = blank_forecasting_result(Target_Time)
-        session.add(blank_row)
-        session.commit()
-
-    row_source = session_source.query(one_minute_history_data).filter_by(
-        TIME_STAMP=int((Target_Time - default_time["Base_time"]) / default_time["Time_step_opf"])).first()
-
-    UAC_PD = row_source.NAC_PD
-    row = session.query(db_short_term_forecasting).filter_by(TIME_STAMP=Target_Time).first()
-    row.UAC_PD = UAC_PD
-    session.commit()
-
-    return UAC_PD
+    return short_term_forecasting_history(session, Target_Time, ["UAC_PD"])["UAC_PD"][0]
 
 
 def short_term_forecasting_load_dc_history(*args):
@@ -237,21 +193,7 @@ def short_term_forecasting_load_dc_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_short_term_forecasting).filter(
-                    db_short_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        blank_row = blank_forecasting_result(Target_Time)
-        session.add(blank_row)
-        session.commit()
-
-    row_source = session_source.query(one_minute_history_data).filter_by(
-        TIME_STAMP=int((Target_Time - default_time["Base_time"]) / default_time["Time_step_opf"])).first()
-
-    DC_PD= row_source.DC_PD
-    row = session.query(db_short_term_forecasting).filter_by(TIME_STAMP=Target_Time).first()
-    row.DC_PD = DC_PD
-    session.commit()
-
-    return DC_PD
+    return short_term_forecasting_history(session, Target_Time, ["DC_PD"])["DC_PD"][0]
 
 
 def short_term_forecasting_load_udc_history(*args):
@@ -259,18 +201,4 @@ def short_term_forecasting_load_udc_history(*args):
     session = args[0]
     Target_Time = args[1]
 
-    if session.query(db_short_term_forecasting).filter(
-                    db_short_term_forecasting.TIME_STAMP == Target_Time).count() == 0:
-        blank_row = blank_forecasting_result(Target_Time)
-        session.add(blank_row)
-        session.commit()
-
-    row_source = session_source.query(one_minute_history_data).filter_by(
-        TIME_STAMP=int((Target_Time - default_time["Base_time"]) / default_time["Time_step_opf"])).first()
-
-    UDC_PD = row_source.NDC_PD
-    row = session.query(db_short_term_forecasting).filter_by(TIME_STAMP=Target_Time).first()
-    row.UDC_PD = UDC_PD
-    session.commit()
-
-    return UDC_PD
\ No newline at end of file
+    return short_term_forecasting_history(session, Target_Time, ["UDC_PD"])["UDC_PD"][0]
@@ -5,12 +5,17 @@
 from apscheduler.schedulers.blocking import BlockingScheduler  # Time scheduler
 
 import configuration.configuration_database as db_configuration  # The settings of databases
-from sqlalchemy import create_engine  # Import database
-from sqlalchemy.orm import sessionmaker
+from data_management.database_engine import database_session, session_task, log_pool_status
 import zmq  # The package for information and communication
+import zmq.asyncio
+from configuration.configuration_runtime import default_runtime
+from configuration.configuration_information import default_information
+from runtime.operation_runtime import OperationRuntime
+from runtime.operation_cycles import local_cycle
 
 import modelling.information_exchange_pb2 as opf_model  # The information model of optimal power flow
-import modelling.dynamic_operation_pb2 as economic_dispatch_info  # The information model of economic dispatch
+# The information model of economic dispatch follows the schema of the connection
+from data_management.information_schema import dynamic_information, handshake, handshake_schema
 
 from modelling import generators, loads, energy_storage_systems, convertors
 from data_management.information_management import information_receive_send
@@ -33,74 +38,87 @@ def run():
     static_info = static_information.static_information_generation(local_model_short)
     # Set the database information
     db_str = db_configuration.local_database["db_str"]
-    engine = create_engine(db_str, echo=False)
-    Session = sessionmaker(bind=engine)
-    session_lems_short = Session()
-    session_lems_middle = Session()
-    session_lems_long = Session()
+    # The jobs share the engine and the connection pool, and each job takes its own session by the scoped session
+    session_lems = database_session(db_str)
 
     # Start the information connection
     context = zmq.Context()
     socket = context.socket(zmq.REQ)
     socket.connect("tcp://localhost:5555")
 
-    socket_upload = context.socket(zmq.REQ)
-    socket_upload.connect("tcp://localhost:5556")
-
-    socket_upload_ed = context.socket(zmq.REQ)
-    socket_upload_ed.connect("tcp://localhost:5557")
-
-    socket_upload_uc = context.socket(zmq.REQ)
-    socket_upload_uc.connect("tcp://localhost:5558")
+    if default_runtime["Runtime"] == "asyncio":  # The commands are awaited by the event loop
+        context_upload = zmq.asyncio.Context()
+    else:
+        context_upload = context
+    socket_upload = context_upload.socket(zmq.REQ)
+    socket_upload_ed = context_upload.socket(zmq.REQ)
+    socket_upload_uc = context_upload.socket(zmq.REQ)
+    for (socket_req, port) in [(socket_upload, "5556"), (socket_upload_ed, "5557"), (socket_upload_uc, "5558")]:
+        if default_runtime["Runtime"] == "asyncio":  # The request is sent again after the overdue command
+            socket_req.setsockopt(zmq.REQ_RELAXED, 1)
+            socket_req.setsockopt(zmq.REQ_CORRELATE, 1)
+        socket_req.connect("tcp://localhost:" + port)
 
     socket_download = context.socket(zmq.REP)
     socket_download.connect("tcp://localhost:5559")
 
     while True:
-        socket.send(b"ConnectionRequest")
+        # Request the highest schema of the dynamic information, the universal ems replies the schema of the connection
+        socket.send(handshake(b"ConnectionRequest", default_information["Schema"]))
 
         message = socket.recv()
-        if message == b"Start!":
+        schema = handshake_schema(message, b"Start!")
+        if schema is not None:
             logger.info("The connection between the local EMS and universal EMS establishes!")
+            logger.info("The dynamic information is exchanged by schema {}".format(schema))
             break
         else:
             logger.error("Waiting for the connection between the local EMS and universal EMS!")
 
     information_receive_send.information_send(socket, static_info, 2)
 
-    info_ed = economic_dispatch_info.local_sources()
-    info_uc = economic_dispatch_info.local_sources()  # The information model in the
+    info_ed = dynamic_information(schema)
+    info_uc = dynamic_information(schema)  # The information model in the
     info_opf = opf_model.informaiton_exchange()  # The optimal power flow modelling
+    if default_runtime["Runtime"] == "asyncio":
+        # The cycles are the coroutines of one event loop, which are triggered at the same seconds as the cron jobs
+        runtime = OperationRuntime()
+        logger.info("The short-term process in local ems starts!")
+        runtime.add_job("OPF", local_cycle, ("OPF", local_model_short, socket_upload, info_opf, session_lems), 60, 1)
+        logger.info("The middle-term process in local EMS starts!")
+        runtime.add_job("ED", local_cycle, ("ED", local_model_middle, socket_upload_ed, info_ed, session_lems), 300, 5)
+        logger.info("The long term process in local EMS starts!")
+        runtime.add_job("UC", local_cycle, ("UC", local_model_long, socket_upload_uc, info_uc, session_lems), 1800, 30)
+        runtime.add_job("Pool_status", log_pool_status, (), 1800, 50)  # The metrics of the connection pools
+        runtime.add_job("Runtime_status", runtime.log_status, (), 1800, 55)  # The metrics of the cycles and stages
+        runtime.start()
+        return
+
     # By short-term operation process
     logger.info("The short-term process in local ems starts!")
     sched_lems = BlockingScheduler()  # The schedulor for the optimal power flow
-    sched_lems.add_job(
-        lambda: short_term_operation.short_term_operation_lems(local_model_short, socket_upload, socket_download,
-                                                               info_opf,
-                                                               session_lems_short),
-        'cron', minute='0-59', second='1')  # The operation is triggered minutely
+    sched_lems.add_job(session_task(short_term_operation.short_term_operation_lems), 'cron',
+                       args=(local_model_short, socket_upload, socket_download, info_opf, session_lems),
+                       minute='0-59', second='1')  # The operation is triggered minutely
 
     logger.info("The middle-term process in local EMS starts!")
-    sched_lems.add_job(
-        lambda: middle_term_operation.middle_term_operation_lems(local_model_middle, socket_upload_ed, socket_download,
-                                                                 info_ed,
-                                                                 session_lems_middle),
-        'cron', minute='*/5', second='5')  # The operation is triggered every five minute
+    sched_lems.add_job(session_task(middle_term_operation.middle_term_operation_lems), 'cron',
+                       args=(local_model_middle, socket_upload_ed, socket_download, info_ed, session_lems),
+                       minute='*/5', second='5')  # The operation is triggered every five minute
 
     logger.info("The long term process in local EMS starts!")
-    sched_lems.add_job(
-        lambda: long_term_operation.long_term_operation_lems(local_model_long, socket_upload_uc, socket_download,
-                                                             info_uc,
-                                                             session_lems_long),
-        'cron', minute='*/30', second='30')  # The operation is triggered every half an hour
+    sched_lems.add_job(session_task(long_term_operation.long_term_operation_lems), 'cron',
+                       args=(local_model_long, socket_upload_uc, socket_download, info_uc, session_lems),
+                       minute='*/30', second='30')  # The operation is triggered every half an hour
+    sched_lems.add_job(log_pool_status, 'cron', minute='*/30', second='50')  # The metrics of the connection pools
     sched_lems.start()
     # for i in range(100):
     #     long_term_operation.long_term_operation_lems(local_model_long, socket_upload_uc, socket_download, info_uc,
-    #                                                               session_lems_long)
+    #                                                               session_lems)
     #     middle_term_operation.middle_term_operation_lems(local_model_middle, socket_upload_ed, socket_download, info_ed,
-    #                                                      session_lems_middle)
+    #                                                      session_lems)
     #     short_term_operation.short_term_operation_lems(local_model_short, socket_upload, socket_download, info_opf,
-    #                                            session_lems_short)
+    #                                            session_lems)
 
 
 
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: dynamic_operation_v2.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1a\x64ynamic_operation_v2.proto\"\xa9\x01\n\x10local_sources_v2\x12\x0c\n\x04\x41REA\x18\x01 \x01(\x05\x12\x12\n\nTIME_STAMP\x18\x02 \x01(\x05\x12\x14\n\x0c\x43OMMAND_TYPE\x18\x03 \x01(\x05\x12\x1a\n\x12TIME_STAMP_COMMAND\x18\x04 \x01(\x05\x12\x0e\n\x06LENGTH\x18\x05 \x03(\x05\x12\r\n\x05INT32\x18\x06 \x01(\x0c\x12\x0f\n\x07\x46LOAT32\x18\x07 \x01(\x0c\x12\x11\n\tINT_BYTES\x18\x08 \x01(\x05\x62\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'dynamic_operation_v2_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _LOCAL_SOURCES_V2._serialized_start=31
+  _LOCAL_SOURCES_V2._serialized_end=200
+# @@protoc_insertion_point(module_scope)
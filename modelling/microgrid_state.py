@@ -0,0 +1,116 @@
+## Copy-on-write state of the microgrid models
+# The local and universal ems models are nested tables, i.e., {"DG": {"PMAX": ..., "GEN_STATUS": [...]}, "PMG": ...}.
+# The operating processes take a copy of the models in each step (the operation, the forecasting, the set points
+# tracing, the input checks and the problem formulations), and the deep copy of all the time series dominates the
+# allocation of a cycle.
+# A snapshot of the state only copies the tables of the devices, the time series (lists and arrays) are shared by the
+# snapshots, and a time series is copied when it is accessed for the first time after the snapshot. Hence, the unused
+# time series are never copied, and the modification of a snapshot does not affect the others.
+# The time series are kept in their containers, e.g., the lists required by the information models, and are given as
+# NumPy arrays by array(). The states are pickled by their tables directly.
+from copy import deepcopy
+from numpy import ndarray, asarray
+
+
+class DeviceState():
+    __slots__ = ("fields", "shared")
+
+    def __init__(self, fields, shared=()):
+        self.fields = fields  # The parameters and the time series of the device
+        self.shared = set(shared)  # The time series shared with the other snapshots, which are copied before the use
+
+    def __getitem__(self, name):
+        if name in self.shared:
+            self.fields[name] = copy_value(self.fields[name])
+            self.shared.discard(name)
+        return self.fields[name]
+
+    def __setitem__(self, name, value):
+        self.fields[name] = value
+        self.shared.discard(name)
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, self.fields)
+
+    def keys(self):
+        return self.fields.keys()
+
+    def items(self):
+        return [(name, self[name]) for name in self.fields]
+
+    def values(self):
+        return [self[name] for name in self.fields]
+
+    def get(self, name, default=None):
+        return self[name] if name in self.fields else default
+
+    def array(self, name):
+        # Return the time series as a NumPy array, the shared time series is not copied
+        return asarray(self.fields[name], dtype=float)
+
+    def snapshot(self):
+        # Return the copy-on-write snapshot, both states copy the shared time series before the use
+        self.shared.update(name for name in self.fields if is_container(self.fields[name]))
+        return type(self)(dict(self.fields), self.shared)
+
+    def to_model(self):
+        # Return the model as nested dictionaries
+        return dict((name, value.to_model() if isinstance(value, DeviceState) else deepcopy(value))
+                    for (name, value) in self.fields.items())
+
+
+class MicrogridState(DeviceState):
+    # The state of one area, the devices are the states of the sub-tables
+    __slots__ = ()
+
+    def __setitem__(self, name, value):
+        DeviceState.__setitem__(self, name, device_state(value))
+
+    def snapshot(self):
+        # The devices are snapshotted as well, the area level time series, e.g., PMG, are shared
+        fields = dict((name, value.snapshot() if isinstance(value, DeviceState) else value)
+                      for (name, value) in self.fields.items())
+        self.shared.update(name for name in self.fields if is_container(self.fields[name]))
+        return MicrogridState(fields, self.shared)
+
+    @staticmethod
+    def from_model(model):
+        # Convert a model of nested dictionaries, the time series of the model are copied once
+        return MicrogridState(dict((name, device_state(deepcopy(value))) for (name, value) in model.items()))
+
+
+def is_container(value):
+    return isinstance(value, (list, dict, ndarray))
+
+
+def copy_value(value):
+    # Copy a shared time series, the lists of tables, e.g., the tie-lines, are copied deeply
+    if isinstance(value, ndarray):
+        return value.copy()
+    if isinstance(value, list) and all(isinstance(item, (int, float)) for item in value):
+        return list(value)
+    return deepcopy(value)
+
+
+def device_state(value):
+    return DeviceState(value) if isinstance(value, dict) else value
+
+
+def snapshot(model):
+    """Return the copy-on-write snapshot of the model
+
+        @param model: the microgrid state, or the model of nested dictionaries which is converted to the state
+        @return: the snapshot, whose modification does not affect the input model
+        """
+    if isinstance(model, DeviceState):
+        return model.snapshot()
+    return MicrogridState.from_model(model)
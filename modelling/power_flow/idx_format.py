@@ -1,16 +0,0 @@
-## Local ems optimal power flow computing format
-PG = 0
-QG = 1
-RG = 2
-PUG = 3
-QUG = 4
-RUG = 5
-PBIC_AC2DC = 6
-PBIC_DC2AC = 7
-QBIC = 8
-PESS_C = 9
-PESS_DC = 10
-RESS = 11
-EESS = 12
-PMG = 13
-NX = 14
\ No newline at end of file
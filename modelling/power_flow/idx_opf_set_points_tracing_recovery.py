@@ -1,32 +0,0 @@
-## Local ems optimal power flow computing format
-# Local optimal power set-point tracing recovery
-PG = 0
-QG = 1
-RG = 2
-PUG = 3
-QUG = 4
-RUG = 5
-PBIC_AC2DC = 6
-PBIC_DC2AC = 7
-QBIC = 8
-PESS_C = 9
-PESS_DC = 10
-RESS = 11
-EESS = 12
-PMG = 13
-PPV = 14
-PWP = 15
-PL_AC = 16
-PL_UAC = 17
-PL_DC = 18
-PL_UDC = 19
-PUG_positive = 20
-PUG_negative = 21
-PMG_positive = 22
-PMG_negative = 23
-SOC_positive = 24
-SOC_negative = 25
-
-NX = 26 # Total decision variables in optimal power flow (set point tracing recovery version)
-
-
@@ -1,21 +0,0 @@
-## Local ems unit commitment computing format
-# Diesel generator set
-IG = 0
-PG = 1
-RG = 2
-# Uitlity grid set
-IUG = 3
-PUG = 4
-RUG = 5
-# Bi-directional convertor set
-PBIC_AC2DC = 6
-PBIC_DC2AC = 7
-# Energy storage system set
-PESS_C = 8
-PESS_DC = 9
-RESS = 10
-EESS = 11
-# Neighboring set
-PMG = 12
-# Total number of decision variables
-NX = 13
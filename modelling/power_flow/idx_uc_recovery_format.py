@@ -1,28 +0,0 @@
-## Local ems economic dispatch computing format
-# Diesel generator set
-IG = 0
-PG = 1
-RG = 2
-#Utility grid set
-IUG = 3
-PUG = 4
-RUG = 5
-# Bi-directional convertor set
-PBIC_AC2DC = 6
-PBIC_DC2AC = 7
-# Energy storage system set
-PESS_C = 8
-PESS_DC = 9
-RESS = 10
-EESS = 11
-# Neighboring set
-PMG = 12
-# Emergency shedding/curtailment set
-IPV = 13
-IWP = 14
-IL_AC = 15
-IL_UAC = 16
-IL_DC = 17
-IL_UDC = 18
-# total number of decision variables
-NX = 19
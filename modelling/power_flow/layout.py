@@ -0,0 +1,89 @@
+## Variable layout registry of the operation problems
+# The decision variables of one time step are ordered by the fields below, and each field has one variable, i.e., the
+# device models describe one unit of each device. The offset of a field is used by the problem formulations directly,
+# and its slice selects the column of the field from the (T, NX) view of a solution.
+# The layouts are computed once for each horizon, mode and type, and are shared by the problem formulations, the warm
+# start and the result decoders.
+from numpy import asarray
+
+horizons = ("OPF", "ED", "UC")
+# (field, device, horizons), the field is only formulated in the given horizons, None means the area
+base_fields = [("IG", "DG", ("UC",)),  # Diesel generator set
+               ("PG", "DG", horizons),
+               ("QG", "DG", ("OPF",)),
+               ("RG", "DG", horizons),
+               ("IUG", "UG", ("UC",)),  # Utility grid set
+               ("PUG", "UG", horizons),
+               ("QUG", "UG", ("OPF",)),
+               ("RUG", "UG", horizons),
+               ("PBIC_AC2DC", "BIC", horizons),  # Bi-directional convertor set
+               ("PBIC_DC2AC", "BIC", horizons),
+               ("QBIC", "BIC", ("OPF",)),
+               ("PESS_C", "ESS", horizons),  # Energy storage system set
+               ("PESS_DC", "ESS", horizons),
+               ("RESS", "ESS", horizons),
+               ("EESS", "ESS", horizons),
+               ("PMG", None, horizons)]  # Neighboring set
+# The served power in the recovery problems, i.e., the emergency shedding and curtailment set
+recovery_fields = [("PPV", "PV", ("OPF", "ED")),
+                   ("PWP", "WP", ("OPF", "ED")),
+                   ("PL_AC", "Load_ac", ("OPF", "ED")),
+                   ("PL_UAC", "Load_uac", ("OPF", "ED")),
+                   ("PL_DC", "Load_dc", ("OPF", "ED")),
+                   ("PL_UDC", "Load_udc", ("OPF", "ED")),
+                   ("IPV", "PV", ("UC",)),
+                   ("IWP", "WP", ("UC",)),
+                   ("IL_AC", "Load_ac", ("UC",)),
+                   ("IL_UAC", "Load_uac", ("UC",)),
+                   ("IL_DC", "Load_dc", ("UC",)),
+                   ("IL_UDC", "Load_udc", ("UC",))]
+# The deviations from the set points of the upper layer
+tracing_fields = [("PUG_positive", "UG", ("OPF", "ED")),
+                  ("PUG_negative", "UG", ("OPF", "ED")),
+                  ("PMG_positive", None, ("OPF", "ED")),
+                  ("PMG_negative", None, ("OPF", "ED")),
+                  ("SOC_positive", "ESS", ("OPF", "ED")),
+                  ("SOC_negative", "ESS", ("OPF", "ED"))]
+
+layouts = {}  # The layouts of each horizon, mode and type
+
+
+class VariableLayout():
+    def __init__(self, name, fields):
+        self.name = name  # e.g., ("ED", "Tracing", "Infeasible")
+        self.fields = fields  # The fields ordered as the variables of one time step
+        self.slices = {}  # The slice of each field, which selects its column of the solution
+        for (NX, field) in enumerate(fields):
+            self.slices[field] = slice(NX, NX + 1)
+            setattr(self, field, NX)
+        self.NX = len(fields)  # Total decision variables of one time step
+
+    def index(self, *fields):
+        # Return the offsets of the fields, e.g., (PG, RG, NX) = layout.index("PG", "RG", "NX")
+        return tuple(getattr(self, field) for field in fields)
+
+    def view(self, x, T):
+        # Return the (T, NX) view of the solution of one area
+        return asarray(x, dtype=float)[0:T * self.NX].reshape(T, self.NX)
+
+
+def variable_layout(horizon, mode="Idle", type="Feasible"):
+    """Return the variable layout of the operation problem
+
+        @param horizon: "OPF", "ED" or "UC"
+        @param mode: "Idle" or "Tracing", the set points of the upper layer are tracked in the tracing mode
+        @param type: "Feasible", "Infeasible" or "Elastic", the elastic problem has the layout of the feasible problem
+        @return: the cached layout
+        """
+    if type == "Elastic":
+        type = "Feasible"
+    key = (horizon, mode, type)
+    if key not in layouts:
+        fields = base_fields
+        if type == "Infeasible":
+            fields = fields + recovery_fields
+        if mode == "Tracing":
+            fields = fields + tracing_fields
+        layouts[key] = VariableLayout((horizon, mode, type), [field for (field, device, valid) in fields
+                                                               if horizon in valid])
+    return layouts[key]
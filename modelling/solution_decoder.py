@@ -0,0 +1,94 @@
+## Vectorised decoder of the solutions of the operation problems
+# The solution of one area is formulated as [x(t=0), x(t=1), ..., x(t=T-1)], and each of them has NX variables. The
+# solution is reshaped into a (T, NX) array once, and all the commands are computed by one matrix product with the
+# weights of the fields, i.e., each command is a linear combination of the columns of the solution.
+# The weights of each variable layout are computed once and cached.
+# In the recovery problems, the used renewable energy and the served loads are optimised, hence the curtailment and the
+# shedding are the forecasting minus the solution. When the layout has no such variable, the command is zero.
+from numpy import array, zeros
+from modelling.sparse_formulation import time_series
+
+# (device, command, {index: coefficient}, reference), the reference is added to (or divides) the combination
+solution_fields = [("DG", "COMMAND_START_UP", {"IG": 1}, None),
+                   ("DG", "COMMAND_PG", {"PG": 1}, None),
+                   ("DG", "COMMAND_QG", {"QG": 1}, None),
+                   ("DG", "COMMAND_RG", {"RG": 1}, None),
+                   ("UG", "COMMAND_START_UP", {"IUG": 1}, None),
+                   ("UG", "COMMAND_PG", {"PUG": 1}, None),
+                   ("UG", "COMMAND_QG", {"QUG": 1}, None),
+                   ("UG", "COMMAND_RG", {"RUG": 1}, None),
+                   ("BIC", "COMMAND_AC2DC", {"PBIC_AC2DC": 1}, None),
+                   ("BIC", "COMMAND_DC2AC", {"PBIC_DC2AC": 1}, None),
+                   ("BIC", "COMMAND_Q", {"QBIC": 1}, None),
+                   ("ESS", "COMMAND_PG", {"PESS_DC": 1, "PESS_C": -1}, None),
+                   ("ESS", "COMMAND_RG", {"RESS": 1}, None),
+                   ("ESS", "SOC", {"EESS": 1}, "CAP"),  # The state of charge is not rounded
+                   (None, "PMG", {"PMG": 1}, None),
+                   ("PV", "COMMAND_CURT", {"PPV": -1}, "PG"),
+                   ("WP", "COMMAND_CURT", {"PWP": -1}, "PG"),
+                   ("Load_ac", "COMMAND_SHED", {"PL_AC": -1}, "PD"),
+                   ("Load_uac", "COMMAND_SHED", {"PL_UAC": -1}, "PD"),
+                   ("Load_dc", "COMMAND_SHED", {"PL_DC": -1}, "PD"),
+                   ("Load_udc", "COMMAND_SHED", {"PL_UDC": -1}, "PD"),
+                   ("PV", "COMMAND_CURT", {"IPV": -1}, "PG"),  # The served power of the unit commitment
+                   ("WP", "COMMAND_CURT", {"IWP": -1}, "PG"),
+                   ("Load_ac", "COMMAND_SHED", {"IL_AC": -1}, "PD"),
+                   ("Load_uac", "COMMAND_SHED", {"IL_UAC": -1}, "PD"),
+                   ("Load_dc", "COMMAND_SHED", {"IL_DC": -1}, "PD"),
+                   ("Load_udc", "COMMAND_SHED", {"IL_UDC": -1}, "PD")]
+# The state of charge in the short term operation is the measurement, which is not updated by the solution
+short_term_fields = [field for field in solution_fields if field[1] != "SOC"]
+
+decoders = {}  # The decoders of each variable layout and fields
+
+
+class SolutionDecoder():
+    def __init__(self, layout, fields):
+        self.layout = layout
+        self.commands = []  # (device, command, reference) of each column of the weights
+        self.zeros = []  # (device, command) of the commands which are not decided by the layout
+        weights = []
+        for (device, command, coefficients, reference) in fields:
+            if all(index in layout.slices for index in coefficients):
+                weight = zeros(layout.NX)
+                for index in coefficients:
+                    weight[layout.slices[index]] = coefficients[index]
+                weights.append(weight)
+                self.commands.append((device, command, reference))
+            elif (reference == "PD" or reference == "PG") and (device, command) not in self.zeros:
+                self.zeros.append((device, command))
+        decided = [(device, command) for (device, command, reference) in self.commands]
+        self.zeros = [field for field in self.zeros if field not in decided]
+        self.weights = array(weights).T  # (NX, number of commands)
+
+    def decode(self, x, model, T=None):
+        """Update the commands of the model by the solution
+
+            @param x: the solution of one area
+            @param T: the look ahead time steps, None means the short term operation, whose commands are scalars
+            @return: the updated model
+            """
+        nt = 1 if T is None else T
+        values = self.layout.view(x, nt).dot(self.weights)
+        for k in range(len(self.commands)):
+            (device, command, reference) = self.commands[k]
+            target = model if device is None else model[device]
+            if reference == "CAP":
+                value = (values[:, k] / target["CAP"]).tolist()
+            elif reference is not None:
+                value = (time_series(target[reference], nt) + values[:, k]).astype(int).tolist()
+            else:
+                value = values[:, k].astype(int).tolist()
+            target[command] = value[0] if T is None else value
+        for (device, command) in self.zeros:
+            model[device][command] = 0 if T is None else [0] * T
+
+        return model
+
+
+def solution_decoder(layout, fields=solution_fields):
+    # Return the cached decoder of the variable layout
+    key = (layout, tuple((field[0], field[1]) for field in fields))
+    if key not in decoders:
+        decoders[key] = SolutionDecoder(layout, fields)
+    return decoders[key]
@@ -0,0 +1,195 @@
+## Sparse formulation toolbox for the multi-period operation problems
+# The decision variables of the multi-period problems are formulated as [x(t=0), x(t=1), ..., x(t=T-1)], and each of
+# them has NX variables. Each constraint family applies the same pattern to all the time steps, hence it is generated
+# by the kron product of a (scaled) identity matrix with a selection vector. The inter-temporal coupling, e.g., the
+# recursion of the state of charge, is generated by the shifted diagonal matrix.
+# All the matrices are CSR matrices, so that the memory and the building time grow linearly with T.
+from numpy import array, ones, zeros, tile, concatenate, isscalar, arange
+from scipy.sparse import csr_matrix, kron, diags, identity, vstack, hstack, block_diag
+
+
+def time_series(value, T):
+    # Broadcast a scalar or a list of T values to an array of T time steps
+    return array(value, dtype=float) * ones(T)
+
+
+def selection_vector(index, NX):
+    # The row vector which selects the index-th variable of one time step
+    return csr_matrix(([1.0], ([0], [index])), shape=(1, NX))
+
+
+def constraint_family(T, NX, coefficients, previous_coefficients=None):
+    """Formulate T constraints, the t-th of which is
+        sum(coefficients[k][t] * x[t*NX+k]) + sum(previous_coefficients[k][t] * x[(t-1)*NX+k])
+
+        @param coefficients: {index: coefficient}, the coefficient is a scalar or a list of T values
+        @param previous_coefficients: the coefficients of the variables in the previous time step
+        @return: csr_matrix with the shape of (T, T*NX)
+        """
+    A = csr_matrix((T, T * NX))
+    for index in coefficients:
+        if isscalar(coefficients[index]):
+            A = A + kron(coefficients[index] * identity(T), selection_vector(index, NX))
+        else:
+            A = A + kron(diags(time_series(coefficients[index], T)), selection_vector(index, NX))
+    if previous_coefficients is not None and T > 1:
+        for index in previous_coefficients:
+            # The shifted diagonal couples the t-th constraint with the (t-1)-th time step
+            shift = diags(time_series(previous_coefficients[index], T)[1:], -1, shape=(T, T))
+            A = A + kron(shift, selection_vector(index, NX))
+    return A.tocsr()
+
+
+def stack_constraints(families):
+    # Stack the constraint families
+    return vstack(families, format="csr")
+
+
+def quadratic_matrix(T, NX, coefficients):
+    # The diagonal quadratic matrix, coefficients = {index: coefficient}
+    q = zeros(NX)
+    for index in coefficients:
+        q[index] = coefficients[index]
+    return kron(identity(T), diags(q)).tocsr()
+
+
+def cost_vector(T, NX, coefficients):
+    # The linear cost vector, coefficients = {index: coefficient}
+    c = zeros(NX)
+    for index in coefficients:
+        c[index] = coefficients[index]
+    return tile(c, T)
+
+
+def variable_types(T, NX, types):
+    # The variable types of all the time steps, types = {index: "b"}, the others are continuous
+    vtypes = ["c"] * NX
+    for index in types:
+        vtypes[index] = types[index]
+    return vtypes * T
+
+
+def block_diagonal(matrices):
+    # Combine the matrices of different areas
+    return block_diag(matrices, format="csr")
+
+
+def combine_vectors(vectors):
+    # Combine the vectors of different areas or constraint families
+    return concatenate([array(vector, dtype=float).ravel() for vector in vectors])
+
+
+def combine_variable_types(vtypes):
+    # Combine the variable types of different areas, the order is the same as the block diagonal matrices
+    return [vtype for area_vtypes in vtypes for vtype in area_vtypes]
+
+
+def block_angular_model(models, T, NX, index, incidence, capacity):
+    """Combine the mathematical models of N areas into a block-angular problem
+
+        The line flows F are appended after the decision variables of the areas and are formulated as
+        [F_0(t=0), ..., F_0(t=T-1), F_1(t=0), ...]. The exchanged power of each area (the index-th variable) is
+        coupled with the line flows by
+            x_i[t*NX+index] = sum(incidence[i][l] * F_l(t))
+
+        @param models: the mathematical models of the areas, formulated by the same index format
+        @param index: the index of the exchanged power
+        @param incidence: the area-line incidence matrix, (N, number of lines)
+        @param capacity: the line capacity of each time step, (number of lines, T)
+        @return: the mathematical model of the cluster, whose "N" is the number of areas
+        """
+    N = len(models)
+    nl = incidence.shape[1]
+    nf = nl * T  # The number of line flows
+    # The exchanged power of each area is limited by the lines connected to this area
+    area_capacity = abs(incidence).dot(capacity)
+    for i in range(N):
+        models[i]["lb"][index::NX] = -area_capacity[i]
+        models[i]["ub"][index::NX] = area_capacity[i]
+
+    Aeq_area = block_diagonal([model["Aeq"] for model in models])
+    Aeq_coupling = hstack([kron(identity(N), constraint_family(T, NX, {index: 1})), -kron(incidence, identity(T))],
+                          format="csr")
+    Aeq = stack_constraints([hstack([Aeq_area, csr_matrix((Aeq_area.shape[0], nf))], format="csr"), Aeq_coupling])
+    beq = combine_vectors([model["beq"] for model in models] + [zeros(N * T)])
+
+    Aineq_area = block_diagonal([model["A"] for model in models])
+    Aineq = hstack([Aineq_area, csr_matrix((Aineq_area.shape[0], nf))], format="csr")
+    bineq = combine_vectors([model["b"] for model in models])
+
+    mathematical_model = {"c": combine_vectors([model["c"] for model in models] + [zeros(nf)]),
+                          "Aeq": Aeq,
+                          "beq": beq,
+                          "A": Aineq,
+                          "b": bineq,
+                          "lb": combine_vectors([model["lb"] for model in models] + [-capacity]),
+                          "ub": combine_vectors([model["ub"] for model in models] + [capacity]),
+                          "N": N}
+    if all("Q" in model for model in models):
+        mathematical_model["Q"] = block_diagonal([model["Q"] for model in models] + [csr_matrix((nf, nf))] * (nf > 0))
+    if all("vtypes" in model for model in models):
+        mathematical_model["vtypes"] = combine_variable_types([model["vtypes"] for model in models] + [["c"] * nf])
+
+    return mathematical_model
+
+
+# The slack variables of the elastic problem in each area, (device, command, power balance equation, coefficient)
+# The first T rows of each area are the AC power balance equations, and the following T rows are the DC ones.
+elastic_fields = [("Load_ac", "COMMAND_SHED", 0, 1),
+                  ("Load_uac", "COMMAND_SHED", 0, 1),
+                  ("Load_dc", "COMMAND_SHED", 1, 1),
+                  ("Load_udc", "COMMAND_SHED", 1, 1),
+                  ("PV", "COMMAND_CURT", 1, -1),
+                  ("WP", "COMMAND_CURT", 1, -1)]
+
+
+def elastic_model(model, areas, area_models, T):
+    """Append the penalised slack variables to the power balance equations of each area
+
+        The load shedding and renewable energy curtailment are formulated as the slack variables, which are penalised
+        by the shedding costs of the loads and renewable energy resources, and limited by the forecasting.
+        When the feasible problem has a solution, all the slack variables are zero. The slack variables are appended
+        after the other variables and are ordered as [area, elastic_fields, t].
+
+        @param model: the mathematical model of the cluster, formulated by the feasible problems of the areas
+        @param areas: the information models of the areas
+        @param area_models: the mathematical models of the areas, providing the number of equality constraints
+        @return: the elastic mathematical model
+        """
+    rows = []
+    coefficients = []
+    c = []
+    ub = []
+    offset = 0
+    for i in range(len(areas)):
+        for (device, command, equation, coefficient) in elastic_fields:
+            rows.append(arange(offset + equation * T, offset + (equation + 1) * T))
+            coefficients.append(coefficient * ones(T))
+            if command == "COMMAND_CURT":
+                c.append(time_series(areas[i][device]["COST"], T))
+                ub.append(time_series(areas[i][device]["PG"], T))
+            else:
+                c.append(time_series(areas[i][device]["COST"][0], T))
+                ub.append(time_series(areas[i][device]["PD"], T))
+        offset += area_models[i]["Aeq"].shape[0]
+    ns = len(rows) * T  # The number of slack variables
+    S = csr_matrix((concatenate(coefficients), (concatenate(rows), arange(ns))), shape=(model["Aeq"].shape[0], ns))
+
+    model = dict(model)
+    model["Aeq"] = hstack([model["Aeq"], S], format="csr")
+    model["A"] = hstack([model["A"], csr_matrix((model["A"].shape[0], ns))], format="csr")
+    model["c"] = combine_vectors([model["c"]] + c)
+    model["lb"] = combine_vectors([model["lb"], zeros(ns)])
+    model["ub"] = combine_vectors([model["ub"]] + ub)
+    if "Q" in model:
+        model["Q"] = block_diagonal([model["Q"], csr_matrix((ns, ns))])
+    if "vtypes" in model:
+        model["vtypes"] = combine_variable_types([model["vtypes"], ["c"] * ns])
+
+    return model
+
+
+def elastic_slacks(x, N, T):
+    # The slack variables of N areas in the solution of the elastic problem, (N, len(elastic_fields), T)
+    ns = N * len(elastic_fields) * T
+    return array(x[len(x) - ns:len(x)], dtype=float).reshape(N, len(elastic_fields), T)
@@ -0,0 +1,89 @@
+## Topology of the microgrid cluster
+# Each area, i.e., a local ems or the universal ems, is a bus of the cluster and is formatted by idx_bus. The tie-lines
+# between areas are formatted by idx_branch. The areas are numbered by their positions (1 to N), and the universal ems
+# is the last area.
+# When the universal ems model only has one "LINE", each local ems is connected to the universal ems by the same kind
+# of line, i.e., a star topology. Meshed clusters are given by the list of lines "LINES" in the universal ems model,
+# and the "F_BUS" and "T_BUS" of each line are the area numbers.
+from copy import deepcopy
+from numpy import zeros, array, arange, ones
+from scipy.sparse import csr_matrix
+from modelling.power_flow import idx_bus, idx_branch
+from modelling.sparse_formulation import time_series
+
+
+def cluster_lines(universal_model, N):
+    # The tie-lines of the cluster with N areas
+    if "LINES" in universal_model:
+        return universal_model["LINES"]
+    lines = []
+    for i in range(N - 1):
+        line = deepcopy(universal_model["LINE"])
+        line["F_BUS"] = i + 1
+        line["T_BUS"] = N
+        lines.append(line)
+    return lines
+
+
+def bus_table(N):
+    # The bus table of the cluster, one row for each area
+    bus = zeros((N, idx_bus.MU_VMIN + 1))
+    bus[:, idx_bus.BUS_I] = arange(1, N + 1)
+    bus[:, idx_bus.BUS_TYPE] = idx_bus.PQ
+    bus[N - 1, idx_bus.BUS_TYPE] = idx_bus.REF  # The universal ems
+    bus[:, idx_bus.BUS_AREA] = arange(1, N + 1)
+    return bus
+
+
+def branch_table(lines):
+    # The branch table of the cluster, one row for each tie-line, the time varying status is given by line_status
+    branch = zeros((len(lines), idx_branch.MU_ANGMAX + 1))
+    for i in range(len(lines)):
+        branch[i, idx_branch.F_BUS] = lines[i]["F_BUS"]
+        branch[i, idx_branch.T_BUS] = lines[i]["T_BUS"]
+        branch[i, idx_branch.BR_R] = lines[i]["BR_R"]
+        branch[i, idx_branch.BR_X] = lines[i]["BR_X"]
+        branch[i, idx_branch.BR_B] = lines[i]["BR_B"]
+        branch[i, idx_branch.RATE_A] = lines[i]["RATE_A"]
+        branch[i, idx_branch.RATE_B] = lines[i]["RATE_B"]
+        branch[i, idx_branch.RATE_C] = lines[i]["RATE_C"]
+        branch[i, idx_branch.TAP] = lines[i]["TAP"]
+        branch[i, idx_branch.SHIFT] = lines[i]["SHIFT"]
+        branch[i, idx_branch.BR_STATUS] = 1
+    return branch
+
+
+def line_status(lines, T):
+    # The status of each tie-line in the look ahead horizon, the shape is (number of lines, T)
+    return array([time_series(line["STATUS"], T) for line in lines]).reshape(len(lines), T)
+
+
+def incidence_matrix(bus, branch):
+    # The area-line incidence matrix, 1 for the from area and -1 for the to area
+    area = dict((int(bus[i, idx_bus.BUS_I]), i) for i in range(bus.shape[0]))
+    nl = branch.shape[0]
+    rows = [area[int(f_bus)] for f_bus in branch[:, idx_branch.F_BUS]] + \
+           [area[int(t_bus)] for t_bus in branch[:, idx_branch.T_BUS]]
+    columns = list(range(nl)) * 2
+    data = [1.0] * nl + [-1.0] * nl
+    return csr_matrix((data, (rows, columns)), shape=(bus.shape[0], nl))
+
+
+def cluster_topology(local_models, universal_model, T):
+    """Formulate the topology of the microgrid cluster
+
+        @param local_models: the model of one local ems or a list of them
+        @param universal_model: the model of universal ems, which holds the tie-lines
+        @param T: the look ahead time steps
+        @return: (models, incidence, capacity), models are the areas ordered by the area numbers, incidence is the
+                 area-line incidence matrix and capacity is the line capacity of each time step (number of lines, T)
+        """
+    if not isinstance(local_models, (list, tuple)):
+        local_models = [local_models]
+    models = list(local_models) + [universal_model]
+    lines = cluster_lines(universal_model, len(models))
+    if len(lines) == 0:
+        return models, csr_matrix((len(models), 0)), zeros((0, T))
+    branch = branch_table(lines)
+    capacity = line_status(lines, T) * (branch[:, idx_branch.RATE_A].reshape(-1, 1) * ones((1, T)))
+    return models, incidence_matrix(bus_table(len(models)), branch), capacity
@@ -6,14 +6,17 @@ from data_management.information_collection import Information_Collection_Thread
 from data_management.information_management import information_formulation_extraction
 from data_management.information_management import information_receive_send
 from optimal_power_flow.short_term_forecasting import ForecastingThread
-from configuration.configuration_time_line import default_dead_line_time
 from optimal_power_flow.set_ponits_tracing import set_points_tracing_opf
 
 from utils import Logger
 from configuration.configuration_time_line import default_look_ahead_time_step
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
 from optimal_power_flow.input_check import input_check_short_term
 from optimal_power_flow.output_check import output_local_check
+from modelling.sparse_formulation import elastic_fields, elastic_slacks
+from configuration.configuration_eps import default_eps
+from modelling.solution_decoder import solution_decoder, short_term_fields
+from modelling.power_flow.layout import variable_layout
 
 logger_uems = Logger("Short_term_dispatch_UEMS")
 logger_lems = Logger("Short_term_dispatch_LEMS")
@@ -23,16 +26,13 @@ class short_term_operation():
     # Two modes are proposed for the local ems and
     def short_term_operation_uems(*args):
         from data_management.database_management import database_operation
-        from optimal_power_flow.problem_formulation import problem_formulation
-        from optimal_power_flow.problem_formulation_set_ponits_tracing import problem_formulation_set_points_tracing
-        from optimal_power_flow.problem_solving import Solving_Thread
         # Short term operation
         # General procedure for short-term operation
         # 1)Information collection
         # 1.1)local EMS forecasting
         # 1.2)Information exchange
-        universal_models = deepcopy(args[0])
-        local_models = deepcopy(args[1])
+        universal_models = snapshot(args[0])
+        local_models = snapshot(args[1])
         socket_upload = args[2]
         socket_download = args[3]
         info = args[4]
@@ -57,59 +57,72 @@ class short_term_operation():
         local_models = thread_info_ex.local_models
         universal_models = set_points_tracing_opf(Target_time, session, universal_models)  # There are some bugs in this function
         # Solve the optimal power flow problem
+        (local_models, universal_models) = short_term_operation.operation_solving(local_models, universal_models,
+                                                                                  Target_time)
+
+        # Return command to the local ems
+        dynamic_model = information_formulation_extraction.info_formulation(local_models, Target_time, info)
+        dynamic_model.TIME_STAMP_COMMAND = round(time.time())
+
+        information_send_thread = threading.Thread(target=information_receive_send.information_send,
+                                                   args=(socket_upload, dynamic_model, 2))
+
+        logger_uems.info("The command for UEMS is {}".format(universal_models["PMG"]))
+        information_send_thread.start()
+
+        # The result is recorded by the write-behind recorder after the command is sent
+        database_operation.database_record(session, universal_models, Target_time, "OPF")
+        information_send_thread.join()
+
+    def operation_solving(*args):
+        # Solve the optimal power flow problem of the collected models, and return the commands of the models
+        from optimal_power_flow.problem_formulation import problem_formulation
+        from optimal_power_flow.problem_formulation_set_ponits_tracing import problem_formulation_set_points_tracing
+        from optimal_power_flow.problem_solving import Solving_Thread
+        from configuration.configuration_solvers import default_solver
+        local_models = args[0]
+        universal_models = args[1]
+        Target_time = args[2]
+
         local_models = input_check_short_term.model_local_check(local_models)
         universal_models = input_check_short_term.model_universal_check(universal_models)
 
         # Two threads will be created, one for feasible problem, the other for infeasible problem
+        # When the elastic problem is enabled, only one thread is created
+        types = ["Elastic"] if default_solver["Elastic"] else ["Feasible", "Infeasible"]
         if local_models["COMMAND_TYPE"] == 1 and universal_models["COMMAND_TYPE"] == 1:
             logger_uems.info("OPF is under set-points tracing mode!")
-            mathematical_model = problem_formulation_set_points_tracing.problem_formulation_universal(local_models,universal_models,"Feasible")
-            mathematical_model_recovery = problem_formulation_set_points_tracing.problem_formulation_universal(local_models, universal_models,"Infeasible")
+            mode = "Tracing"
+            formulation = problem_formulation_set_points_tracing
         else:
             logger_uems.info("OPF is under idle mode!")
-            mathematical_model = problem_formulation.problem_formulation_universal(local_models, universal_models,
-                                                                              "Feasible")
-            mathematical_model_recovery = problem_formulation.problem_formulation_universal(local_models, universal_models,
-                                                                                       "Infeasible")
+            mode = "Idle"
+            formulation = problem_formulation
             local_models["COMMAND_TYPE"] = 0
             universal_models["COMMAND_TYPE"] = 0
 
         # Solving procedure
-        res = Solving_Thread(mathematical_model)
-        res_recovery = Solving_Thread(mathematical_model_recovery)
-        res.daemon = True
-        res_recovery.daemon = True
-
-        res.start()
-        res_recovery.start()
-
-        res.join(default_dead_line_time["Gate_closure_opf"])
-        res_recovery.join(default_dead_line_time["Gate_closure_opf"])
-
-        if res.value["success"] is True:
-            (local_models, universal_models) = result_update(res.value, local_models, universal_models, "Feasible")
+        threads = [Solving_Thread(formulation.problem_formulation_universal(local_models, universal_models, type),
+                                  (mode, type)) for type in types]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.wait()  # The overdue solves are reported by the timeout results at the gate closure
+
+        if types[0] == "Elastic":
+            (local_models, universal_models) = result_update(threads[0].value, local_models, universal_models,
+                                                             "Elastic", threads[0].parameter["N"])
+        elif threads[0].value["success"] is True:
+            (local_models, universal_models) = result_update(threads[0].value, local_models, universal_models,
+                                                             "Feasible")
         else:
-            (local_models, universal_models) = result_update(res_recovery.value, local_models, universal_models,
+            (local_models, universal_models) = result_update(threads[1].value, local_models, universal_models,
                                                              "Infeasible")
         # The output check the result
         local_models = output_local_check(local_models)
         universal_models = output_local_check(universal_models)
 
-        # Return command to the local ems
-        dynamic_model = information_formulation_extraction.info_formulation(local_models, Target_time, info)
-        dynamic_model.TIME_STAMP_COMMAND = round(time.time())
-
-        information_send_thread = threading.Thread(target=information_receive_send.information_send,
-                                                   args=(socket_upload, dynamic_model, 2))
-
-        database_operation__uems = threading.Thread(target=database_operation.database_record,
-                                                    args=(session, universal_models, Target_time, "OPF"))
-        logger_uems.info("The command for UEMS is {}".format(universal_models["PMG"]))
-        information_send_thread.start()
-        database_operation__uems.start()
-
-        information_send_thread.join()
-        database_operation__uems.join()
+        return local_models, universal_models
 
     def short_term_operation_lems(*args):
         from data_management.database_management import database_operation
@@ -119,7 +132,7 @@ class short_term_operation():
         # 2) Short-term forecasting
         # 3) Information upload and database store
         # 4) Download command and database operation
-        local_models = deepcopy(args[0])  # Local energy management system models
+        local_models = snapshot(args[0])  # Local energy management system models
         socket_upload = args[1]  # Upload information channel
         socket_download = args[2]  # Download information channel
         info = args[3]  # Information structure
@@ -160,6 +173,32 @@ class short_term_operation():
 
         database_operation.database_record(session, local_models, Target_time, "OPF")
 
+    def parametric_model_initialization(*args):
+        # Build the parametric models of each mode at the start-up.
+        # In the short term operation, only the right hand sides and boundaries of these models are updated.
+        from optimal_power_flow.problem_formulation import problem_formulation
+        from optimal_power_flow.problem_formulation_set_ponits_tracing import problem_formulation_set_points_tracing
+        from optimal_power_flow.problem_solving import executor, parametric_startup
+        from configuration.configuration_solvers import default_solver
+        universal_models = input_check_short_term.model_universal_check(args[0])
+        local_models = input_check_short_term.model_local_check(args[1])
+
+        formulation = {"Idle": problem_formulation, "Tracing": problem_formulation_set_points_tracing}
+        types = ["Elastic"] if default_solver["Elastic"] else ["Feasible", "Infeasible"]
+        models = {}
+        for mode in formulation:
+            for type in types:
+                try:
+                    models[(mode, type)] = formulation[mode].problem_formulation_universal(local_models,
+                                                                                           universal_models, type)
+                except:
+                    logger_uems.warning("The parametric model ({0}, {1}) will be built in the first cycle!".format(
+                        mode, type))
+        if default_solver["Process_pool"]:  # The problems are solved, and the models are kept, by the worker processes
+            executor.initialization(parametric_startup, (models, default_solver["Solver_opf"]))
+        else:
+            parametric_startup(models, default_solver["Solver_opf"])
+
 
 def result_update(*args):
     ## Result update for local ems and universal ems models
@@ -168,95 +207,47 @@ def result_update(*args):
     universal_model = args[2]
     type = args[3]
 
-    if type == "Feasible":
-        if local_model["COMMAND_TYPE"] is 0:
-            from modelling.power_flow.idx_format import NX
-        else:
-            from modelling.power_flow.idx_opf_set_points_tracing import NX
-    else:
-        if local_model["COMMAND_TYPE"] is 0:
-            from modelling.power_flow.idx_format_recovery import NX
-        else:
-            from modelling.power_flow.idx_opf_set_points_tracing_recovery import NX
-
+    NX = solution_format(local_model, type).NX
     x_local = res["x"][0:NX]
     x_universal = res["x"][NX:2 * NX]
 
-    local_model = update(x_local, local_model, type)
-    universal_model = update(x_universal, universal_model, type)
+    if type == "Elastic" and res["success"] is not True:
+        # The elastic problem is not solved, e.g., it is overdue at the gate closure, the former commands are kept
+        logger_uems.warning("The elastic OPF problem fails: {}".format(res.get("status")))
+        local_model["success"] = False
+        universal_model["success"] = False
+    elif type == "Elastic":
+        # The elastic problem is decoded as the feasible problem, and the shedding commands are the slack variables
+        local_model = update(x_local, local_model, "Feasible")
+        universal_model = update(x_universal, universal_model, "Feasible")
+        slacks = elastic_slacks(res["x"], args[4], 1)  # args[4] is the number of areas
+        for (model, slack) in [(local_model, slacks[0]), (universal_model, slacks[-1])]:
+            for i in range(len(elastic_fields)):
+                (device, command) = elastic_fields[i][0:2]
+                model[device][command] = int(slack[i][0])
+            model["success"] = bool(slack.max() < default_eps["OPF"])  # No load is shed and no RES is curtailed
+    else:
+        local_model = update(x_local, local_model, type)
+        universal_model = update(x_universal, universal_model, type)
 
     return local_model, universal_model
 
 
+def solution_format(model, type):
+    # The variable layout of the solution, the elastic problem is decoded as the feasible problem
+    if model["COMMAND_TYPE"] == 0:
+        return variable_layout("OPF", "Idle", type)
+    else:
+        return variable_layout("OPF", "Tracing", type)
+
+
 def update(*args):
     x = args[0]
     model = args[1]
     model_type = args[2]
-
-    if model_type == "Feasible":
-        if model["COMMAND_TYPE"] == 0:
-            from modelling.power_flow.idx_format import PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, QBIC, PESS_C, \
-                PESS_DC, RESS, PMG
-        else:
-            from modelling.power_flow.idx_opf_set_points_tracing import PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, QBIC, PESS_C, \
-                PESS_DC, RESS, PMG
-
-        model["DG"]["COMMAND_PG"] = int(x[PG])
-        model["DG"]["COMMAND_QG"] = int(x[QG])
-        model["DG"]["COMMAND_RG"] = int(x[RG])
-
-        model["UG"]["COMMAND_PG"] = int(x[PUG])
-        model["UG"]["COMMAND_QG"] = int(x[QUG])
-        model["UG"]["COMMAND_RG"] = int(x[RUG])
-
-        model["BIC"]["COMMAND_AC2DC"] = int(x[PBIC_AC2DC])
-        model["BIC"]["COMMAND_DC2AC"] = int(x[PBIC_DC2AC])
-
-        model["BIC"]["COMMAND_Q"] = int(x[QBIC])
-
-        model["ESS"]["COMMAND_PG"] = int(x[PESS_DC]) - int(x[PESS_C])
-        model["ESS"]["COMMAND_RG"] = int(x[RESS])
-
-        model["PMG"] = int(x[PMG])
-        model["success"] = True # The obtained solution is feasible
-
-    else:
-        if model["COMMAND_TYPE"] == 0:
-            from modelling.power_flow.idx_format_recovery import PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, QBIC, \
-                PESS_C, PESS_DC, RESS, PMG, PPV, PWP, PL_AC, PL_UAC, PL_DC, PL_UDC
-        else:
-            from modelling.power_flow.idx_opf_set_points_tracing_recovery import PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, \
-                QBIC,PESS_C, PESS_DC, RESS, PMG, PPV, PWP, PL_AC, PL_UAC, PL_DC, PL_UDC
-        model["DG"]["COMMAND_PG"] = int(x[PG])
-        model["DG"]["COMMAND_QG"] = int(x[QG])
-        model["DG"]["COMMAND_RG"] = int(x[RG])
-
-        model["UG"]["COMMAND_PG"] = int(x[PUG])
-        model["UG"]["COMMAND_QG"] = int(x[QUG])
-        model["UG"]["COMMAND_RG"] = int(x[RUG])
-
-        model["BIC"]["COMMAND_AC2DC"] = int(x[PBIC_AC2DC])
-        model["BIC"]["COMMAND_DC2AC"] = int(x[PBIC_DC2AC])
-        model["BIC"]["COMMAND_Q"] = int(x[QBIC])
-
-        model["ESS"]["COMMAND_PG"] = int(x[PESS_DC]) - int(x[PESS_C])
-        model["ESS"]["COMMAND_RG"] = int(x[RESS])
-
-        model["PMG"] = int(x[PMG])
-
-        model["PV"]["COMMAND_CURT"] = int(model["PV"]["PG"]- x[PPV])
-        # logger_uems.info("PV power curtailment amout {}".format(model["PV"]["PG"] - x[PPV]))
-        model["WP"]["COMMAND_CURT"] = int(model["WP"]["PG"] - x[PWP])
-        # logger_uems.info("Wind power curtailment amout {}".format(model["WP"]["PG"] - x[PWP]))
-        model["Load_ac"]["COMMAND_SHED"] = int(model["Load_ac"]["PD"] - x[PL_AC])
-        # logger_uems.info("Critical AC load shedding amout {}".format(model["Load_ac"]["PD"] - x[PL_AC]))
-        model["Load_uac"]["COMMAND_SHED"] = int(model["Load_uac"]["PD"] - x[PL_UAC])
-        # logger_uems.info("Non-critical AC load shedding amout {}".format(model["Load_uac"]["PD"] - x[PL_UAC]))
-        model["Load_dc"]["COMMAND_SHED"] = int(model["Load_dc"]["PD"] - x[PL_DC])
-        # logger_uems.info("Critical DC load shedding amout {}".format(model["Load_dc"]["PD"] - x[PL_DC]))
-        model["Load_udc"]["COMMAND_SHED"] = int(model["Load_udc"]["PD"] - x[PL_UDC])
-        # logger_uems.info("Non-critical DC load shedding amout {}".format(model["Load_udc"]["PD"] - x[PL_UDC]))
-
-        model["success"] = False # The obtained solution is recovered
+    # The commands are scalars, and the SOC is the measurement which is not updated by the solution
+    # The curtailment and shedding of the recovery problem are the forecasting minus the served power
+    model = solution_decoder(solution_format(model, model_type), short_term_fields).decode(x, model)
+    model["success"] = model_type == "Feasible"  # The obtained solution is feasible, otherwise it is recovered
 
     return model
@@ -6,16 +6,20 @@
 # The modelling in UEMS has been extended according to similar methods.
 # When linear models are used, piece-wise linear cost function is used to optimize multiple load curves.
 
-from numpy import array, vstack, zeros
-import numpy
+from numpy import vstack, zeros
+from modelling.sparse_formulation import block_angular_model, elastic_model
+from modelling.topology import cluster_topology
+from modelling.power_flow.layout import variable_layout
 # The data structure is imported from numpy.
 
 class problem_formulation():
     ## Reformulte the information model to system level
     def problem_formulation_local(*args):
         from configuration import configuration_time_line
-        from modelling.power_flow.idx_format import PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, QBIC, PESS_C, \
-            PESS_DC, RESS, EESS, PMG, NX
+        (PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, QBIC, PESS_C, PESS_DC, RESS, EESS, PMG, NX) = \
+            variable_layout("OPF", "Idle", "Feasible").index(
+                "PG", "QG", "RG", "PUG", "QUG", "RUG", "PBIC_AC2DC", "PBIC_DC2AC", "QBIC", "PESS_C", "PESS_DC", "RESS",
+                "EESS", "PMG", "NX")
         model = args[0]  # If multiple models are inputed, more local ems models will be formulated
         ## The feasible optimal problem formulation
         lb = zeros(NX)
@@ -172,9 +176,11 @@ class problem_formulation():
 
     def problem_formulation_local_recovery(*args):
         from configuration import configuration_time_line
-        from modelling.power_flow.idx_format_recovery import PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, QBIC, \
-            PESS_C, \
-            PESS_DC, RESS, EESS, PMG, PPV, PWP, PL_AC, PL_UAC, PL_DC, PL_UDC, NX
+        (PG, QG, RG, PUG, QUG, RUG, PBIC_AC2DC, PBIC_DC2AC, QBIC, PESS_C, PESS_DC, RESS, EESS, PMG, PPV, PWP, PL_AC,
+         PL_UAC, PL_DC, PL_UDC, NX) = \
+            variable_layout("OPF", "Idle", "Infeasible").index(
+                "PG", "QG", "RG", "PUG", "QUG", "RUG", "PBIC_AC2DC", "PBIC_DC2AC", "QBIC", "PESS_C", "PESS_DC", "RESS",
+                "EESS", "PMG", "PPV", "PWP", "PL_AC", "PL_UAC", "PL_DC", "PL_UDC", "NX")
 
         model = args[0]  # If multiple models are inputed, more local ems models will be formulated
         ## The infeasible optimal problem formulation
@@ -359,61 +365,26 @@ class problem_formulation():
 
     def problem_formulation_universal(*args):
         # Formulate mathematical models for different operations
-        local_model = args[0]
-        universal_model = args[1]
+        # args = (local_models, universal_model, type), local_models is the model of one local ems or a list of them.
+        # type is "Feasible", "Infeasible" or "Elastic", the elastic problem relaxes the power balance equations by
+        # the penalised load shedding and renewable energy curtailment, see modelling.sparse_formulation.
+        # The areas are coupled by the tie-lines of the cluster, see modelling.topology.
         type = args[len(args) - 1]  # The last one is the type
+        from configuration import configuration_time_line
+        T = configuration_time_line.default_look_ahead_time_step["Look_ahead_time_opf_time_step"]
+        (models, incidence, capacity) = cluster_topology(args[0], args[1], T)
 
         ## Formulating the universal energy models
-        if type == "Feasible":
-            from modelling.power_flow.idx_format import PMG, NX
-            local_model_mathematical = problem_formulation.problem_formulation_local(local_model)
-            universal_model_mathematical = problem_formulation.problem_formulation_local(universal_model)
+        if type == "Feasible" or type == "Elastic":
+            (PMG, NX) = variable_layout("OPF", "Idle", "Feasible").index("PMG", "NX")
+            mathematical_models = [problem_formulation.problem_formulation_local(model) for model in models]
         else:
-            from modelling.power_flow.idx_format_recovery import PMG, NX
-            local_model_mathematical = problem_formulation.problem_formulation_local_recovery(local_model)
-            universal_model_mathematical = problem_formulation.problem_formulation_local_recovery(universal_model)
-        # Modify the boundary information
-        local_model_mathematical["lb"][PMG] = -universal_model["LINE"]["STATUS"] * universal_model["LINE"]["RATE_A"]
-        local_model_mathematical["ub"][PMG] = universal_model["LINE"]["STATUS"] * universal_model["LINE"]["RATE_A"]
-        universal_model_mathematical["lb"][PMG] = -universal_model["LINE"]["STATUS"] * universal_model["LINE"]["RATE_A"]
-        universal_model_mathematical["ub"][PMG] = universal_model["LINE"]["STATUS"] * universal_model["LINE"]["RATE_A"]
+            (PMG, NX) = variable_layout("OPF", "Idle", "Infeasible").index("PMG", "NX")
+            mathematical_models = [problem_formulation.problem_formulation_local_recovery(model) for model in models]
+
         ## Modify the matrix
-        neq = local_model_mathematical["Aeq"].shape[0]  # Number of equality constraint
-        nineq = local_model_mathematical["A"].shape[0]  # Number of inequality constraint
-        Aeq_compact = zeros((2 * neq, 2 * NX))
-        beq_compact = zeros(2 * neq)
-        Aineq_compact = zeros((2 * nineq, 2 * NX))
-        bineq_compact = zeros(2 * nineq)
-        c_compact = zeros(2 * NX)
-
-        Aeq_compact[0:neq, 0:NX] = local_model_mathematical["Aeq"]
-        Aeq_compact[neq:2 * neq, NX:2 * NX] = universal_model_mathematical["Aeq"]
-        beq_compact[0: neq] = local_model_mathematical["beq"]
-        beq_compact[neq: 2 * neq] = universal_model_mathematical["beq"]
-
-        Aineq_compact[0:nineq, 0:NX] = local_model_mathematical["A"]
-        Aineq_compact[nineq:2 * nineq, NX:2 * NX] = universal_model_mathematical["A"]
-        bineq_compact[0:nineq] = local_model_mathematical["b"]
-        bineq_compact[nineq:2 * nineq] = universal_model_mathematical["b"]
-
-        c_compact[0:NX] = local_model_mathematical["c"]
-        c_compact[NX:2 * NX] = universal_model_mathematical["c"]
-        c_compact = array(c_compact)
-
-        lb = numpy.append(local_model_mathematical["lb"], universal_model_mathematical["lb"])
-        ub = numpy.append(local_model_mathematical["ub"], universal_model_mathematical["ub"])
-
-        Aeq_compact_temp = zeros(2 * NX)
-        Aeq_compact_temp[PMG] = 1
-        Aeq_compact_temp[NX + PMG] = 1
-        Aeq_compact = vstack([Aeq_compact, Aeq_compact_temp])
-        beq_compact = numpy.append(beq_compact, zeros(1))
-
-        model = {"c": c_compact,
-                 "Aeq": Aeq_compact,
-                 "beq": beq_compact,
-                 "A": Aineq_compact,
-                 "b": bineq_compact,
-                 "lb": lb,
-                 "ub": ub}
+        # The combination of areas, the boundaries of the exchanged power are updated by the line capacity
+        model = block_angular_model(mathematical_models, T, NX, PMG, incidence, capacity)
+        if type == "Elastic":
+            model = elastic_model(model, models, mathematical_models, T)
         return model
@@ -1,17 +1,33 @@
 # The main entrance of the optimal power flow in unviersal energy management system
-import threading  # Thread management (timeout and return value)
 from scipy import optimize  # linear programming solver
-from solvers.mix_integer_solvers import milp_gurobi
+from solvers.solver_registry import solver_selection
+from solvers.parametric_models import parametric_solving, parametric_models_initialization
+from solvers.solver_executor import SolverExecutor, Deadline_Task
+from configuration.configuration_solvers import default_solver
+from configuration.configuration_time_line import default_dead_line_time
 
-class Solving_Thread(threading.Thread):
-    # Thread operation with time control and return value
-    def __init__(self, parameter):
-        threading.Thread.__init__(self)
+parametric_models = {}  # The parametric models of each mode, e.g., ("Idle", "Feasible")
+executor = SolverExecutor("OPF", default_solver["Processes"])  # The worker processes keep their parametric models
+
+class Solving_Thread(Deadline_Task):
+    # Solving task with time control and return value, which runs in the pool of the solving threads
+    # When the process pool is used, the overdue solve is terminated at the gate closure
+    def __init__(self, parameter, mode=None, timeout=default_dead_line_time["Gate_closure_opf"]):
+        Deadline_Task.__init__(self, len(parameter["c"]), timeout)
         self.parameter = parameter
-        self.value = 0
+        self.mode = mode  # The mode of the parametric model, None means the model is built from scratch
+        self.cancellable = default_solver["Process_pool"]
 
     def run(self):
-        self.value = solving_procedure(self.parameter)
+        if self.cancellable:
+            self.value = executor.solve(solving_procedure, (self.parameter, self.mode), self.nx, self.deadline)
+        else:
+            self.value = solving_procedure(self.parameter, self.mode)
+
+
+def parametric_startup(*args):
+    # Build the parametric models of the start-up in this process, i.e., the main process or a worker of the executor
+    parametric_models_initialization(parametric_models, args[0], args[1])
 
 
 def solving_procedure(*args):
@@ -31,7 +47,12 @@ def solving_procedure(*args):
     # for i in range(len(lb)):
     #     boundary += ((lb[i], ub[i]),)
     vtypes = ["c"] * len(lb)
-    (solution, obj, success) = milp_gurobi(c, Aeq=Aeq, beq=beq, A=A, b=b, xmin=lb, xmax=ub, vtypes=vtypes)
+    if len(args) > 1 and args[1] is not None:
+        # Only the right hand sides and boundaries of the parametric model are updated
+        (solution, obj, success) = parametric_solving(parametric_models, args[1], args[0], default_solver["Solver_opf"])
+    else:
+        milp = solver_selection(default_solver["Solver_opf"])
+        (solution, obj, success) = milp(c, Aeq=Aeq, beq=beq, A=A, b=b, xmin=lb, xmax=ub, vtypes=vtypes)
     # res = optimize.linprog(c, A_ub=A, b_ub=b, A_eq=Aeq, b_eq=beq, bounds=boundary, options=option)
 
     res = {"x": solution,
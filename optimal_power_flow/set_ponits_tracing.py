@@ -1,17 +1,18 @@
 # Setting point tracing function for the optimal power flow
-# 1) query middle2short database
+# 1) read the middle2short schedule from the schedule bus, or query middle2short database
 # 2) update models of DG status, UG status, Battery SOC and line flows
 # 3) if any information is missing, the setting point tracing will not be triggered
 
 from data_management.database_format import middle2short
+from data_management.schedule_bus import read_schedule
 from configuration.configuration_time_line import default_time,default_look_ahead_time_step
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
 
 # Notes:
 # 1) The SOC of ESS might result in infeasible solution of both
 def set_points_tracing_opf(*args):
     Target_time = args[0] # Target time is the start time of scheduling in long-term operation
-    model = deepcopy(args[2]) # Solution of the long-term operation
+    model = snapshot(args[2]) # Solution of the long-term operation
     session = args[1] # Database session
 
     delta_T = default_time["Time_step_opf"]
@@ -70,63 +71,40 @@ def set_points_tracing_opf(*args):
         model["Load_udc"]["COMMAND_SHED"] = [0] * T
 
     try:
-        if T == 1:
-            row = session.query(middle2short).filter(middle2short.TIME_STAMP == Target_time).first()
-            model["DG"]["GEN_STATUS"] = int(row.DG_STATUS)
-            model["DG"]["COMMAND_PG"] = row.DG_PG
-            model["DG"]["COMMAND_QG"] = row.DG_QG
-
-            model["UG"]["GEN_STATUS"] = int(row.UG_STATUS)
-            model["UG"]["COMMAND_PG"] = row.UG_PG
-            model["UG"]["COMMAND_QG"] = row.UG_QG
-
-            if row.BIC_PG > 0:
-                model["BIC"]["COMMAND_AC2DC"] = 0
-                model["BIC"]["COMMAND_DC2AC"] = row.BIC_PG
-            else:
-                model["BIC"]["COMMAND_AC2DC"] = -row.BIC_PG
-                model["BIC"]["COMMAND_DC2AC"] = 0
-
-            model["ESS"]["COMMAND_PG"] = row.BAT_PG
-
-            model["PMG"] = row.PMG
-
-            model["PV"]["COMMAND_CURT"] = row.PV_CURT
-            model["WP"]["COMMAND_CURT"] = row.WP_CURT
-
-            model["Load_ac"]["COMMAND_SHED"] = row.AC_SHED
-            model["Load_uac"]["COMMAND_SHED"] = row.UAC_SHED
-            model["Load_dc"]["COMMAND_SHED"] = row.DC_SHED
-            model["Load_udc"]["COMMAND_SHED"] = row.UDC_SHED
+        # The schedule is read from the schedule bus, or from the database when it is not published in this ems
+        schedule = read_schedule(session, middle2short, Target_time, T)
+        if T == 1:  # The commands of the short term operation are scalars
+            schedule = dict((name, schedule[name][0]) for name in schedule)
+            bic = schedule["BIC_PG"]
+            (ac2dc, dc2ac) = (-bic if bic <= 0 else 0, bic if bic > 0 else 0)
+            (dg_status, ug_status) = (int(schedule["DG_STATUS"]), int(schedule["UG_STATUS"]))
         else:
-            for i in range(T):
-                row = session.query(middle2short).filter(middle2short.TIME_STAMP == Target_time + i * delta_T).first()
-                model["DG"]["GEN_STATUS"][i] = row.DG_STATUS
-                model["DG"]["COMMAND_PG"][i] = row.DG_PG
-                model["DG"]["COMMAND_QG"][i] = row.DG_QG
-
-                model["UG"]["GEN_STATUS"][i] = row.UG_STATUS
-                model["UG"]["COMMAND_PG"][i] = row.UG_PG
-                model["UG"]["COMMAND_QG"][i] = row.UG_QG
-
-                if row.BIC_PG>0:
-                    model["BIC"]["COMMAND_AC2DC"][i] = 0
-                    model["BIC"]["COMMAND_DC2AC"][i] = row.BIC_PG
-                else:
-                    model["BIC"]["COMMAND_AC2DC"][i] = -row.BIC_PG
-                    model["BIC"]["COMMAND_DC2AC"][i] = 0
-
-                model["ESS"]["COMMAND_PG"][i] = row.BAT_PG
-
-                model["PMG"][i] = row.PMG
-
-                model["PV"]["COMMAND_CURT"][i] = row.PV_CURT
-                model["WP"]["COMMAND_CURT"][i] = row.WP_CURT
-
-                model["Load_ac"]["COMMAND_SHED"][i] = row.AC_SHED
-                model["Load_uac"]["COMMAND_SHED"][i] = row.UAC_SHED
-                model["Load_dc"]["COMMAND_SHED"][i] = row.DC_SHED
-                model["Load_udc"]["COMMAND_SHED"][i] = row.UDC_SHED
+            ac2dc = [-bic if bic <= 0 else 0 for bic in schedule["BIC_PG"]]
+            dc2ac = [bic if bic > 0 else 0 for bic in schedule["BIC_PG"]]
+            (dg_status, ug_status) = (schedule["DG_STATUS"], schedule["UG_STATUS"])
+
+        model["DG"]["GEN_STATUS"] = dg_status
+        model["DG"]["COMMAND_PG"] = schedule["DG_PG"]
+        model["DG"]["COMMAND_QG"] = schedule["DG_QG"]
+
+        model["UG"]["GEN_STATUS"] = ug_status
+        model["UG"]["COMMAND_PG"] = schedule["UG_PG"]
+        model["UG"]["COMMAND_QG"] = schedule["UG_QG"]
+
+        model["BIC"]["COMMAND_AC2DC"] = ac2dc
+        model["BIC"]["COMMAND_DC2AC"] = dc2ac
+
+        model["ESS"]["COMMAND_PG"] = schedule["BAT_PG"]
+
+        model["PMG"] = schedule["PMG"]
+
+        model["PV"]["COMMAND_CURT"] = schedule["PV_CURT"]
+        model["WP"]["COMMAND_CURT"] = schedule["WP_CURT"]
+
+        model["Load_ac"]["COMMAND_SHED"] = schedule["AC_SHED"]
+        model["Load_uac"]["COMMAND_SHED"] = schedule["UAC_SHED"]
+        model["Load_dc"]["COMMAND_SHED"] = schedule["DC_SHED"]
+        model["Load_udc"]["COMMAND_SHED"] = schedule["UDC_SHED"]
 
         model["COMMAND_TYPE"] = 1 # This is the set-point tracing
 
@@ -3,13 +3,12 @@
 #     short_term_forecasting_load_ac, short_term_forecasting_load_dc, short_term_forecasting_load_uac, \
 #     short_term_forecasting_load_udc
 
-from forecasting.short_term_forecasting import short_term_forecasting_pv_history, short_term_forecasting_wp_history, \
-    short_term_forecasting_load_ac_history, short_term_forecasting_load_dc_history, short_term_forecasting_load_uac_history, \
-    short_term_forecasting_load_udc_history
+from forecasting.short_term_forecasting import short_term_forecasting_history
 
 import threading
 from utils import Logger
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
+from data_management.database_engine import session_task
 logger = Logger("Short_term_forecasting")
 class ForecastingThread(threading.Thread):
     # Thread operation with time control and return value
@@ -19,6 +18,7 @@ class ForecastingThread(threading.Thread):
         self.Target_time = Target_time
         self.models = models
 
+    @session_task  # The sessions of the forecasting thread are removed at the end
     def run(self):
         self.models = short_term_forecasting(self.session, self.Target_time, self.models)
 
@@ -26,24 +26,26 @@ class ForecastingThread(threading.Thread):
 def short_term_forecasting(*args):
     session = args[0]
     Target_time = args[1]
-    models = deepcopy(args[2])
+    models = snapshot(args[2])
+    # All the series are forecasted together, the series of the disconnected devices are not used
+    profiles = dict((name, series[0]) for (name, series) in short_term_forecasting_history(session, Target_time).items())
 
     if models["PV"]["GEN_STATUS"] > 0:
-        pv_profile = short_term_forecasting_pv_history(session, Target_time)
+        pv_profile = profiles["PV_PG"]
         models["PV"]["PG"] = round(models["PV"]["PMAX"] * pv_profile)
     else:
         logger.warning("No PV is connected, set to default value 0!")
         models["PV"]["PG"] = 0
 
     if models["WP"]["GEN_STATUS"] > 0:
-        pv_profile = short_term_forecasting_wp_history(session, Target_time)
+        pv_profile = profiles["WP_PG"]
         models["WP"]["PG"] = round(models["WP"]["PMAX"] * pv_profile)
     else:
         logger.warning("No WP is connected, set to default value 0!")
         models["WP"]["PG"] = 0
 
     if models["Load_ac"]["STATUS"] > 0:
-        load_ac = short_term_forecasting_load_ac_history(session, Target_time)
+        load_ac = profiles["AC_PD"]
         models["Load_ac"]["PD"] = round(load_ac * models["Load_ac"]["PDMAX"])
     else:
         logger.warning("No critical AC load is connected, set to default value 0!")
@@ -51,21 +53,21 @@ def short_term_forecasting(*args):
 
     if models["Load_uac"]["STATUS"] > 0:
         if models["Load_uac"]["STATUS"] > 0:
-            load_uac = short_term_forecasting_load_uac_history(session, Target_time)
+            load_uac = profiles["UAC_PD"]
             models["Load_uac"]["PD"] = round(load_uac * models["Load_uac"]["PDMAX"])
         else:
             logger.warning("No non-critical AC load is connected, set to default value 0!")
             models["Load_uac"]["PD"] = 0
 
     if models["Load_dc"]["STATUS"] > 0:
-        load_dc = short_term_forecasting_load_dc_history(session, Target_time)
+        load_dc = profiles["DC_PD"]
         models["Load_dc"]["PD"] = round(load_dc * models["Load_dc"]["PDMAX"])
     else:
         logger.warning("No critical DC load is connected, set to default value 0!")
         models["Load_dc"]["PD"] = 0
 
     if models["Load_udc"]["STATUS"] > 0:
-        load_udc = short_term_forecasting_load_udc_history(session, Target_time)
+        load_udc = profiles["UDC_PD"]
         models["Load_udc"]["PD"] = round(load_udc * models["Load_udc"]["PDMAX"])
     else:
         logger.warning("No non-critical DC load is connected, set to default value 0!")
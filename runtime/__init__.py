@@ -0,0 +1,4 @@
+## Runtime of the operating processes for universal and local energy management system
+# The operating processes, i.e., OPF, ED and UC, run as the coroutines of one asyncio event loop.
+# operation_runtime: the event loop, the cron triggers, the bounded executors and the stage deadlines
+# operation_cycles: the cycles of the operating processes in the universal ems and the local ems
@@ -0,0 +1,175 @@
+## Cycles of the operating processes in the asyncio runtime
+# The cycles follow the operations of the universal ems and the local ems (see the main module of each process), i.e.,
+# the forecasting and the information collection, the set-points tracing, the solving, the schedule of the faster
+# horizon, the command and the recording. The stages are awaited by the runtime and the information exchange is awaited
+# on the asynchronous gateway (universal ems) or the zmq.asyncio REQ socket (local ems).
+import asyncio
+import time
+from configuration.configuration_time_line import default_time, default_look_ahead_time_step, \
+    default_stage_deadline
+from data_management.information_collection import information_updating, collected_upload
+from data_management.information_management import information_formulation_extraction, \
+    information_formulation_extraction_dynamic
+from modelling.microgrid_state import snapshot
+from runtime.operation_runtime import StageTimeout
+from optimal_power_flow import main as short_term_main
+from optimal_power_flow.short_term_forecasting import short_term_forecasting
+from optimal_power_flow.set_ponits_tracing import set_points_tracing_opf
+from optimal_power_flow.input_check import input_check_short_term
+from economic_dispatch import main as middle_term_main
+from economic_dispatch.mid_term_forecasting import mid_term_forecasting
+from economic_dispatch.set_points_tracing import set_points_tracing_ed
+from economic_dispatch.middle2short import middle2short_operation
+from unit_commitment import main as long_term_main
+from unit_commitment.long_tertm_forecasting import long_term_forecasting
+from unit_commitment.long2middle import long2middle_opeartion
+
+
+def short_term_command(*args):
+    return information_formulation_extraction.info_formulation(args[0], args[1], args[2])
+
+
+def middle_term_command(*args):
+    return information_formulation_extraction_dynamic.info_formulation(args[0], args[1], "ED", args[2])
+
+
+def long_term_command(*args):
+    args[0]["COMMAND_TYPE"] = 0  # The set-points tracing is not used by the unit commitment
+    return information_formulation_extraction_dynamic.info_formulation(args[0], args[1], "UC", args[2])
+
+
+# The stages of each operating process, None means the stage is not used by the process
+operating_processes = \
+    {
+        "OPF": {"Time_step": default_time["Time_step_opf"],
+                "T": default_look_ahead_time_step["Look_ahead_time_opf_time_step"],
+                "Forecasting": short_term_forecasting,
+                "Local_check": input_check_short_term.model_local_check,
+                "Tracing": set_points_tracing_opf,
+                "Solving": short_term_main.short_term_operation.operation_solving,
+                "Schedule": None,
+                "Command": short_term_command,
+                "Extraction": information_formulation_extraction.info_extraction,
+                "Logger_uems": short_term_main.logger_uems,
+                "Logger_lems": short_term_main.logger_lems},
+        "ED": {"Time_step": default_time["Time_step_ed"],
+               "T": default_look_ahead_time_step["Look_ahead_time_ed_time_step"],
+               "Forecasting": mid_term_forecasting,
+               "Local_check": None,
+               "Tracing": set_points_tracing_ed,
+               "Solving": middle_term_main.middle_term_operation.operation_solving,
+               "Schedule": middle2short_operation,
+               "Command": middle_term_command,
+               "Extraction": information_formulation_extraction_dynamic.info_extraction,
+               "Logger_uems": middle_term_main.logger_uems,
+               "Logger_lems": middle_term_main.logger_lems},
+        "UC": {"Time_step": default_time["Time_step_uc"],
+               "T": default_look_ahead_time_step["Look_ahead_time_uc_time_step"],
+               "Forecasting": long_term_forecasting,
+               "Local_check": None,
+               "Tracing": None,
+               "Solving": long_term_main.long_term_operation.operation_solving,
+               "Schedule": long2middle_opeartion,
+               "Command": long_term_command,
+               "Extraction": information_formulation_extraction_dynamic.info_extraction,
+               "Logger_uems": long_term_main.logger_uems,
+               "Logger_lems": long_term_main.logger_lems},
+    }
+
+
+def target_time(process):
+    # The start time of the look ahead horizon, i.e., the next time step of the process
+    Target_time = time.time()
+    return round(Target_time - Target_time % operating_processes[process]["Time_step"] +
+                 operating_processes[process]["Time_step"])
+
+
+async def universal_cycle(runtime, process, *args):
+    """The cycle of the operating process in the universal ems
+
+        @param runtime: the operation runtime
+        @param process: the operating process, i.e., "OPF", "ED" or "UC"
+        @param args: universal models, local models, the asynchronous gateway, the information model and the session
+        """
+    from data_management.database_management import database_operation
+    operation = operating_processes[process]
+    universal_models = snapshot(args[0])
+    local_models = snapshot(args[1])
+    gateway = args[2]
+    info = args[3]
+    session = args[4]
+    Target_time = target_time(process)
+
+    # The forecasting runs in the executor while the uploads of the local emss are awaited, the uploads of the other
+    # areas are returned by the gateway
+    (universal_models, uploads) = await asyncio.gather(
+        runtime.stage(process, "Forecasting", operation["Forecasting"], (session, Target_time, universal_models),
+                      universal_models),
+        gateway.collect(info, [local_models["UG"]["AREA"]]))
+    # The models of a missing local ems are updated by its last upload, or are the start-up models before the first one
+    upload = collected_upload(info, uploads, local_models["UG"]["AREA"], operation["T"])
+    if upload is not None:
+        info.CopyFrom(upload)
+        local_models = information_updating(info, local_models, operation["T"])
+
+    if operation["Tracing"] is not None:
+        universal_models = await runtime.stage(process, "Tracing", operation["Tracing"],
+                                               (Target_time, session, universal_models))
+    (local_models, universal_models) = await runtime.stage(process, "Solving", operation["Solving"],
+                                                           (local_models, universal_models, Target_time))
+    if operation["Schedule"] is not None:
+        await runtime.stage(process, "Schedule", operation["Schedule"], (Target_time, session, universal_models))
+
+    # Return command to the local ems
+    dynamic_model = operation["Command"](local_models, Target_time, info)
+    dynamic_model.TIME_STAMP_COMMAND = round(time.time())
+    operation["Logger_uems"].info("The command for UEMS is {}".format(universal_models["PMG"]))
+    await gateway.send(dynamic_model.AREA, dynamic_model)
+
+    # The result is recorded by the write-behind recorder after the command is sent
+    await runtime.stage(process, "Recording", database_operation.database_record,
+                        (session, universal_models, Target_time, process))
+
+
+async def local_cycle(runtime, process, *args):
+    """The cycle of the operating process in the local ems
+
+        @param runtime: the operation runtime
+        @param process: the operating process, i.e., "OPF", "ED" or "UC"
+        @param args: local models, the zmq.asyncio REQ socket, the information model and the session
+        """
+    from data_management.database_management import database_operation
+    operation = operating_processes[process]
+    local_models = snapshot(args[0])
+    socket = args[1]
+    info = args[2]
+    session = args[3]
+    Target_time = target_time(process)
+
+    # Step 1: Forecasting
+    local_models = await runtime.stage(process, "Forecasting", operation["Forecasting"],
+                                       (session, Target_time, local_models), local_models)
+    if operation["Local_check"] is not None:
+        local_models = operation["Local_check"](local_models)
+    if operation["Tracing"] is not None:
+        local_models = await runtime.stage(process, "Tracing", operation["Tracing"],
+                                           (Target_time, session, local_models))
+
+    # Step 2: Information exchange, the command is awaited until the deadline of the exchange
+    dynamic_model = operation["Command"](local_models, Target_time, info)
+    operation["Logger_lems"].info("Sending request from {}".format(dynamic_model.AREA) + " to the serve")
+    await socket.send(dynamic_model.SerializeToString())
+    try:
+        message = await asyncio.wait_for(socket.recv(), default_stage_deadline[process]["Exchange"])
+    except asyncio.TimeoutError:  # The universal ems is down, the request is sent again in the next cycle
+        operation["Logger_lems"].warning("The command from UEMS is not received before the deadline!")
+        raise StageTimeout(process + ".Exchange")
+    info.ParseFromString(message)
+    local_models = operation["Extraction"](local_models, info)
+    operation["Logger_lems"].info("The command from UEMS is {}".format(local_models["PMG"]))
+
+    # Step 3: Schedule and recording
+    if operation["Schedule"] is not None:
+        await runtime.stage(process, "Schedule", operation["Schedule"], (Target_time, session, local_models))
+    await runtime.stage(process, "Recording", database_operation.database_record,
+                        (session, local_models, Target_time, process))
@@ -0,0 +1,137 @@
+## Asyncio runtime of the operating processes
+# The operating processes (OPF/ED/UC) of the universal ems and the local ems run as the coroutines of one event loop,
+# instead of the jobs of the blocking scheduler, whose cycles create the threads of the forecasting, the information
+# exchange, the solving and the sending. The information exchange is awaited on the zmq.asyncio sockets by the event
+# loop, and the blocking stages, i.e., the forecasting, the database operations and the solving, run in the bounded
+# executors, whose threads are reused by all the cycles.
+# The cycles are triggered at the same seconds as the cron jobs of the scheduler. The cycle of a process is skipped when
+# its former cycle is still running, hence the 1-minute, 5-minute and 30-minute cycles overlap predictably, i.e., at
+# most one cycle of each process is running and the solving stages of the processes never wait for each other.
+# Each stage is awaited until its deadline (see configuration_time_line.default_stage_deadline). The overdue stage is
+# reported by the metrics and closes its cycle, unless the stage has a fallback, e.g., the models of the former cycle.
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from configuration.configuration_runtime import default_runtime
+from configuration.configuration_time_line import default_stage_deadline
+from data_management.database_engine import session_task
+from utils import Logger
+
+logger = Logger("Operation_runtime")
+
+# The executor of each stage, the solving stages are separated from the database operations
+stage_executors = {"Forecasting": "Database",
+                   "Tracing": "Database",
+                   "Solving": "Solving",
+                   "Schedule": "Database",
+                   "Recording": "Database"}
+
+
+class StageTimeout(Exception):
+    # The stage is overdue at its deadline
+    pass
+
+
+class OperationRuntime():
+    def __init__(self):
+        self.executors = {"Database": ThreadPoolExecutor(max_workers=default_runtime["Database_workers"],
+                                                         thread_name_prefix="Database"),
+                          "Solving": ThreadPoolExecutor(max_workers=default_runtime["Solving_workers"],
+                                                        thread_name_prefix="Solving_stage")}
+        self.jobs = []  # The periodic jobs, (name, function, args, period, offset)
+        self.running = {}  # The running cycle of each job
+        self.metrics = {}  # The metrics of each job and each stage
+
+    def add_job(self, name, function, args, period, offset):
+        """Add a periodic job, which is triggered at the offset of each period, e.g., **:*1 for (60, 1)
+
+            @param name: the name of the job, e.g., "OPF"
+            @param function: the cycle, a coroutine function whose first argument is the runtime, or a blocking function
+            which runs in the database executor
+            @param args: the arguments of the cycle
+            @param period: the period of the job (s)
+            @param offset: the offset of the trigger in the period (s)
+            """
+        self.jobs.append((name, function, args, period, offset))
+        self.metrics[name] = {"Cycles": 0, "Skipped": 0, "Failed": 0, "Max_time": 0.0}
+
+    def count(self, name, metric, value=1):
+        self.metrics[name][metric] += value
+
+    async def stage(self, process, name, function, args, fallback=None):
+        """Run a blocking stage in its executor until the deadline of the stage
+
+            @param process: the operating process, e.g., "OPF"
+            @param name: the stage, see stage_executors
+            @param function: the blocking function of the stage
+            @param args: the arguments of the function
+            @param fallback: the result of the overdue stage, None means the cycle is closed by StageTimeout
+            @return: the result of the function
+            """
+        key = process + "." + name
+        if key not in self.metrics:
+            self.metrics[key] = {"Runs": 0, "Timeouts": 0, "Max_time": 0.0}
+        t0 = time.time()
+        task = asyncio.get_event_loop().run_in_executor(self.executors[stage_executors[name]],
+                                                          session_task(function), *args)
+        try:
+            result = await asyncio.wait_for(task, default_stage_deadline[process][name])
+        except asyncio.TimeoutError:
+            self.count(key, "Timeouts")
+            logger.warning("The {0} stage of {1} is overdue at its deadline!".format(name, process))
+            if fallback is None:
+                raise StageTimeout(key)
+            result = fallback
+        self.count(key, "Runs")
+        self.metrics[key]["Max_time"] = max(self.metrics[key]["Max_time"], time.time() - t0)
+        return result
+
+    async def cycle(self, name, function, args):
+        # Run one cycle of the job, the failures are reported and the following cycles are not affected
+        t0 = time.time()
+        try:
+            if asyncio.iscoroutinefunction(function):
+                await function(self, *args)
+            else:
+                await asyncio.get_event_loop().run_in_executor(self.executors["Database"], function, *args)
+            self.count(name, "Cycles")
+        except Exception as e:
+            self.count(name, "Failed")
+            logger.error("The cycle of {0} fails: {1!r}".format(name, e))
+        finally:
+            self.metrics[name]["Max_time"] = max(self.metrics[name]["Max_time"], time.time() - t0)
+            del self.running[name]
+
+    async def trigger(self, name, function, args, period, offset):
+        # Trigger the cycles of the job, the trigger is skipped when the former cycle is running
+        while True:
+            now = time.time()
+            next_time = now - now % period + offset
+            if next_time <= now:
+                next_time += period
+            await asyncio.sleep(next_time - now)
+            if name in self.running:
+                self.count(name, "Skipped")
+                logger.warning("The cycle of {} is skipped, the former cycle is running!".format(name))
+                continue
+            self.running[name] = asyncio.ensure_future(self.cycle(name, function, args))
+
+    async def main(self):
+        await asyncio.gather(*[self.trigger(*job) for job in self.jobs])
+
+    def start(self):
+        # Start the event loop, which runs until the process is stopped
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.main())
+        finally:
+            for executor in self.executors.values():
+                executor.shutdown(wait=False)
+
+    def status(self):
+        # The metrics of the jobs and the stages, and the running cycles
+        return dict(self.metrics, Running=list(self.running))
+
+    def log_status(self):
+        logger.info("The runtime status: {}".format(self.status()))
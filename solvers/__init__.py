@@ -17,4 +17,6 @@
 # 3) Interior-point method (self-developed)
 # 4) scip (open-source)
 # 5) cvxopt (open-source)
-# 6) scipy (open-source)
\ No newline at end of file
+# 6) scipy (open-source)
+# 7) HiGHS (open-source, shipped with scipy>=1.9)
+# The solver of each operating process is selected in configuration/configuration_solvers.py
\ No newline at end of file
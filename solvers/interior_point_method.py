@@ -4,14 +4,20 @@
 \date: 14/Sep/2017
 """
 
-from numpy import array, Inf, any, isnan, ones, r_, finfo, \
-    zeros, dot, absolute, log, flatnonzero as find
+from numpy import array, inf, any, isnan, ones, r_, finfo, \
+    zeros, dot, absolute, log, flatnonzero as find, arange, repeat, cumsum, diff, concatenate, unique, bincount, \
+    empty, minimum, maximum, where
 from numpy.linalg import norm
-from scipy.sparse import vstack, hstack, eye, csr_matrix as sparse
-from scipy.sparse.linalg import spsolve
+from scipy.sparse import vstack, hstack, eye, csr_matrix as sparse, csc_matrix
+from scipy.sparse.linalg import spsolve, splu
+import threading
 
 EPS = finfo(float).eps
 
+kkt_systems = {}  # The KKT systems of the LP/QP problems, which are keyed by the sparsity patterns
+kkt_systems_lock = threading.Lock()
+kkt_systems_max = 16  # The maximal number of cached KKT systems
+
 
 def ips(f_fcn, x0=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None,
         gh_fcn=None, hess_fcn=None, opt=None):
@@ -135,10 +141,10 @@ def ips(f_fcn, x0=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None
     nineq = A.shape[0] if A is not None else 0  # number of inequal linear constraints
 
     # default argument values
-    if beq is None or len(beq) == 0: beq = -Inf * ones(neq)
-    if b is None or len(b) == 0: b = Inf * ones(nineq)
-    if xmin is None or len(xmin) == 0: xmin = -Inf * ones(x0.shape[0])
-    if xmax is None or len(xmax) == 0: xmax = Inf * ones(x0.shape[0])
+    if beq is None or len(beq) == 0: beq = -inf * ones(neq)
+    if b is None or len(b) == 0: b = inf * ones(nineq)
+    if xmin is None or len(xmin) == 0: xmin = -inf * ones(x0.shape[0])
+    if xmax is None or len(xmax) == 0: xmax = inf * ones(x0.shape[0])
     if gh_fcn is None:
         nonlinear = False
         gn = array([])
@@ -260,15 +266,15 @@ def ips(f_fcn, x0=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None
 
     maxh = zeros(1) if len(h) == 0 else max(h)
 
-    gnorm = norm(g, Inf) if len(g) else 0.0
-    lam_norm = norm(lam, Inf) if len(lam) else 0.0
-    mu_norm = norm(mu, Inf) if len(mu) else 0.0
-    znorm = norm(z, Inf) if len(z) else 0.0
+    gnorm = norm(g, inf) if len(g) else 0.0
+    lam_norm = norm(lam, inf) if len(lam) else 0.0
+    mu_norm = norm(mu, inf) if len(mu) else 0.0
+    znorm = norm(z, inf) if len(z) else 0.0
     feascond = \
-        max([gnorm, maxh]) / (1 + max([norm(x, Inf), znorm]))
+        max([gnorm, maxh]) / (1 + max([norm(x, inf), znorm]))
     gradcond = \
-        norm(Lx, Inf) / (1 + max([lam_norm, mu_norm]))
-    compcond = dot(z, mu) / (1 + norm(x, Inf))
+        norm(Lx, inf) / (1 + max([lam_norm, mu_norm]))
+    compcond = dot(z, mu) / (1 + norm(x, inf))
     costcond = absolute(f - f0) / (1 + absolute(f0))
 
     # save history
@@ -385,14 +391,14 @@ def ips(f_fcn, x0=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None
 
             maxh1 = zeros(1) if len(h1) == 0 else max(h1)
 
-            g1norm = norm(g1, Inf) if len(g1) else 0.0
-            lam1_norm = norm(lam, Inf) if len(lam) else 0.0
-            mu1_norm = norm(mu, Inf) if len(mu) else 0.0
-            z1norm = norm(z, Inf) if len(z) else 0.0
+            g1norm = norm(g1, inf) if len(g1) else 0.0
+            lam1_norm = norm(lam, inf) if len(lam) else 0.0
+            mu1_norm = norm(mu, inf) if len(mu) else 0.0
+            z1norm = norm(z, inf) if len(z) else 0.0
 
             feascond1 = max([g1norm, maxh1]) / \
-                        (1 + max([norm(x1, Inf), z1norm]))
-            gradcond1 = norm(Lx1, Inf) / (1 + max([lam1_norm, mu1_norm]))
+                        (1 + max([norm(x1, inf), z1norm]))
+            gradcond1 = norm(Lx1, inf) / (1 + max([lam1_norm, mu1_norm]))
 
             if (feascond1 > feascond) and (gradcond1 > gradcond):
                 sc = True
@@ -481,15 +487,15 @@ def ips(f_fcn, x0=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None
         else:
             maxh = max(h)
 
-        gnorm = norm(g, Inf) if len(g) else 0.0
-        lam_norm = norm(lam, Inf) if len(lam) else 0.0
-        mu_norm = norm(mu, Inf) if len(mu) else 0.0
-        znorm = norm(z, Inf) if len(z) else 0.0
+        gnorm = norm(g, inf) if len(g) else 0.0
+        lam_norm = norm(lam, inf) if len(lam) else 0.0
+        mu_norm = norm(mu, inf) if len(mu) else 0.0
+        znorm = norm(z, inf) if len(z) else 0.0
         feascond = \
-            max([gnorm, maxh]) / (1 + max([norm(x, Inf), znorm]))
+            max([gnorm, maxh]) / (1 + max([norm(x, inf), znorm]))
         gradcond = \
-            norm(Lx, Inf) / (1 + max([lam_norm, mu_norm]))
-        compcond = dot(z, mu) / (1 + norm(x, Inf))
+            norm(Lx, inf) / (1 + max([lam_norm, mu_norm]))
+        compcond = dot(z, mu) / (1 + norm(x, inf))
         costcond = float(absolute(f - f0) / (1 + absolute(f0)))
 
         hist.append({'feascond': feascond, 'gradcond': gradcond,
@@ -568,6 +574,285 @@ def ips(f_fcn, x0=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None
     return solution
 
 
+class KKTSystem():
+    """The KKT system of the LP/QP problems in the interior point method
+            K = [[H + Ai'*diag(d)*Ai, Ae'],
+                 [Ae,                 0  ]]
+        where H is the Hessian of the objective function, Ai and Ae are the inequality and equality constraints, and
+        d = mu/z changes in each Newton iteration. The sparsity pattern of K does not change between the iterations and
+        between the consecutive solves of the rolling horizon operation. Hence, the symbolic analysis, i.e., the map
+        from the nonzeros of H, Ai and Ae to the nonzeros of K and the column ordering of the LU factorisation, is
+        computed once, and only the numerical values of K are updated before each factorisation.
+        """
+
+    def __init__(self, H, Ae, Ai):
+        self.nx = H.shape[0]
+        self.n = H.shape[0] + Ae.shape[0]  # The dimension of K
+        H = H.tocoo()
+        Ae = Ae.tocoo()
+        # The nonzeros of Ai'*diag(d)*Ai, each pair of nonzeros (p, q) in the same row of Ai is an entry
+        counts = diff(Ai.indptr)
+        rows_ai = repeat(arange(Ai.shape[0]), counts)  # The row of each nonzero of Ai
+        pairs = counts[rows_ai]
+        self.p = repeat(arange(Ai.nnz), pairs)
+        self.q = repeat(Ai.indptr[rows_ai] - (cumsum(pairs) - pairs), pairs) + arange(len(self.p))
+        self.constraint = rows_ai[self.p]
+        # The entries of K, which are ordered as [H, Ai'*diag(d)*Ai, Ae', Ae]
+        self.rows = concatenate([H.row, Ai.indices[self.p], Ae.col, Ae.row + self.nx])
+        self.cols = concatenate([H.col, Ai.indices[self.q], Ae.row + self.nx, Ae.col])
+        self.layout = self.analyse(arange(self.n))
+        self.ordered = False  # Whether the column ordering has been computed
+
+    def analyse(self, ordering):
+        # The CSC structure of K with the column ordering, the k-th column of K is the ordering[k]-th column
+        keys = ordering[self.cols] * self.n + self.rows
+        (keys, position) = unique(keys, return_inverse=True)
+        indptr = concatenate([[0], cumsum(bincount(keys // self.n, minlength=self.n))])
+        indices = keys % self.n
+        return ordering, position, indptr, indices
+
+    def factorize(self, H, Ae, Ai, d):
+        """LU factorisation of K, only the numerical factorisation is performed when the ordering has been computed
+
+            @return: the function that solves K*x = rhs
+            """
+        (ordering, position, indptr, indices) = self.layout
+        values = concatenate([H.tocoo().data, Ai.data[self.p] * Ai.data[self.q] * d[self.constraint],
+                              Ae.tocoo().data, Ae.tocoo().data])
+        data = bincount(position, weights=values, minlength=len(indices))
+        K = csc_matrix((data, indices, indptr), shape=(self.n, self.n))
+        if self.ordered:
+            lu = splu(K, permc_spec="NATURAL")
+        else:
+            # The column ordering is computed by the first factorisation
+            lu = splu(K, permc_spec="COLAMD")
+            self.layout = self.analyse(lu.perm_c)
+            self.ordered = True
+            ordering = arange(self.n)
+
+        def solve(rhs):
+            return lu.solve(rhs)[ordering]
+
+        return solve
+
+
+def kkt_system(H, Ae, Ai):
+    # Return the cached KKT system with the same sparsity pattern
+    key = (H.shape[0], Ae.shape[0], Ai.shape[0], H.indptr.tobytes(), H.indices.tobytes(), Ae.indptr.tobytes(),
+           Ae.indices.tobytes(), Ai.indptr.tobytes(), Ai.indices.tobytes())
+    with kkt_systems_lock:
+        if key not in kkt_systems:
+            if len(kkt_systems) >= kkt_systems_max:
+                kkt_systems.clear()
+            kkt_systems[key] = KKTSystem(H, Ae, Ai)
+        return kkt_systems[key]
+
+
+def ips_qp(c, Q=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, x0=None, opt=None):
+    """Primal-dual interior point method for LP and QP problems.
+    Minimize a quadratic function, subject to optional linear constraints and variable bounds::
+            min f(x) := inner(c,x) + x'*Q*x/2
+             x
+    subject to::
+            Aeq*x == beq        (linear constraints, equality)
+            A*x <= b            (linear constraints, inequality)
+            xmin <= x <= xmax   (variable bounds)
+    The Newton iterations are the same as ips, and the first and second derivatives are constant. The matrices are used
+    in the CSR format directly, and the KKT systems are cached by the sparsity patterns, see KKTSystem.
+    @param Q: Optional quadratic matrix, None means the problem is an LP problem.
+    @type Q: csr_matrix
+    @param x0: Optional starting value of optimization vector M{x}, the nan values are undefined.
+    @type x0: array
+    @param opt: the same options as ips, except step_control. The default value of verbose is 0.
+    @return: the same solution dictionary as ips
+    """
+    from solvers.mix_integer_solvers import sparse_matrix
+    c = array(c, dtype=float).ravel()
+    nx = c.shape[0]  # number of variables
+    H = sparse((nx, nx)) if Q is None else sparse_matrix(Q, nx)
+    H = sparse((H + H.T) / 2)  # The Hessian of the objective function
+    Ae = sparse_matrix(Aeq, nx)
+    A = sparse_matrix(A, nx)
+    for M in [H, Ae, A]:
+        M.sum_duplicates()
+    neq = Ae.shape[0]  # number of equal linear constraints
+    nineq = A.shape[0]  # number of inequal linear constraints
+
+    # default argument values
+    be = zeros(neq) if beq is None or len(beq) == 0 else array(beq, dtype=float).ravel()
+    b = inf * ones(nineq) if b is None or len(b) == 0 else array(b, dtype=float).ravel()
+    xmin = -inf * ones(nx) if xmin is None or len(xmin) == 0 else array(xmin, dtype=float).ravel()
+    xmax = inf * ones(nx) if xmax is None or len(xmax) == 0 else array(xmax, dtype=float).ravel()
+    # The starting point is projected into the variable bounds
+    x = zeros(nx) if x0 is None else array(x0, dtype=float).ravel()
+    x = minimum(maximum(where(isnan(x), 0, x), xmin), xmax)
+
+    if opt is None: opt = {}
+    opt = dict(opt)
+    for (key, value) in [("feastol", 1e-06), ("gradtol", 1e-06), ("comptol", 1e-06), ("costtol", 1e-06),
+                         ("max_it", 150), ("cost_mult", 1), ("verbose", 0)]:
+        if key not in opt:
+            opt[key] = value
+
+    # constants
+    xi = 0.99995
+    sigma = 0.1
+    z0 = 1
+    alpha_min = 1e-8
+    mu_threshold = 1e-5
+
+    # add var limits to linear constraints, only the bounded constraints are considered
+    eyex = eye(nx, nx, format="csr")
+    AA = vstack([-eyex, eyex, A], "csr")
+    bb = r_[-xmin, xmax, b]
+    ib = find(bb <= 1e10)
+    Ai = AA[ib, :]
+    Ai.sum_duplicates()
+    bi = bb[ib]
+    kkt = kkt_system(H, Ae, Ai)
+
+    # cost and constraints
+    H = H * opt["cost_mult"]
+    c = c * opt["cost_mult"]
+    f = dot(c, x) + dot(x, H * x) / 2
+    df = c + H * x
+    h = Ai * x - bi  # inequality constraints
+    g = Ae * x - be  # equality constraints
+    niq = h.shape[0]
+
+    # initialize gamma, lam, mu, z, e
+    i = 0  # iteration counter
+    converged = False  # flag
+    eflag = False  # exit flag
+    hist = []
+    gamma = 1  # barrier coefficient
+    lam = zeros(neq)
+    z = z0 * ones(niq)
+    mu = z0 * ones(niq)
+    k = find(h < -z0)
+    z[k] = -h[k]
+    k = find((gamma / z) > z0)
+    mu[k] = gamma / z[k]
+    e = ones(niq)
+    f0 = f
+
+    while True:
+        Lx = df + Ae.T * lam + Ai.T * mu
+        maxh = h.max() if niq > 0 else 0.0
+        gnorm = norm(g, inf) if neq else 0.0
+        lam_norm = norm(lam, inf) if neq else 0.0
+        mu_norm = norm(mu, inf) if niq else 0.0
+        znorm = norm(z, inf) if niq else 0.0
+        feascond = max([gnorm, maxh]) / (1 + max([norm(x, inf), znorm]))
+        gradcond = norm(Lx, inf) / (1 + max([lam_norm, mu_norm]))
+        compcond = dot(z, mu) / (1 + norm(x, inf))
+        costcond = float(absolute(f - f0) / (1 + absolute(f0)))
+        hist.append({'feascond': feascond, 'gradcond': gradcond, 'compcond': compcond, 'costcond': costcond,
+                     'gamma': gamma, 'obj': f / opt["cost_mult"]})
+        if opt["verbose"] > 1:
+            print("%3d  %12.8g %12g %12g %12g %12g" % (i, (f / opt["cost_mult"]), feascond, gradcond, compcond,
+                                                        costcond))
+
+        if feascond < opt["feastol"] and gradcond < opt["gradtol"] and \
+                        compcond < opt["comptol"] and costcond < opt["costtol"]:
+            converged = True
+            break
+        if i > 0 and (any(isnan(x)) or (alphap < alpha_min) or (alphad < alpha_min) or (gamma < EPS) or
+                      (gamma > 1.0 / EPS)):
+            eflag = -1
+            break
+        if i >= opt["max_it"]:
+            break
+        f0 = f
+        i += 1
+
+        # compute update step, only the numerical values of the KKT system are updated
+        N = Lx + Ai.T * ((mu * h + gamma * e) / z)
+        try:
+            solve = kkt.factorize(H, Ae, Ai, mu / z)
+            dxdlam = solve(r_[-N, -g])
+        except RuntimeError:  # The KKT system is singular
+            dxdlam = empty(nx + neq) * float("nan")
+        if any(isnan(dxdlam)):
+            eflag = -1
+            break
+        dx = dxdlam[:nx]
+        dlam = dxdlam[nx:nx + neq]
+        dz = -h - z - Ai * dx
+        dmu = -mu + (gamma * e - mu * dz) / z
+
+        # do the update
+        k = find(dz < 0.0)
+        alphap = min([xi * (z[k] / -dz[k]).min(), 1]) if len(k) else 1.0
+        k = find(dmu < 0.0)
+        alphad = min([xi * (mu[k] / -dmu[k]).min(), 1]) if len(k) else 1.0
+        x = x + alphap * dx
+        z = z + alphap * dz
+        lam = lam + alphad * dlam
+        mu = mu + alphad * dmu
+        if niq > 0:
+            gamma = sigma * dot(z, mu) / niq
+
+        # evaluate cost, constraints
+        f = dot(c, x) + dot(x, H * x) / 2
+        df = c + H * x
+        h = Ai * x - bi
+        g = Ae * x - be
+
+    if eflag != -1:
+        eflag = converged
+    if eflag == 1:
+        message = 'Converged'
+    elif eflag == -1:
+        message = 'Numerically failed'
+    else:
+        message = 'Did not converge'
+    if opt["verbose"]:
+        print(message)
+    output = {"iterations": i, "hist": hist, "message": message}
+
+    # zero out multipliers on non-binding constraints
+    mu[find((h < -opt["feastol"]) & (mu < mu_threshold))] = 0.0
+
+    # un-scale cost and prices
+    f = f / opt["cost_mult"]
+    lam = lam / opt["cost_mult"]
+    mu_all = zeros(nx + nx + nineq)
+    mu_all[ib] = mu / opt["cost_mult"]
+
+    lmbda = {'lam': lam, 'mu': mu_all[nx + nx:nx + nx + nineq], 'lower': mu_all[:nx], 'upper': mu_all[nx:nx + nx]}
+
+    solution = {"x": x, "f": f, "eflag": converged, "output": output, "lmbda": lmbda}
+
+    return solution
+
+
+def qp_ips(c, Q, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtypes=None, opt=None):
+    """Quadratic programming using the interior point method, the interface is the same as miqp_gurobi.
+        Only the continuous variables are supported.
+        @param opt: the options of ips_qp, and the start vector "x0"
+        @return: (xx, obj, success), success = 1 when the optimal solution is obtained, otherwise 0.
+        """
+    nx = len(c)
+    if vtypes is not None and any([vtype not in ("c", "C") for vtype in vtypes]):
+        print('The interior point method does not support integer variables!')
+        return [0] * nx, 0, 0
+    if opt is None: opt = {}
+    options = dict((key, opt[key]) for key in opt if key != "x0")
+
+    solution = ips_qp(c, Q, Aeq=Aeq, beq=beq, A=A, b=b, xmin=xmin, xmax=xmax, x0=opt.get("x0"), opt=options)
+    if solution["eflag"] is True:
+        return solution["x"].tolist(), solution["f"], 1
+    else:
+        print('The interior point method exits with: ' + solution["output"]["message"])
+        return [0] * nx, 0, 0
+
+
+def lp_ips(c, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtypes=None, opt=None):
+    """Linear programming using the interior point method, the interface is the same as milp_gurobi."""
+    return qp_ips(c, None, Aeq=Aeq, beq=beq, A=A, b=b, xmin=xmin, xmax=xmax, vtypes=vtypes, opt=opt)
+
+
 if __name__ == "__main__":
     # Example from U{http://en.wikipedia.org/wiki/Nonlinear_programming}:
     #     >>> from numpy import array, r_, float64, dot
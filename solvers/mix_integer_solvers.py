@@ -1,8 +1,8 @@
 ## The mixed integer solver for universal energy management system
 # Two software packages are used to build the mathmatical models for uems.
 
-from numpy import Inf, ones
-from gurobipy import *
+from numpy import inf, ones, array, isnan
+from scipy.sparse import csr_matrix, issparse
 
 def milp_gurobi(c, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtypes=None, opt=None):
     """Branch and bound method for mix_integer linear programming (MILP).
@@ -56,79 +56,34 @@ def milp_gurobi(c, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vty
                          stepsize, obj, alphap, alphad
                        - C{message} - exit message
         """
+    from gurobipy import Model, GurobiError  # The gurobi package is only required when it is used
     nx = c.shape[0]  # number of decision variables
-    if A is not None:
-        if A.shape[0]!= None:
-            nineq = A.shape[0]  # number of equality constraints
-    else:
-        nineq = 0
-
-    if Aeq is not None:
-        if Aeq.shape[0]!= None:
-            neq = Aeq.shape[0]  # number of inequality constraints
-    else:
-        neq = 0
-    # Fulfilling the missing informations
-    if beq is None or len(beq) == 0: beq = -Inf * ones(neq)
-    if b is None or len(b) == 0: b = Inf * ones(nineq)
-    if xmin is None or len(xmin) == 0: xmin = -Inf * ones(nx)
-    if xmax is None or len(xmax) == 0: xmax = Inf * ones(nx)
-
     # modelling based on the high level gurobi api
     try:
         gurobi_model = Model("MIP")
-        # Declear the variables
-        x = {}
-        for i in range(nx):
-            if vtypes[i] == "b" or vtypes[i] == "B":
-                x[i] = gurobi_model.addVar(lb=xmin[i], ub=xmax[i], vtype=GRB.BINARY, name='"x{0}"'.format(i))
-            elif vtypes[i] == "d" or vtypes[i] == "D":
-                x[i] = gurobi_model.addVar(lb=xmin[i], ub=xmax[i], vtype=GRB.INTEGER, name='"x{0}"'.format(i))
-            else:
-                x[i] = gurobi_model.addVar(lb=xmin[i], ub=xmax[i], vtype=GRB.CONTINUOUS, name='"x{0}"'.format(i))
-        # Constraints set
-        # Equal constraints
-        if neq != 0:
-            for i in range(neq):
-                expr = 0
-                for j in range(nx):
-                    expr += x[j] * Aeq[i, j]
-                gurobi_model.addConstr(lhs=expr, sense=GRB.EQUAL, rhs=beq[i])
-
-        # Inequal constraints
-        if nineq != 0:
-            for i in range(nineq):
-                expr = 0
-                for j in range(nx):
-                    expr += x[j] * A[i, j]
-                gurobi_model.addConstr(lhs=expr, sense=GRB.LESS_EQUAL, rhs=b[i])
-        # Set the objective function
-        obj = 0
-        for i in range(nx):
-            obj += x[i] * c[i]
-
-        gurobi_model.setObjective(obj)
+        x = gurobi_matrix_model(gurobi_model, c, Aeq=Aeq, beq=beq, A=A, b=b, xmin=xmin, xmax=xmax, vtypes=vtypes)
 
         gurobi_model.Params.OutputFlag = 0
         gurobi_model.Params.LogToConsole = 0
         gurobi_model.Params.DisplayInterval = 1
+        if opt is not None and opt.get("x0") is not None:
+            mip_start(gurobi_model, x, opt["x0"])
         gurobi_model.optimize()
-        xx = []
-        for v in gurobi_model.getVars():
-            # print('%s %g' % (v.varName, v.x))
-            xx.append(v.x)
-
-        obj = obj.getValue()
+        xx = [v.x for v in x]
+        obj = gurobi_model.ObjVal
         success = 1
-        # print('Obj: %g' % obj.getValue())
 
     except GurobiError as e:
         print('Error code ' + str(e.errno) + ": " + str(e))
         success = 0
+        xx = [0] * nx
+        obj = 0
 
     except AttributeError:
         print('Encountered an attribute error')
         success = 0
+        xx = [0] * nx
+        obj = 0
 
     return xx, obj, success
 
@@ -149,10 +104,10 @@ def milp_mosek(c, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtyp
     else:
         neq = 0
     # Fulfilling the missing informations
-    if beq is None or len(beq) == 0: beq = -Inf * ones(neq)
-    if b is None or len(b) == 0: b = Inf * ones(nineq)
-    if xmin is None or len(xmin) == 0: xmin = -Inf * ones(nx)
-    if xmax is None or len(xmax) == 0: xmax = Inf * ones(nx)
+    if beq is None or len(beq) == 0: beq = -inf * ones(neq)
+    if b is None or len(b) == 0: b = inf * ones(nineq)
+    if xmin is None or len(xmin) == 0: xmin = -inf * ones(nx)
+    if xmax is None or len(xmax) == 0: xmax = inf * ones(nx)
 
     # Make a MOSEK environment
     with mosek.Env() as env:
@@ -168,7 +123,7 @@ def milp_mosek(c, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtyp
 
             for i in range(nineq):
                 bkc.append(mosek.boundkey.up)
-                blc.append(-Inf)
+                blc.append(-inf)
                 buc.append(b[i])
 
             bkx = []
@@ -321,76 +276,23 @@ def miqp_gurobi(c, Q, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None,
                          stepsize, obj, alphap, alphad
                        - C{message} - exit message
         """
+    from gurobipy import Model, GurobiError  # The gurobi package is only required when it is used
     nx = c.shape[0]  # number of decision variables
-    if A.shape[0]:
-        nineq = A.shape[0]  # number of equality constraints
-    else:
-        nineq = 0
-
-    if Aeq.shape[0]:
-        neq = Aeq.shape[0]  # number of inequality constraints
-    else:
-        neq = 0
-    # Fulfilling the missing informations
-    if beq is None or len(beq) == 0: beq = -Inf * ones(neq)
-    if b is None or len(b) == 0: b = Inf * ones(nineq)
-    if xmin is None or len(xmin) == 0: xmin = -Inf * ones(nx)
-    if xmax is None or len(xmax) == 0: xmax = Inf * ones(nx)
-
     # modelling based on the high level gurobi api
     try:
         gurobi_model = Model("MIP")
-        # Declear the variables
-        x = {}
-        for i in range(nx):
-            if vtypes == None:
-                x[i] = gurobi_model.addVar(lb=xmin[i], ub=xmax[i], vtype=GRB.CONTINUOUS, name='"x{0}"'.format(i))
-            elif vtypes[i] == "b" or vtypes[i] == "B":
-                x[i] = gurobi_model.addVar(lb=xmin[i], ub=xmax[i], vtype=GRB.BINARY, name='"x{0}"'.format(i))
-            elif vtypes[i] == "d" or vtypes[i] == "D":
-                x[i] = gurobi_model.addVar(lb=xmin[i], ub=xmax[i], vtype=GRB.INTEGER, name='"x{0}"'.format(i))
-            else:
-                x[i] = gurobi_model.addVar(lb=xmin[i], ub=xmax[i], vtype=GRB.CONTINUOUS, name='"x{0}"'.format(i))
-        # Constraints set
-        # Equal constraints
-        if neq != 0:
-            for i in range(neq):
-                expr = 0
-                for j in range(nx):
-                    expr += x[j] * Aeq[i, j]
-                gurobi_model.addConstr(lhs=expr, sense=GRB.EQUAL, rhs=beq[i])
-
-        # Inequal constraints
-        if nineq != 0:
-            for i in range(nineq):
-                expr = 0
-                for j in range(nx):
-                    expr += x[j] * A[i, j]
-                gurobi_model.addConstr(lhs=expr, sense=GRB.LESS_EQUAL, rhs=b[i])
-        # Set the objective function
-        obj = 0
-        for i in range(nx):
-            obj += x[i] * c[i]
-
-        # Add the quadratic items
-        for i in range(nx):
-            for j in range(nx):
-                obj += x[i] * x[j] * Q[i][j]/2
-
-        gurobi_model.setObjective(obj)
+        x = gurobi_matrix_model(gurobi_model, c, Q=Q, Aeq=Aeq, beq=beq, A=A, b=b, xmin=xmin, xmax=xmax,
+                                vtypes=vtypes)
 
         gurobi_model.Params.OutputFlag = 0
         gurobi_model.Params.LogToConsole = 0
         gurobi_model.Params.DisplayInterval = 1
+        if opt is not None and opt.get("x0") is not None:
+            mip_start(gurobi_model, x, opt["x0"])
         gurobi_model.optimize()
-        xx = []
-        for v in gurobi_model.getVars():
-            # print('%s %g' % (v.varName, v.x))
-            xx.append(v.x)
-
-        obj = obj.getValue()
+        xx = [v.x for v in x]
+        obj = gurobi_model.ObjVal
         success = 1 #The problem has been solved successfully
-        # print('Obj: %g' % obj.getValue())
 
     except GurobiError as e:
         print('Error code ' + str(e.errno) + ": " + str(e))
@@ -407,6 +309,112 @@ def miqp_gurobi(c, Q, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None,
     return xx, obj, success
 
 
+def gurobi_matrix_model(gurobi_model, c, Q=None, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None,
+                        vtypes=None):
+    """Populate a gurobi model from the matrix form of the problem.
+        The constraint matrices are converted to CSR and their explicit zeros are removed, so that the
+        building time is proportional to the number of nonzeros instead of the dense size.
+        When the matrix api of gurobi (>= 9.0) is available, all the rows of Aeq and A are added in one call.
+        Otherwise, each row is generated from its nonzeros only.
+
+        @return: list of gurobi variables, ordered as the columns of the matrices
+        """
+    from gurobipy import GRB, LinExpr, QuadExpr
+    nx = c.shape[0]  # number of decision variables
+    Aeq = sparse_matrix(Aeq, nx)
+    A = sparse_matrix(A, nx)
+    neq = Aeq.shape[0]  # number of equality constraints
+    nineq = A.shape[0]  # number of inequality constraints
+    # Fulfilling the missing informations
+    if beq is None or len(beq) == 0: beq = -inf * ones(neq)
+    if b is None or len(b) == 0: b = inf * ones(nineq)
+    if xmin is None or len(xmin) == 0: xmin = -inf * ones(nx)
+    if xmax is None or len(xmax) == 0: xmax = inf * ones(nx)
+    beq = array(beq, dtype=float).ravel()
+    b = array(b, dtype=float).ravel()
+    xmin = array(xmin, dtype=float).ravel()
+    xmax = array(xmax, dtype=float).ravel()
+    c = array(c, dtype=float).ravel()
+
+    # Declear the variables
+    types = []
+    for i in range(nx):
+        if vtypes is None:
+            types.append(GRB.CONTINUOUS)
+        elif vtypes[i] == "b" or vtypes[i] == "B":
+            types.append(GRB.BINARY)
+        elif vtypes[i] == "d" or vtypes[i] == "D":
+            types.append(GRB.INTEGER)
+        else:
+            types.append(GRB.CONTINUOUS)
+
+    if hasattr(gurobi_model, "addMVar"):
+        x = gurobi_model.addMVar(nx, lb=xmin, ub=xmax, vtype=array(types), name="x")
+        if neq != 0:
+            gurobi_model.addMConstr(Aeq, x, GRB.EQUAL, beq)
+        if nineq != 0:
+            gurobi_model.addMConstr(A, x, GRB.LESS_EQUAL, b)
+        if Q is None:
+            gurobi_model.setMObjective(None, c, 0.0, xc=x, sense=GRB.MINIMIZE)
+        else:
+            gurobi_model.setMObjective(sparse_matrix(Q, nx) / 2, c, 0.0, x, x, x, GRB.MINIMIZE)
+        gurobi_model.update()
+        return gurobi_model.getVars()
+
+    # Row-wise construction for the early version of gurobi
+    x = gurobi_model.addVars(nx, lb=xmin.tolist(), ub=xmax.tolist(), vtype=types, name="x")
+    x = [x[i] for i in range(nx)]
+    # Equal constraints
+    for i in range(neq):
+        index = Aeq.indices[Aeq.indptr[i]:Aeq.indptr[i + 1]]
+        expr = LinExpr(Aeq.data[Aeq.indptr[i]:Aeq.indptr[i + 1]].tolist(), [x[j] for j in index])
+        gurobi_model.addConstr(lhs=expr, sense=GRB.EQUAL, rhs=beq[i])
+    # Inequal constraints
+    for i in range(nineq):
+        index = A.indices[A.indptr[i]:A.indptr[i + 1]]
+        expr = LinExpr(A.data[A.indptr[i]:A.indptr[i + 1]].tolist(), [x[j] for j in index])
+        gurobi_model.addConstr(lhs=expr, sense=GRB.LESS_EQUAL, rhs=b[i])
+    # Set the objective function
+    index = c.nonzero()[0]
+    obj = LinExpr(c[index].tolist(), [x[j] for j in index])
+    if Q is not None:
+        # Add the quadratic items
+        Q = sparse_matrix(Q, nx).tocoo()
+        obj = QuadExpr(obj)
+        obj.addTerms((Q.data / 2).tolist(), [x[i] for i in Q.row], [x[j] for j in Q.col])
+    gurobi_model.setObjective(obj)
+    gurobi_model.update()
+    return x
+
+
+def mip_start(gurobi_model, x, x0):
+    """Set the start values of the variables, nan means the start value is undefined.
+        The values are used as the MIP start of MILP/MIQP problems and as the primal start of LP problems.
+        """
+    from gurobipy import GRB
+    x0 = [GRB.UNDEFINED if isnan(value) else value for value in array(x0, dtype=float).ravel().tolist()]
+    if gurobi_model.IsMIP:
+        gurobi_model.setAttr("Start", x, x0)
+    else:
+        gurobi_model.setAttr("PStart", x, x0)
+
+
+def sparse_matrix(M, ncols):
+    """Convert the constraint matrix to CSR format and remove the structural zeros.
+        None or empty inputs are converted to a matrix without rows.
+        """
+    if M is None:
+        return csr_matrix((0, ncols))
+    if issparse(M):
+        M = M.tocsr(copy=True)
+    elif len(M) == 0:
+        return csr_matrix((0, ncols))
+    else:
+        M = csr_matrix(array(M, dtype=float, ndmin=2))
+    M.eliminate_zeros()
+    return M
+
+
 if __name__ == "__main__":
     # A test problem from Gurobi
     #  maximize
@@ -0,0 +1,126 @@
+## The open-source solvers for universal energy management system
+# The HiGHS solver shipped with scipy (>=1.9) is used, so that no commercial licence is required.
+# The interface is the same as milp_gurobi, i.e., (x, obj, success) = solver(c, Aeq, beq, A, b, xmin, xmax, vtypes)
+
+from numpy import inf, ones, array, zeros
+from solvers.mix_integer_solvers import sparse_matrix
+
+
+def milp_highs(c, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtypes=None, opt=None):
+    """Mixed-integer linear programming (MILP) using the HiGHS solver of scipy.
+        Minimize a linear objective function, subject to optional linear constraints and variable bounds::
+
+                min f(x) := inner(c,x)
+                 x
+
+        subject to::
+
+                Aeq*x == beq        (linear constraints, equality)
+                A*x <= b            (linear constraints, inequality)
+                xmin <= x <= xmax   (variable bounds)
+                x {binary, discrete, continuous }
+
+        When all the variables are continuous, the problem is solved by linprog(method="highs"),
+        otherwise, scipy.optimize.milp is used.
+        @param c: Linear function that evaluates the objective function
+        @type c: array
+        @param Aeq: Optional equality linear constraints.
+        @type Aeq: csr_matrix
+        @param beq: Optional equality linear constraints.
+        @type beq: array
+        @param A: Optional linear constraints.
+        @type A: csr_matrix
+        @param b: Optional linear constraints. Default values are M{Inf}.
+        @type b: array
+        @param xmin: Optional lower bounds on the M{x} variables, defaults are M{-Inf}.
+        @type xmin: array
+        @param xmax: Optional upper bounds on the M{x} variables, defaults are M{Inf}.
+        @type xmax: array
+        @param vtypes: list to depict the variable types, i.e.binary, discrete, continuous.
+        @type vtypes: list
+        @param opt: optional options dictionary passed to HiGHS, e.g., {"time_limit": 5}. The start vector "x0"
+                    is not supported by the scipy interface of HiGHS and is ignored.
+        @type opt: dict
+
+        @return: (xx, obj, success), success = 1 when the optimal solution is obtained, otherwise 0.
+        """
+    from scipy.optimize import linprog, milp, Bounds, LinearConstraint
+    nx = c.shape[0]  # number of decision variables
+    Aeq = sparse_matrix(Aeq, nx)
+    A = sparse_matrix(A, nx)
+    neq = Aeq.shape[0]  # number of equality constraints
+    nineq = A.shape[0]  # number of inequality constraints
+    # Fulfilling the missing informations
+    if beq is None or len(beq) == 0: beq = zeros(neq)
+    if b is None or len(b) == 0: b = inf * ones(nineq)
+    if xmin is None or len(xmin) == 0: xmin = -inf * ones(nx)
+    if xmax is None or len(xmax) == 0: xmax = inf * ones(nx)
+    beq = array(beq, dtype=float).ravel()
+    b = array(b, dtype=float).ravel()
+    xmin = array(xmin, dtype=float).ravel()
+    xmax = array(xmax, dtype=float).ravel()
+    c = array(c, dtype=float).ravel()
+    if opt is None: opt = {}
+    opt = dict((key, opt[key]) for key in opt if key != "x0")
+
+    # Formulate the integrality of variables, 0 = continuous, 1 = integer
+    integrality = zeros(nx)
+    if vtypes is not None:
+        for i in range(nx):
+            if vtypes[i] == "b" or vtypes[i] == "B":
+                integrality[i] = 1
+                xmin[i] = max(xmin[i], 0)
+                xmax[i] = min(xmax[i], 1)
+            elif vtypes[i] == "d" or vtypes[i] == "D":
+                integrality[i] = 1
+
+    try:
+        if integrality.any():
+            constraints = []
+            if neq != 0:
+                constraints.append(LinearConstraint(Aeq, beq, beq))
+            if nineq != 0:
+                constraints.append(LinearConstraint(A, -inf * ones(nineq), b))
+            res = milp(c, integrality=integrality, bounds=Bounds(xmin, xmax), constraints=constraints,
+                       options=opt)
+        else:
+            res = linprog(c, A_ub=A if nineq != 0 else None, b_ub=b if nineq != 0 else None,
+                          A_eq=Aeq if neq != 0 else None, b_eq=beq if neq != 0 else None,
+                          bounds=list(zip(xmin, xmax)), method="highs", options=opt)
+        if res.success:
+            xx = res.x.tolist()
+            obj = res.fun
+            success = 1  # The problem has been solved successfully
+        else:
+            print('HiGHS exits with status ' + str(res.status) + ": " + str(res.message))
+            xx = [0] * nx
+            obj = 0
+            success = 0
+
+    except ValueError as e:
+        print('Encountered a value error: ' + str(e))
+        xx = [0] * nx
+        obj = 0
+        success = 0
+
+    return xx, obj, success
+
+
+if __name__ == "__main__":
+    # The same test problem as milp_gurobi
+    #  maximize
+    #        x +   y + 2 z
+    #  subject to
+    #        x + 2 y + 3 z <= 4
+    #        x +   y       >= 1
+    #  x, y, z binary
+    from scipy.sparse import csr_matrix
+
+    c = array([-1, -1, -2])
+    A = csr_matrix(array([[1, 2, 3],
+                          [-1, -1, 0]]))  # A sparse matrix
+    b = array([4, -1])
+    vtypes = ["b", "b", "b"]
+
+    solution_highs = milp_highs(c, A=A, b=b, vtypes=vtypes)
+    print(solution_highs)
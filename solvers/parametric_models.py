@@ -0,0 +1,158 @@
+## Parametric solver models for the rolling horizon operation
+# In each operating process (OPF/ED/UC), the structure of the optimisation problem of each mode, i.e., c, Aeq, A and
+# vtypes, does not change between two operating cycles. Only the right hand sides (beq, b) and the boundaries (lb, ub)
+# are changed by the forecasting, the state of charge and the set-points.
+# Hence, the solver models are built once and only the vectors are updated before re-optimising.
+# When the structure changes, e.g., the parameters of the local sources are updated, the model is rebuilt.
+import threading
+from numpy import array, array_equal, inf, ones, nan
+from solvers.mix_integer_solvers import sparse_matrix
+from solvers.solver_registry import solver_backend, solver_selection
+from utils import Logger
+
+logger = Logger("Parametric_solver_models")
+
+
+class ParametricModel():
+    # The constraint matrices are converted once, and the vectors are passed to the solver at each cycle
+    def __init__(self, name, model):
+        self.name = name
+        self.nx = len(model["c"])
+        self.lock = threading.Lock()  # The model can not be updated when it is being solved
+        # The structure of the problem
+        self.c = array(model["c"], dtype=float).ravel()
+        self.vtypes = variable_types(model)
+        self.Aeq = sparse_matrix(model["Aeq"], self.nx)
+        self.A = sparse_matrix(model["A"], self.nx)
+        self.solver = solver_selection(name)
+
+    def match(self, model):
+        # Check whether the structure of the given problem is the same as the parametric model
+        if len(model["c"]) != self.nx or variable_types(model) != self.vtypes:
+            return False
+        if not array_equal(array(model["c"], dtype=float).ravel(), self.c):
+            return False
+        Aeq = sparse_matrix(model["Aeq"], self.nx)
+        A = sparse_matrix(model["A"], self.nx)
+        if Aeq.shape != self.Aeq.shape or A.shape != self.A.shape:
+            return False
+
+        return (Aeq != self.Aeq).nnz == 0 and (A != self.A).nnz == 0
+
+    def solve(self, model, opt=None):
+        return self.solver(self.c, Aeq=self.Aeq, beq=model["beq"], A=self.A, b=model["b"], xmin=model["lb"],
+                           xmax=model["ub"], vtypes=self.vtypes, opt=opt)
+
+
+class GurobiParametricModel(ParametricModel):
+    # The gurobi model is kept in memory, the RHS and the bounds are updated by the attributes
+    def __init__(self, name, model):
+        from gurobipy import Model
+        from solvers.mix_integer_solvers import gurobi_matrix_model
+        ParametricModel.__init__(self, name, model)
+        self.gurobi_model = Model("Parametric_MIP")
+        self.x = gurobi_matrix_model(self.gurobi_model, self.c, Aeq=self.Aeq, beq=model["beq"], A=self.A,
+                                     b=model["b"], xmin=model["lb"], xmax=model["ub"], vtypes=self.vtypes)
+        self.constraints = self.gurobi_model.getConstrs()  # The equality constraints are followed by inequalities
+        self.gurobi_model.Params.OutputFlag = 0
+        self.gurobi_model.Params.LogToConsole = 0
+        self.gurobi_model.Params.DisplayInterval = 1
+
+    def solve(self, model, opt=None):
+        from gurobipy import GurobiError
+        from solvers.mix_integer_solvers import mip_start
+        neq = self.Aeq.shape[0]
+        nineq = self.A.shape[0]
+        rhs = []
+        if neq != 0: rhs += array(model["beq"], dtype=float).ravel().tolist()
+        if nineq != 0: rhs += array(model["b"], dtype=float).ravel().tolist()
+        lb = model["lb"]
+        ub = model["ub"]
+        if lb is None or len(lb) == 0: lb = -inf * ones(self.nx)
+        if ub is None or len(ub) == 0: ub = inf * ones(self.nx)
+        try:
+            if len(rhs) != 0:
+                self.gurobi_model.setAttr("RHS", self.constraints, rhs)
+            self.gurobi_model.setAttr("LB", self.x, array(lb, dtype=float).ravel().tolist())
+            self.gurobi_model.setAttr("UB", self.x, array(ub, dtype=float).ravel().tolist())
+            if opt is not None and opt.get("x0") is not None:
+                mip_start(self.gurobi_model, self.x, opt["x0"])
+            else:  # Remove the start of the previous cycle
+                mip_start(self.gurobi_model, self.x, nan * ones(self.nx))
+            self.gurobi_model.optimize()
+            xx = [v.x for v in self.x]
+            obj = self.gurobi_model.ObjVal
+            success = 1
+
+        except GurobiError as e:
+            print('Error code ' + str(e.errno) + ": " + str(e))
+            success = 0
+            xx = [0] * self.nx
+            obj = 0
+
+        except AttributeError:
+            print('Encountered an attribute error')
+            success = 0
+            xx = [0] * self.nx
+            obj = 0
+
+        return xx, obj, success
+
+
+def variable_types(model):
+    # The variable types of the problem, the variables are continuous by default
+    if "vtypes" in model:
+        return list(model["vtypes"])
+    else:
+        return ["c"] * len(model["c"])
+
+
+parametric_backends = \
+    {
+        "gurobi": GurobiParametricModel,
+    }
+
+
+def parametric_model_generation(name, model):
+    # Generate the parametric model by using the selected solver
+    backend = solver_backend(name)
+    if backend in parametric_backends:
+        return parametric_backends[backend](name, model)
+    else:
+        return ParametricModel(name, model)
+
+
+def parametric_model_initialization(parametric_models, mode, model, name):
+    # Build the parametric model of the given mode, e.g., ("Idle", "Feasible"), at the start-up
+    parametric_models[mode] = parametric_model_generation(name, model)
+    logger.info("The parametric model {} has been built!".format(mode))
+
+
+def parametric_models_initialization(parametric_models, models, name):
+    # Build the parametric models of the modes at the start-up, e.g., {("Idle", "Feasible"): model}
+    for (mode, model) in models.items():
+        try:
+            parametric_model_initialization(parametric_models, mode, model, name)
+        except Exception as e:
+            logger.warning("The parametric model {0} will be built in the first cycle: {1}".format(mode, e))
+
+
+def parametric_solving(parametric_models, mode, model, name, opt=None):
+    # Solve the problem by using the parametric model of the given mode
+    parametric_model = parametric_models.get(mode)
+    if parametric_model is None or not parametric_model.match(model):
+        logger.info("The parametric model {} is (re)built!".format(mode))
+        parametric_model = parametric_model_generation(name, model)
+        parametric_models[mode] = parametric_model
+
+    if parametric_model.lock.acquire(blocking=False):
+        try:
+            (solution, obj, success) = parametric_model.solve(model, opt)
+        finally:
+            parametric_model.lock.release()
+    else:
+        # The previous cycle is still being solved after the gate closure, a temporal model is used.
+        logger.warning("The parametric model {} is busy!".format(mode))
+        (solution, obj, success) = parametric_model_generation(name, model).solve(model, opt)
+
+    return solution, obj, success
@@ -0,0 +1,128 @@
+## Solver executor with hard cancellation at the gate closure
+# The solving procedures run in the worker processes of a process pool, and the solutions are returned by the
+# asynchronous results. A thread can not be stopped, so an overdue solve in a thread keeps burning CPU after the gate
+# closure and delays the following cycles. Instead, the worker processes are terminated when a solve is overdue, and
+# the pool is restarted in the next cycle.
+# Each operating process (OPF/ED/UC) has its own executor, so that the cancellation of one process does not affect the
+# others. The workers are spawned so that the sockets and the database sessions of the main process are not inherited.
+# The parametric models of the start-up are built by each worker process when it is spawned (see initialization), and
+# are kept by the worker for the following cycles, hence they are rebuilt when the workers are restarted.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from multiprocessing import get_context, TimeoutError
+from configuration.configuration_runtime import default_runtime
+from utils import Logger
+
+logger = Logger("Solver_executor")
+
+# The bounded pool of the solving threads, the threads are reused by the cycles instead of being created in each cycle
+solving_threads = ThreadPoolExecutor(max_workers=default_runtime["Solving_threads"], thread_name_prefix="Solving")
+
+
+def timeout_result(nx, elapsed_time):
+    # The structured result of an overdue solve, which follows the failed solution of the solvers
+    return {"x": [0] * nx,
+            "obj": 0,
+            "success": False,
+            "status": "Timeout",
+            "time": elapsed_time}
+
+
+def error_result(nx, elapsed_time, error):
+    # The structured result of a solve that raises an exception in the worker process
+    return {"x": [0] * nx,
+            "obj": 0,
+            "success": False,
+            "status": "Error: {}".format(error),
+            "time": elapsed_time}
+
+
+class SolverExecutor():
+    def __init__(self, name, processes=2):
+        self.name = name  # The name of the operating process, e.g., "ED"
+        self.processes = processes  # The feasible and infeasible problems are solved simultaneously
+        self.lock = threading.Lock()
+        self.pool = None
+        self.initializer = (None, ())  # The function and the arguments run by each worker process when it is spawned
+
+    def start(self):
+        # Return the process pool, which is created in the first cycle or after the termination
+        with self.lock:
+            if self.pool is None:
+                self.pool = get_context("spawn").Pool(self.processes, *self.initializer)
+            return self.pool
+
+    def initialization(self, function, args):
+        """Spawn the worker processes at the start-up, each of them runs the function before the solves
+
+            @param function: the module level function, e.g., the build of the parametric models
+            @param args: the arguments of the function
+            """
+        self.initializer = (function, args)
+        self.start()
+
+    def terminate(self, pool):
+        # Kill the worker processes of the given pool, the overdue solves are stopped immediately
+        with self.lock:
+            if self.pool is not pool:  # The pool has been terminated by another overdue solve
+                return
+            self.pool = None
+        pool.terminate()
+        pool.join()
+        logger.warning("The solvers of {} are terminated at the gate closure!".format(self.name))
+
+    def solve(self, function, args, nx, deadline):
+        """Solve the problem in the process pool before the deadline
+
+            @param function: the solving procedure, which is a module level function
+            @param args: the arguments of the solving procedure
+            @param nx: the number of decision variables, which is used by the timeout result
+            @param deadline: the absolute time of the gate closure (s)
+            @return: the result of the solving procedure, or the timeout result when the solve is overdue
+            """
+        t0 = time.time()
+        pool = self.start()
+        task = pool.apply_async(function, args)
+        try:
+            res = task.get(max(deadline - time.time(), 0))
+        except TimeoutError:
+            self.terminate(pool)
+            return timeout_result(nx, time.time() - t0)
+        except Exception as e:
+            logger.error("The solver of {0} fails: {1}".format(self.name, e))
+            return error_result(nx, time.time() - t0, e)
+
+        res["status"] = "Finished"
+        return res
+
+
+class Deadline_Task():
+    # The solving task with the gate closure, which runs in the pool of the solving threads and is followed by its
+    # future, the overdue task is reported by the timeout result
+    def __init__(self, nx, timeout):
+        self.nx = nx  # The number of decision variables
+        self.t0 = time.time()
+        self.deadline = self.t0 + timeout  # The absolute time of the gate closure
+        self.cancellable = False  # True: the task returns by itself at the gate closure
+        self.value = 0
+        self.future = None
+
+    def run(self):
+        # The solving procedure, which sets the value
+        raise NotImplementedError
+
+    def start(self):
+        # Submit the task to the pool of the solving threads
+        self.future = solving_threads.submit(self.run)
+
+    def wait(self):
+        # Wait for the task until the gate closure, and return the result
+        (done, not_done) = wait([self.future], None if self.cancellable else max(self.deadline - time.time(), 0))
+        if done and self.future.exception() is not None:
+            logger.error("The solving task fails: {}".format(self.future.exception()))
+            self.value = error_result(self.nx, time.time() - self.t0, self.future.exception())
+        elif self.value == 0:
+            logger.warning("The solving task is overdue at the gate closure!")
+            self.value = timeout_result(self.nx, time.time() - self.t0)
+        return self.value
@@ -0,0 +1,86 @@
+## The solver registry for universal energy management system
+# All the registered solvers share the same interface:
+#   (x, obj, success) = solver(c, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtypes=None, opt=None)
+# The solvers are loaded on demand, so that the commercial packages are only imported when they are selected.
+# When the required package of the selected solver is not installed, the open-source solver is used instead.
+from importlib import import_module
+from importlib.util import find_spec
+from utils import Logger
+
+logger = Logger("Solver_registry")
+
+default_backend = "highs"  # The solver that can be used without any licence
+
+# name: (module, function, required package)
+solvers = \
+    {
+        "gurobi": ("solvers.mix_integer_solvers", "milp_gurobi", "gurobipy"),
+        "highs": ("solvers.open_source_solvers", "milp_highs", "scipy"),
+        "ips": ("solvers.interior_point_method", "lp_ips", "scipy"),
+    }
+
+# The quadratic programming solvers have the quadratic matrix as the second argument:
+#   (x, obj, success) = solver(c, Q, Aeq=None, beq=None, A=None, b=None, xmin=None, xmax=None, vtypes=None, opt=None)
+quadratic_solvers = \
+    {
+        "gurobi": ("solvers.mix_integer_solvers", "miqp_gurobi", "gurobipy"),
+        "ips": ("solvers.interior_point_method", "qp_ips", "scipy"),
+    }
+
+loaded_solvers = {}
+loaded_quadratic_solvers = {}
+
+
+def register_solver(name, module, function, package=None):
+    # Register a new solver, which should follow the interface of milp_gurobi
+    solvers[name] = (module, function, package)
+    if name in loaded_solvers:
+        del loaded_solvers[name]
+
+
+def available_solvers(*args):
+    # Return the registered solvers whose packages have been installed
+    return [name for name in solvers if solvers[name][2] is None or find_spec(solvers[name][2]) is not None]
+
+
+def solver_backend(name):
+    # Return the name of the solver that is actually used for the given solver name
+    backend = name
+    if backend not in solvers:
+        logger.error("The solver " + str(name) + " has not been registered!")
+        backend = default_backend
+    elif solvers[backend][2] is not None and find_spec(solvers[backend][2]) is None:
+        logger.warning("The package of solver " + str(name) + " is not installed!")
+        backend = default_backend
+    if backend != name:
+        logger.warning("The solver " + backend + " is used instead!")
+
+    return backend
+
+
+def solver_selection(name):
+    # Return the solving function of the given solver name
+    if name in loaded_solvers:
+        return loaded_solvers[name]
+
+    (module, function, package) = solvers[solver_backend(name)]
+    loaded_solvers[name] = getattr(import_module(module), function)
+
+    return loaded_solvers[name]
+
+
+def quadratic_solver_selection(name):
+    # Return the quadratic programming function of the given solver name, None means no solver can be used
+    if name in loaded_quadratic_solvers:
+        return loaded_quadratic_solvers[name]
+
+    if name not in quadratic_solvers:
+        logger.error("The quadratic solver " + str(name) + " has not been registered!")
+        return None
+    (module, function, package) = quadratic_solvers[name]
+    if package is not None and find_spec(package) is None:
+        logger.error("The package of quadratic solver " + str(name) + " is not installed!")
+        return None
+    loaded_quadratic_solvers[name] = getattr(import_module(module), function)
+
+    return loaded_quadratic_solvers[name]
@@ -0,0 +1,67 @@
+## Warm start of the rolling horizon operation
+# The look ahead horizons of two successive cycles are overlapped, e.g., 11 of the 12 time steps in ED and 47 of the
+# 48 time steps in UC. The solution of the previous cycle is shifted by the elapsed time steps, and the last time step
+# is repeated to fill the end of the horizon. The shifted solution is passed to the solver as the MIP start.
+# The solution vector is formulated as [area_0(t=0), area_0(t=1), ..., area_1(t=0), ...], and each of them has NX
+# variables. The line flows and the slack variables of the elastic problem appended after the areas are shifted in the
+# same way.
+from numpy import array, full, nan, isnan, concatenate
+
+
+class WarmStart():
+    def __init__(self, T, time_step, formats):
+        self.T = T  # The look ahead time steps
+        self.time_step = time_step  # The time step of the operating process (s)
+        self.formats = formats  # The variable layout of each mode, see modelling.power_flow.layout
+        self.solutions = {}  # The solution of each mode, e.g., {("Idle", "Feasible"): (Target_time, x)}
+        self.commitments = {}  # The commitment of each variable, e.g., {"IG": (Target_time, [[1,1,...], [0,1,...]])}
+
+    def store(self, mode, Target_time, x):
+        # Store the solution of the given mode
+        self.solutions[mode] = (Target_time, array(x, dtype=float))
+
+    def store_commitment(self, field, Target_time, commitments):
+        # Store the commitment of the given variable in each area, which is used by all the modes
+        self.commitments[field] = (Target_time, array(commitments, dtype=float).reshape(-1, self.T))
+
+    def elapsed_steps(self, time_stamp, Target_time):
+        # Return the elapsed time steps, None means the horizons are not overlapped
+        steps = int(round((Target_time - time_stamp) / self.time_step))
+        if steps < 0 or steps >= self.T:
+            return None
+        return steps
+
+    def shift(self, x, steps):
+        # Shift the solution along the time axis, x is formulated as (area, time, variable)
+        x0 = x.copy()
+        x0[:, 0:self.T - steps, :] = x[:, steps:self.T, :]
+        x0[:, self.T - steps:self.T, :] = x[:, self.T - 1:self.T, :]
+        return x0
+
+    def start_vector(self, mode, Target_time, nx, N):
+        # Return the start vector of the given mode, nan means the start value of the variable is undefined
+        # N is the number of areas of the formulation, the appended variables can be more than NX*T
+        NX = self.formats[mode].NX
+        nf = nx - N * self.T * NX  # The number of appended variables, i.e., line flows and slack variables
+        if N == 0 or nf < 0 or nf % self.T != 0:
+            return None
+        x0 = full((N, self.T, NX), nan)
+        f0 = full((nf // self.T, self.T, 1), nan)
+
+        if mode in self.solutions:
+            (time_stamp, x) = self.solutions[mode]
+            steps = self.elapsed_steps(time_stamp, Target_time)
+            if steps is not None and x.shape[0] == nx:
+                x0 = self.shift(x[0:N * self.T * NX].reshape(x0.shape), steps)
+                f0 = self.shift(x[N * self.T * NX:nx].reshape(f0.shape), steps)
+
+        for field in self.commitments:
+            (time_stamp, commitments) = self.commitments[field]
+            steps = self.elapsed_steps(time_stamp, Target_time)
+            if steps is not None and commitments.shape[0] == x0.shape[0] and hasattr(self.formats[mode], field):
+                commitments = self.shift(commitments.reshape(-1, self.T, 1), steps)
+                x0[:, :, getattr(self.formats[mode], field)] = commitments[:, :, 0]
+
+        if isnan(x0).all():
+            return None
+        return concatenate([x0.ravel(), f0.ravel()])
@@ -3,7 +3,7 @@
 from modelling import generators, loads, energy_storage_systems, convertors, transmission_lines  # Import modellings
 from utils import Logger
 from configuration.configuration_time_line import default_look_ahead_time_step# The look ahead time is adopted to
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
 
 class StartUpLems():
     ## The start up class of UEMS
@@ -30,9 +30,9 @@ class StartUpLems():
         T_middle = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]# The look ahead time step for middle term operation
         T_long = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]# The look ahead time step for long term operation
         # Update information
-        local_model_short = deepcopy(local_models)
-        local_model_middle = deepcopy(local_models)
-        local_model_long = deepcopy(local_models)
+        local_model_short = snapshot(local_models)
+        local_model_middle = snapshot(local_models)
+        local_model_long = snapshot(local_models)
 
         # Generate middle term operation model for local ems, these information should be updated according to the database of resource manager
         local_model_middle["UG"]["GEN_STATUS"] = [local_model_middle["UG"]["GEN_STATUS"]] * T_middle
@@ -7,7 +7,9 @@ from modelling import generators, loads, energy_storage_systems, convertors, tra
 from start_up import static_information_update
 from utils import Logger
 from configuration.configuration_time_line import default_look_ahead_time_step# The look ahead time is adopted to
-from copy import deepcopy
+from configuration.configuration_information import default_information
+from data_management.information_schema import handshake, handshake_schema
+from modelling.microgrid_state import snapshot
 
 class start_up_ems():
     ## The start up class of UEMS
@@ -18,12 +20,16 @@ class start_up_ems():
         Conenction_time_max = 100
         logger = Logger("Universal_ems_start_up")
         Operation_mode = 1  # 1=Work as a universal EMS; 2=Work as a local EMS.
+        schema = 1  # The schema of the dynamic information, see information_schema
 
         while True:
             message = socket.recv()
-            if message == b"ConnectionRequest":
+            requested = handshake_schema(message, b"ConnectionRequest")  # The highest schema of the local ems
+            if requested is not None:
+                schema = min(requested, default_information["Schema"])
                 logger.info("The connection between the local EMS and universal EMS establishes!")
-                socket.send(b"Start!")
+                logger.info("The dynamic information is exchanged by schema {}".format(schema))
+                socket.send(handshake(b"Start!", schema))
                 break
             else:
                 logger.error("Waiting for the connection between the local EMS and universal EMS!")
@@ -76,9 +82,9 @@ class start_up_ems():
             T_middle = default_look_ahead_time_step["Look_ahead_time_ed_time_step"]# The look ahead time step for middle term operation
             T_long = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]# The look ahead time step for long term operation
             # Update information
-            local_model_short = deepcopy(local_models)
-            local_model_middle = deepcopy(local_models)
-            local_model_long = deepcopy(local_models)
+            local_model_short = snapshot(local_models)
+            local_model_middle = snapshot(local_models)
+            local_model_long = snapshot(local_models)
 
             # Generate middle term operation model for local ems, these information should be updated according to the database of resource manager
             local_model_middle["UG"]["GEN_STATUS"] = [local_model_middle["UG"]["GEN_STATUS"]] * T_middle
@@ -108,9 +114,9 @@ class start_up_ems():
             local_model_long["BIC"]["STATUS"] = [local_model_long["BIC"]["STATUS"]] * T_long
             local_model_long["ESS"]["STATUS"] = [local_model_long["ESS"]["STATUS"]] * T_long
 
-            universal_model_short = deepcopy(universal_models)
-            universal_model_middle = deepcopy(universal_models)
-            universal_model_long = deepcopy(universal_models)
+            universal_model_short = snapshot(universal_models)
+            universal_model_middle = snapshot(universal_models)
+            universal_model_long = snapshot(universal_models)
 
             # Generate middle term operation model for universal ems, these information should be updated according to the database of resource manager
             universal_model_middle["UG"]["GEN_STATUS"] = [universal_model_middle["UG"]["GEN_STATUS"]] * T_middle
@@ -142,7 +148,7 @@ class start_up_ems():
             universal_model_long["BIC"]["STATUS"] = [universal_model_long["BIC"]["STATUS"]] * T_long
             universal_model_long["ESS"]["STATUS"] = [universal_model_long["ESS"]["STATUS"]] * T_long
 
-            return local_model_short, local_model_middle, local_model_long, universal_model_short,universal_model_middle,universal_model_long, Operation_mode
+            return local_model_short, local_model_middle, local_model_long, universal_model_short,universal_model_middle,universal_model_long, Operation_mode, schema
 
         else:
             local_models = {"DG": generators.Generator_AC.copy(),
@@ -165,9 +171,9 @@ class start_up_ems():
             T_long = default_look_ahead_time_step[
                 "Look_ahead_time_uc_time_step"]  # The look ahead time step for long term operation
             # Update information
-            local_model_short = deepcopy(local_models)
-            local_model_middle = deepcopy(local_models)
-            local_model_long = deepcopy(local_models)
+            local_model_short = snapshot(local_models)
+            local_model_middle = snapshot(local_models)
+            local_model_long = snapshot(local_models)
 
             # Generate middle term operation model for local ems, these information should be updated according to the database of resource manager
             local_model_middle["UG"]["GEN_STATUS"] = [local_model_middle["UG"]["GEN_STATUS"]] * T_middle
@@ -197,5 +203,5 @@ class start_up_ems():
             local_model_long["BIC"]["STATUS"] = [local_model_long["BIC"]["STATUS"]] * T_long
             local_model_long["ESS"]["STATUS"] = [local_model_long["ESS"]["STATUS"]] * T_long
 
-            return local_model_short, local_model_middle, local_model_long, Operation_mode
+            return local_model_short, local_model_middle, local_model_long, Operation_mode, schema
 
@@ -5,14 +5,13 @@
 This part of work follows LiSong's work.
 
 """
-from forecasting.long_term_forecasting import long_term_forecasting_pv_history, long_term_forecasting_wp_history, \
-    long_term_forecasting_load_ac_history, long_term_forecasting_load_dc_history, long_term_forecasting_load_uac_history, \
-    long_term_forecasting_load_udc_history
+from forecasting.long_term_forecasting import long_term_forecasting_history
 from configuration.configuration_time_line import default_look_ahead_time_step
 
 import threading
 from utils import Logger
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
+from data_management.database_engine import session_task
 logger = Logger("Long_term_forecasting")
 
 
@@ -24,6 +23,7 @@ class ForecastingThread(threading.Thread):
         self.Target_time = Target_time
         self.models = models
 
+    @session_task  # The sessions of the forecasting thread are removed at the end
     def run(self):
         self.models = long_term_forecasting(self.session, self.Target_time, self.models)
 
@@ -31,7 +31,7 @@ class ForecastingThread(threading.Thread):
 def long_term_forecasting(*args):
     session = args[0]
     Target_time = args[1]
-    models = deepcopy(args[2])
+    models = snapshot(args[2])
     T = default_look_ahead_time_step["Look_ahead_time_uc_time_step"] # The look ahead horizon of unit commitment
     models["PV"]["PG"] = []
     models["WP"]["PG"] = []
@@ -39,12 +39,11 @@ def long_term_forecasting(*args):
     models["Load_uac"]["PD"] = []
     models["Load_dc"]["PD"] = []
     models["Load_udc"]["PD"] = []
-    pv_profile = long_term_forecasting_pv_history(session, Target_time)
-    wp_profile = long_term_forecasting_wp_history(session, Target_time)
-    load_ac = long_term_forecasting_load_ac_history(session, Target_time)
-    load_uac = long_term_forecasting_load_uac_history(session, Target_time)
-    load_dc = long_term_forecasting_load_dc_history(session, Target_time)
-    load_udc = long_term_forecasting_load_udc_history(session, Target_time)
+    # All the series of the look ahead horizon are forecasted together
+    profiles = long_term_forecasting_history(session, Target_time)
+    (pv_profile, wp_profile) = (profiles["PV_PG"], profiles["WP_PG"])
+    (load_ac, load_uac) = (profiles["AC_PD"], profiles["UAC_PD"])
+    (load_dc, load_udc) = (profiles["DC_PD"], profiles["UDC_PD"])
 
     for i in range(T):
         # Update the forecasting result of PV
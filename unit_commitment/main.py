@@ -12,10 +12,15 @@ from data_management.information_management import information_formulation_extra
 from data_management.information_management import information_receive_send
 from unit_commitment.long_tertm_forecasting import ForecastingThread
 from utils import Logger
-from copy import deepcopy
+from modelling.microgrid_state import snapshot
 from unit_commitment.input_check import input_check_long_term
 from unit_commitment.output_check import output_local_check
 from unit_commitment.long2middle import long2middle_opeartion
+from modelling.sparse_formulation import elastic_fields, elastic_slacks
+from configuration.configuration_eps import default_eps
+from modelling.solution_decoder import solution_decoder
+from modelling.power_flow.layout import variable_layout
+
 logger_uems = Logger("Long_term_dispatch_UEMS")
 logger_lems = Logger("Long_term_dispatch_LEMS")
 
@@ -25,16 +30,13 @@ class long_term_operation():
     def long_term_operation_uems(*args):
         # Short term forecasting for the middle term operation in universal energy management system.
         from data_management.database_management import database_operation
-        from unit_commitment.problem_formulation import problem_formulation
-        from unit_commitment.problem_solving import Solving_Thread
-        from configuration.configuration_time_line import default_dead_line_time
         # Short term operation
         # General procedure for middle-term operation
         # 1)Information collection
         # 1.1)local EMS forecasting
         # 1.2)Information exchange
-        universal_models = deepcopy(args[0])
-        local_models = deepcopy(args[1])
+        universal_models = snapshot(args[0])
+        local_models = snapshot(args[1])
         socket_upload = args[2]
         socket_download = args[3]
         info = args[4]
@@ -57,55 +59,94 @@ class long_term_operation():
         universal_models = thread_forecasting.models
         local_models = thread_info_ex.local_models
 
+        (local_models, universal_models) = long_term_operation.operation_solving(local_models, universal_models,
+                                                                                 Target_time)
+
+        # Return command to the local ems
+        local_models["COMMAND_TYPE"] = 0
+        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time, "UC",
+                                                                                    info)
+        dynamic_model.TIME_STAMP_COMMAND = round(time.time())
+
+        information_send_thread = threading.Thread(target=information_receive_send.information_send,
+                                                   args=(socket_upload, dynamic_model, 2))
+
+        long2middle_opeartion(Target_time, session, universal_models)
+        logger_uems.info("The command for UEMS is {}".format(universal_models["PMG"]))
+        information_send_thread.start()
+
+        # The result is recorded by the write-behind recorder after the command is sent
+        database_operation.database_record(session, universal_models, Target_time, "UC")
+        information_send_thread.join()
+
+    def operation_solving(*args):
+        # Solve the unit commitment problem of the collected models, and return the commands of the models
+        from unit_commitment.problem_formulation import problem_formulation
+        from unit_commitment.problem_solving import Solving_Thread, warm_start
+        from configuration.configuration_solvers import default_solver
+        local_models = args[0]
+        universal_models = args[1]
+        Target_time = args[2]
+
         local_models = input_check_long_term.model_local_check(local_models)
         universal_models = input_check_long_term.model_universal_check(universal_models)
         # Solve the optimal power flow problem
         # Two threads will be created, one for feasible problem, the other for infeasible problem
         # universal_models["ESS"]["SOC"]=universal_models["ESS"]["SOC_MIN"], the test shows that, the input check is necessary.
 
-        mathematical_model = problem_formulation.problem_formulation_universal(local_models, universal_models,
-                                                                               "Feasible")
-        mathematical_model_recovery = problem_formulation.problem_formulation_universal(local_models, universal_models,
-                                                                                        "Infeasible")
         # Solve the problem
-        res = Solving_Thread(mathematical_model)
-        res_recovery = Solving_Thread(mathematical_model_recovery)
-        res.daemon = True
-        res_recovery.daemon = True
-
-        res.start()
-        res_recovery.start()
-
-        res.join(default_dead_line_time["Gate_closure_uc"])
-        res_recovery.join(default_dead_line_time["Gate_closure_uc"])
-
-        if res.value["success"] == True:
+        if default_solver["Elastic"]:
+            # One elastic problem, the load shedding and renewable energy curtailment are penalised slack variables
+            mathematical_model = problem_formulation.problem_formulation_universal(local_models, universal_models,
+                                                                                   "Elastic")
+            x0 = warm_start.start_vector(("Idle", "Elastic"), Target_time, len(mathematical_model["c"]),
+                                         mathematical_model["N"])
+            res = Solving_Thread(mathematical_model, ("Idle", "Elastic"), x0)
+            threads = [(res, "Elastic", x0)]
+        else:
+            mathematical_model = problem_formulation.problem_formulation_universal(local_models, universal_models,
+                                                                                   "Feasible")
+            mathematical_model_recovery = problem_formulation.problem_formulation_universal(local_models,
+                                                                                            universal_models,
+                                                                                            "Infeasible")
+            # The solutions and commitments of previous cycle are shifted to warm start the solvers
+            x0 = warm_start.start_vector(("Idle", "Feasible"), Target_time, len(mathematical_model["c"]),
+                                         mathematical_model["N"])
+            x0_recovery = warm_start.start_vector(("Idle", "Infeasible"), Target_time,
+                                                  len(mathematical_model_recovery["c"]),
+                                                  mathematical_model_recovery["N"])
+            res = Solving_Thread(mathematical_model, ("Idle", "Feasible"), x0)
+            res_recovery = Solving_Thread(mathematical_model_recovery, ("Idle", "Infeasible"), x0_recovery)
+            threads = [(res, "Feasible", x0), (res_recovery, "Infeasible", x0_recovery)]
+
+        for (thread, type, start) in threads:
+            thread.start()
+        for (thread, type, start) in threads:
+            thread.wait()  # The overdue solves are reported by the timeout results at the gate closure
+
+        for (thread, type, start) in threads:
+            if thread.value["success"] is True:
+                warm_start.store(("Idle", type), Target_time, thread.value["x"])
+                logger_uems.info("The {0} UC problem is solved in {1:.3f}s with {2} start".format(
+                    type, thread.value["time"], "cold" if start is None else "warm"))
+        if threads[0][1] == "Elastic":
+            (local_models, universal_models) = result_update(res.value, local_models, universal_models, "Elastic",
+                                                             mathematical_model["N"])
+        elif res.value["success"] == True:
             (local_models, universal_models) = result_update(res.value, local_models, universal_models, "Feasible")
         else:
             (local_models, universal_models) = result_update(res_recovery.value, local_models, universal_models,
                                                              "Infeasible")
+        # The commitments are shared by the feasible and infeasible problems
+        warm_start.store_commitment("IG", Target_time, [local_models["DG"]["COMMAND_START_UP"],
+                                                        universal_models["DG"]["COMMAND_START_UP"]])
+        warm_start.store_commitment("IUG", Target_time, [local_models["UG"]["COMMAND_START_UP"],
+                                                         universal_models["UG"]["COMMAND_START_UP"]])
 
         local_models = output_local_check(local_models)
         universal_models = output_local_check(universal_models)
 
-        # Return command to the local ems
-        local_models["COMMAND_TYPE"] = 0
-        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time,"UC")
-        dynamic_model.TIME_STAMP_COMMAND = round(time.time())
-
-        information_send_thread = threading.Thread(target=information_receive_send.information_send,
-                                                   args=(socket_upload, dynamic_model, 2))
-
-        database_operation_uems = threading.Thread(target=database_operation.database_record,
-                                                    args=(session, universal_models, Target_time, "UC"))
-
-        long2middle_opeartion(Target_time, session, universal_models)
-        logger_uems.info("The command for UEMS is {}".format(universal_models["PMG"]))
-        information_send_thread.start()
-        database_operation_uems.start()
-
-        information_send_thread.join()
-        database_operation_uems.join()
+        return local_models, universal_models
 
     def long_term_operation_lems(*args):
         from data_management.database_management import database_operation
@@ -115,7 +156,7 @@ class long_term_operation():
         # 2) Short-term forecasting
         # 3) Information upload and database store
         # 4) Download command and database operation
-        local_models = deepcopy(args[0])  # Local energy management system models
+        local_models = snapshot(args[0])  # Local energy management system models
         socket_upload = args[1]  # Upload information channel
         socket_download = args[2]  # Download information channel
         info = args[3]  # Information structure
@@ -133,7 +174,8 @@ class long_term_operation():
         local_models = thread_forecasting.models
         # Update the dynamic model
         local_models["COMMAND_TYPE"] = 0
-        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time,"UC")
+        dynamic_model = information_formulation_extraction_dynamic.info_formulation(local_models, Target_time, "UC",
+                                                                                    info)
         # Information send
         logger_lems.info("Sending request from {}".format(dynamic_model.AREA) + " to the serve")
         logger_lems.info("The local time is {}".format(dynamic_model.TIME_STAMP))
@@ -143,18 +185,39 @@ class long_term_operation():
         # Receive information from uems
         dynamic_model = information_receive_send.information_receive(socket_upload, info, 2)
         # print("The universal time is", dynamic_model.TIME_STAMP_COMMAND)
-        logger_lems.info("The command from UEMS is {}".format(dynamic_model.PMG))
         # Store the data into the database
 
         local_models = information_formulation_extraction_dynamic.info_extraction(local_models, dynamic_model)
+        logger_lems.info("The command from UEMS is {}".format(local_models["PMG"]))
 
         long2middle_opeartion(Target_time, session, local_models)
 
-        database_operation_lems = threading.Thread(target=database_operation.database_record,
-                                                    args=(session, local_models, Target_time, "UC"))
+        database_operation.database_record(session, local_models, Target_time, "UC")
 
-        database_operation_lems.start()
-        database_operation_lems.join()
+    def parametric_model_initialization(*args):
+        # Build the parametric models of each mode at the start-up.
+        # In the long term operation, only the right hand sides and boundaries of these models are updated.
+        from unit_commitment.problem_formulation import problem_formulation
+        from unit_commitment.problem_solving import executor, parametric_startup
+        from configuration.configuration_solvers import default_solver
+        universal_models = input_check_long_term.model_universal_check(args[0])
+        local_models = input_check_long_term.model_local_check(args[1])
+
+        formulation = {"Idle": problem_formulation}
+        types = ["Elastic"] if default_solver["Elastic"] else ["Feasible", "Infeasible"]
+        models = {}
+        for mode in formulation:
+            for type in types:
+                try:
+                    models[(mode, type)] = formulation[mode].problem_formulation_universal(local_models,
+                                                                                           universal_models, type)
+                except:
+                    logger_uems.warning("The parametric model ({0}, {1}) will be built in the first cycle!".format(
+                        mode, type))
+        if default_solver["Process_pool"]:  # The problems are solved, and the models are kept, by the worker processes
+            executor.initialization(parametric_startup, (models, default_solver["Solver_uc"]))
+        else:
+            parametric_startup(models, default_solver["Solver_uc"])
 
 
 def result_update(*args):
@@ -165,130 +228,46 @@ def result_update(*args):
     type = args[3]
     T = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]
 
-    if type == "Feasible":
-        from modelling.power_flow.idx_uc_format import NX
-    else:
-        from modelling.power_flow.idx_uc_recovery_format import NX
-
-    nx = T * NX
+    nx = T * solution_format(type).NX
     x_local = res["x"][0:nx]
     x_universal = res["x"][nx:2*nx]
 
-    local_model = update(x_local, local_model, type)
-    universal_model = update(x_universal, universal_model, type)
+    if type == "Elastic" and res["success"] is not True:
+        # The elastic problem is not solved, e.g., it is overdue at the gate closure, the former commands are kept
+        logger_uems.warning("The elastic UC problem fails: {}".format(res.get("status")))
+        local_model["success"] = False
+        universal_model["success"] = False
+    elif type == "Elastic":
+        # The elastic problem is decoded as the feasible problem, and the shedding commands are the slack variables
+        local_model = update(x_local, local_model, "Feasible")
+        universal_model = update(x_universal, universal_model, "Feasible")
+        slacks = elastic_slacks(res["x"], args[4], T)  # args[4] is the number of areas
+        for (model, slack) in [(local_model, slacks[0]), (universal_model, slacks[-1])]:
+            for i in range(len(elastic_fields)):
+                (device, command) = elastic_fields[i][0:2]
+                model[device][command] = [int(value) for value in slack[i]]
+            model["success"] = bool(slack.max() < default_eps["UC"])  # No load is shed and no RES is curtailed
+    else:
+        local_model = update(x_local, local_model, type)
+        universal_model = update(x_universal, universal_model, type)
 
     return local_model, universal_model
 
 
+def solution_format(type):
+    # The variable layout of the solution, the elastic problem is decoded as the feasible problem
+    return variable_layout("UC", "Idle", type)
+
+
 def update(*args):
     x = args[0]
     model = args[1]
     type = args[2]
 
     T = default_look_ahead_time_step["Look_ahead_time_uc_time_step"]
+    # The commands are decoded by the field map of the format, the curtailment and shedding of the recovery problem are
+    # the forecasting minus the served power
+    model = solution_decoder(solution_format(type)).decode(x, model, T)
+    model["success"] = type == "Feasible"
 
-    if type == "Feasible":
-        from modelling.power_flow.idx_uc_format import IG, PG, RG, IUG, PUG, RUG, PBIC_AC2DC, PBIC_DC2AC, PESS_C, PESS_DC, RESS,EESS,\
-            PMG, NX
-        model["DG"]["COMMAND_START_UP"] = [0] * T
-        model["DG"]["COMMAND_PG"] = [0] * T
-        model["DG"]["COMMAND_RG"] = [0] * T
-
-        model["UG"]["COMMAND_START_UP"] = [0] * T
-        model["UG"]["COMMAND_PG"] = [0] * T
-        model["UG"]["COMMAND_RG"] = [0] * T
-
-        model["BIC"]["COMMAND_AC2DC"] = [0] * T
-        model["BIC"]["COMMAND_DC2AC"] = [0] * T
-
-        model["ESS"]["COMMAND_PG"] = [0] * T
-        model["ESS"]["COMMAND_RG"] = [0] * T
-        model["ESS"]["SOC"] = [0]*T
-
-        model["PV"]["COMMAND_CURT"] = [0] * T
-        model["WP"]["COMMAND_CURT"] = [0] * T
-
-        model["PMG"] = [0] * T
-
-        model["Load_ac"]["COMMAND_SHED"] = [0] * T
-        model["Load_uac"]["COMMAND_SHED"] = [0] * T
-        model["Load_dc"]["COMMAND_SHED"] = [0] * T
-        model["Load_udc"]["COMMAND_SHED"] = [0] * T
-
-        for i in range(T):
-            model["DG"]["COMMAND_START_UP"][i] = int(x[i * NX + IG])
-            model["DG"]["COMMAND_PG"][i] = int(x[i * NX + PG])
-            model["DG"]["COMMAND_RG"][i] = int(x[i * NX + RG])
-
-            model["UG"]["COMMAND_START_UP"][i] = int(x[i * NX + IUG])
-            model["UG"]["COMMAND_PG"][i] = int(x[i * NX + PUG])
-            model["UG"]["COMMAND_RG"][i] = int(x[i * NX + RUG])
-
-            model["BIC"]["COMMAND_AC2DC"][i] = int(x[i * NX + PBIC_AC2DC])
-            model["BIC"]["COMMAND_DC2AC"][i] = int(x[i * NX + PBIC_DC2AC])
-
-            model["ESS"]["COMMAND_PG"][i] = int(x[i * NX + PESS_DC] - x[i * NX + PESS_C])
-            model["ESS"]["COMMAND_RG"][i] = int(x[i * NX + RESS])
-            model["ESS"]["SOC"][i] = x[i*NX+EESS]/model["ESS"]["CAP"]
-
-            model["PMG"][i] = int(x[i * NX + PMG])
-
-        model["success"] = True
-    else:
-        from modelling.power_flow.idx_uc_recovery_format import IG, PG, RG, IUG, PUG, RUG, PBIC_AC2DC, PBIC_DC2AC, PESS_C,EESS, \
-            PESS_DC, RESS, PMG, PPV, PWP, PL_AC, PL_UAC, PL_DC, PL_UDC, NX
-
-        model["DG"]["COMMAND_START_UP"] = [0] * T
-        model["DG"]["COMMAND_PG"] = [0] * T
-        model["DG"]["COMMAND_RG"] = [0] * T
-
-        model["UG"]["COMMAND_START_UP"] = [0] * T
-        model["UG"]["COMMAND_PG"] = [0] * T
-        model["UG"]["COMMAND_RG"] = [0] * T
-
-        model["BIC"]["COMMAND_AC2DC"] = [0] * T
-        model["BIC"]["COMMAND_DC2AC"] = [0] * T
-
-        model["ESS"]["COMMAND_PG"] = [0] * T
-        model["ESS"]["COMMAND_RG"] = [0] * T
-        model["ESS"]["SOC"] = [0] * T
-
-        model["PV"]["COMMAND_CURT"] = [0] * T
-        model["WP"]["COMMAND_CURT"] = [0] * T
-
-        model["PMG"] = [0] * T
-
-        model["Load_ac"]["COMMAND_SHED"] = [0] * T
-        model["Load_uac"]["COMMAND_SHED"] = [0] * T
-        model["Load_dc"]["COMMAND_SHED"] = [0] * T
-        model["Load_udc"]["COMMAND_SHED"] = [0] * T
-
-        for i in range(T):
-            # Update the solutions
-            model["DG"]["COMMAND_START_UP"][i] = int(x[i * NX + IG])
-            model["DG"]["COMMAND_PG"][i] = int(x[i * NX + PG])
-            model["DG"]["COMMAND_RG"][i] = int(x[i * NX + RG])
-
-            model["UG"]["COMMAND_START_UP"][i] = int(x[i * NX + IUG])
-            model["UG"]["COMMAND_PG"][i] = int(x[i * NX + PUG])
-            model["UG"]["COMMAND_RG"][i] = int(x[i * NX + RUG])
-
-            model["BIC"]["COMMAND_AC2DC"][i] = int(x[i * NX + PBIC_AC2DC])
-            model["BIC"]["COMMAND_DC2AC"][i] = int(x[i * NX + PBIC_DC2AC])
-
-            model["ESS"]["COMMAND_PG"][i] = int(x[i * NX + PESS_DC] - x[i * NX + PESS_C])
-            model["ESS"]["COMMAND_RG"][i] = int(x[i * NX + RESS])
-            model["ESS"]["SOC"][i] = x[i * NX + EESS]/model["ESS"]["CAP"]
-
-            model["PMG"][i] = int(x[i * NX + PMG])
-
-            model["PV"]["COMMAND_CURT"][i] = int(x[i * NX + PPV])
-            model["WP"]["COMMAND_CURT"][i] = int(x[i * NX + PWP])
-
-            model["Load_ac"]["COMMAND_SHED"][i] = int(x[i * NX + PL_AC])
-            model["Load_uac"]["COMMAND_SHED"][i] = int(x[i * NX + PL_UAC])
-            model["Load_dc"]["COMMAND_SHED"][i] = int(x[i * NX + PL_DC])
-            model["Load_udc"]["COMMAND_SHED"][i] = int(x[i * NX + PL_UDC])
-
-        model["success"] = False
-    return model
\ No newline at end of file
+    return model
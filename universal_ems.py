@@ -17,14 +17,19 @@ from apscheduler.schedulers.blocking import BlockingScheduler  # Scheduler is ba
 
 import configuration.configuration_database as db_configuration  # The settings of databases
 
-from sqlalchemy import create_engine  # Import the database toolbox
-from sqlalchemy.orm import sessionmaker
+from data_management.database_engine import database_session, session_task, log_pool_status
+from data_management.information_gateway import InformationGateway, AsyncInformationGateway
+from configuration.configuration_time_line import default_collection_time
+from configuration.configuration_runtime import default_runtime
+from runtime.operation_runtime import OperationRuntime
+from runtime.operation_cycles import universal_cycle
 
 from utils import Logger  # The utility function import from LongQi' work
 
 import modelling.information_exchange_pb2 as opf_model  # The information model of optimal power flow
-import modelling.dynamic_operation_pb2 as economic_dispatch_info  # The information model of economic dispatch
+from data_management.information_schema import dynamic_information  # The information model of economic dispatch
 import zmq  # The information channel
+import zmq.asyncio
 
 from unit_commitment.main import long_term_operation  # long term operation
 from economic_dispatch.main import middle_term_operation  # middle term operation
@@ -41,28 +46,18 @@ class Main():
         try:
             (self.local_model_short, self.local_model_middle, self.local_model_long, self.universal_model_short,
              self.universal_model_middle, self.universal_model_long,
-             self.operation_mode) = start_up.start_up_uems.start_up_ems.start_up(self.socket)
+             self.operation_mode, self.schema) = start_up.start_up_uems.start_up_ems.start_up(self.socket)
         except:
             (self.local_model_short, self.local_model_middle, self.local_model_long,
-             self.operation_mode) = start_up.start_up_uems.start_up_ems.start_up(self.socket)
+             self.operation_mode, self.schema) = start_up.start_up_uems.start_up_ems.start_up(self.socket)
 
 
 def run():
     ## Operation process for UEMS
     logger = Logger('Universal_ems_main')  # The logger system has been started
     db_str = db_configuration.universal_database["db_str"]  # Database format
-    engine = create_engine(db_str, echo=False)  # Create engine for universal energy management system databases
-    Session = sessionmaker(bind=engine)  # Create engine for target database
-
-    engine_middle = create_engine(db_str, echo=False)
-    Session_middle = sessionmaker(bind=engine_middle)
-    session_uems_short = Session()  # Create session for universal energy management system
-
-    session_uems_middle = Session_middle()  # Create session for universal energy management system
-
-    engine_long = create_engine(db_str, echo=False)
-    Session_long = sessionmaker(bind=engine_long)
-    session_uems_long = Session_long()  # Create session for universal energy management system
+    # The jobs share the engine and the connection pool, and each job takes its own session by the scoped session
+    session_uems = database_session(db_str)
     IP = "*"
     # IP = "10.25.255.84"
     # Start the information connection
@@ -70,14 +65,14 @@ def run():
     socket = context.socket(zmq.REP)
     socket.bind("tcp://" + IP + ":5555")
 
-    socket_upload = context.socket(zmq.REP)  # Upload information channel for local EMS
-    socket_upload.bind("tcp://" + IP + ":5556")
-
-    socket_upload_ed = context.socket(zmq.REP)  # Upload information channel for local EMS
-    socket_upload_ed.bind("tcp://" + IP + ":5557")
-
-    socket_upload_uc = context.socket(zmq.REP)  # Upload information channel for local EMS
-    socket_upload_uc.bind("tcp://" + IP + ":5558")
+    # Upload information channels for local EMSs, the gateways collect the uploads of the local EMSs concurrently
+    if default_runtime["Runtime"] == "asyncio":  # The uploads are awaited by the event loop
+        (context_upload, Gateway) = (zmq.asyncio.Context(), AsyncInformationGateway)
+    else:
+        (context_upload, Gateway) = (context, InformationGateway)
+    socket_upload = Gateway(context_upload, "tcp://" + IP + ":5556", default_collection_time["Collection_time_opf"])
+    socket_upload_ed = Gateway(context_upload, "tcp://" + IP + ":5557", default_collection_time["Collection_time_ed"])
+    socket_upload_uc = Gateway(context_upload, "tcp://" + IP + ":5558", default_collection_time["Collection_time_uc"])
 
     socket_download = context.socket(zmq.REQ)  # Download information channel for local EMS
     socket_download.bind("tcp://" + IP + ":5559")
@@ -91,39 +86,62 @@ def run():
     universal_model_short = initialize.universal_model_short
     universal_model_middle = initialize.universal_model_middle
     universal_model_long = initialize.universal_model_long
+    # Build the parametric models of each operating process
+    short_term_operation.parametric_model_initialization(universal_model_short, local_model_short)
+    middle_term_operation.parametric_model_initialization(universal_model_middle, local_model_middle)
+    long_term_operation.parametric_model_initialization(universal_model_long, local_model_long)
     # Start the input information
-    info_ed = economic_dispatch_info.local_sources()  # Dynamic information for economic dispatch
-    info_uc = economic_dispatch_info.local_sources()  # Dynamic information for unit commitment
+    # The dynamic information follows the schema of the connection
+    info_ed = dynamic_information(initialize.schema)  # Dynamic information for economic dispatch
+    info_uc = dynamic_information(initialize.schema)  # Dynamic information for unit commitment
     info_opf = opf_model.informaiton_exchange()  # Optimal power flow modelling
 
     # Generate different processes
+    if default_runtime["Runtime"] == "asyncio":
+        # The cycles are the coroutines of one event loop, which are triggered at the same seconds as the cron jobs
+        runtime = OperationRuntime()
+        logger.info("The short term process in UEMS starts!")
+        runtime.add_job("OPF", universal_cycle, ("OPF", universal_model_short, local_model_short, socket_upload,
+                                                 info_opf, session_uems), 60, 1)  # **:01 of each minute
+        logger.info("The middle term process in UEMS starts!")
+        runtime.add_job("ED", universal_cycle, ("ED", universal_model_middle, local_model_middle, socket_upload_ed,
+                                                info_ed, session_uems), 300, 5)  # Every 5 minute
+        logger.info("The long term process in UEMS starts!")
+        runtime.add_job("UC", universal_cycle, ("UC", universal_model_long, local_model_long, socket_upload_uc,
+                                                info_uc, session_uems), 1800, 30)  # Every half an hour
+        runtime.add_job("Pool_status", log_pool_status, (), 1800, 50)  # The metrics of the connection pools
+        runtime.add_job("Runtime_status", runtime.log_status, (), 1800, 55)  # The metrics of the cycles and stages
+        runtime.start()
+        return
+
     logger.info("The short term process in UEMS starts!")
     sched_uems = BlockingScheduler()  # The schedulor for the optimal power flow
-    sched_uems.add_job(short_term_operation.short_term_operation_uems, 'cron',
+    sched_uems.add_job(session_task(short_term_operation.short_term_operation_uems), 'cron',
                        args=(universal_model_short, local_model_short, socket_upload, socket_download, info_opf,
-                             session_uems_short), minute='0-59',
+                             session_uems), minute='0-59',
                        second='1')  # The operation is triggered minutely, this process will start at **:01
 
     logger.info("The middle term process in UEMS starts!")
-    sched_uems.add_job(middle_term_operation.middle_term_operation_uems, 'cron',
+    sched_uems.add_job(session_task(middle_term_operation.middle_term_operation_uems), 'cron',
                        args=(universal_model_middle, local_model_middle, socket_upload_ed, socket_download, info_ed,
-                             session_uems_middle), minute='*/5',
+                             session_uems), minute='*/5',
                        second='5')  # The operation is triggered every 5 minute
 
     logger.info("The long term process in UEMS starts!")
-    sched_uems.add_job(long_term_operation.long_term_operation_uems, 'cron',
+    sched_uems.add_job(session_task(long_term_operation.long_term_operation_uems), 'cron',
                        args=(universal_model_long, local_model_long, socket_upload_uc, socket_download, info_uc,
-                             session_uems_long), minute='*/30',
+                             session_uems), minute='*/30',
                        second='30')  # The operation is triggered every half an hour
+    sched_uems.add_job(log_pool_status, 'cron', minute='*/30', second='50')  # The metrics of the connection pools
     sched_uems.start()
     # for i in range(100):
     #     long_term_operation.long_term_operation_uems(universal_model_long, local_model_long, socket_upload_uc,
     #                                              socket_download, info_uc,
-    #                                              session_uems_long)
+    #                                              session_uems)
     #     middle_term_operation.middle_term_operation_uems(universal_model_middle, local_model_middle, socket_upload_ed,
-    #                                                 socket_download, info_ed,session_uems_middle)
+    #                                                 socket_download, info_ed,session_uems)
     #     short_term_operation.short_term_operation_uems(universal_model_short, local_model_short, socket_upload, socket_download, info_opf,
-    #         session_uems_short)
+    #         session_uems)
 
 
 